@@ -0,0 +1,103 @@
+"""Синтетические наборы данных в разметке data/initial, увеличенные в scale раз.
+
+Каждый исходный файл запуска копируется scale раз с новыми отметками
+времени в имени и случайным разбросом значений: Distance и TimeInSec для ГА,
+ElapsedMilliseconds для TwoOpt/LKH. Распределения и структура файлов
+остаются такими же, как в исходных данных.
+
+Пример:
+    python -m benchmarks.generate --scale 10 --output /tmp/bench-x10
+"""
+import argparse
+import datetime
+import json
+import os
+import re
+
+import numpy as np
+
+INITIAL_DIR = 'data/initial'
+# Длина синтетического ряда Costs для потокового чтения при scale = 1
+LONG_SERIES = 100_000
+
+_GA_STAMP = re.compile(r'(?P<prefix>.+?)(?P<stamp>\d{14})\.json$')
+_BASE_TIME = datetime.datetime(2024, 1, 1)
+
+
+def _jitter_ga(data, rng):
+    """Копия файла ГА с разбросом Distance (±5%) и TimeInSec (±20%)."""
+    indicators = []
+    for record in data['NumericalIndicators']:
+        distance = max(1, int(round(record['Distance'] * rng.uniform(0.95, 1.05))))
+        indicators.append(dict(record, Distance=distance, Fintess=round(1 - distance / 100000, 5),
+                               TimeInSec=record['TimeInSec'] * rng.uniform(0.8, 1.2)))
+    return dict(data, NumericalIndicators=indicators)
+
+
+def _jitter_tsp(data, rng):
+    """Копия запуска TwoOpt/LKH с разбросом ElapsedMilliseconds (±20%)."""
+    return dict(data, ElapsedMilliseconds=int(data['ElapsedMilliseconds'] * rng.uniform(0.8, 1.2)))
+
+
+def generate(output, scale, seed=0, initial_dir=INITIAL_DIR):
+    """Создание output/data/initial в scale раз больше initial_dir.
+
+    Возвращает число записанных файлов.
+    """
+    rng = np.random.default_rng(seed)
+    target_root = os.path.join(output, 'data', 'initial')
+    count = 0
+    for folder, _, names in sorted(os.walk(initial_dir)):
+        relative = os.path.relpath(folder, initial_dir)
+        target = os.path.join(target_root, relative)
+        tsp = relative.split(os.sep)[0] in ('twoopt', 'lkh')
+        for name in sorted(names):
+            if not name.endswith('.json'):
+                continue
+            with open(os.path.join(folder, name), encoding='utf-8') as f:
+                data = json.load(f)
+            match = None if tsp else _GA_STAMP.match(name)
+            if not tsp and match is None:
+                continue
+            os.makedirs(target, exist_ok=True)
+            for copy in range(scale):
+                moment = _BASE_TIME + datetime.timedelta(seconds=count)
+                if tsp:
+                    path = os.path.join(target, f'solution_{moment:%Y-%m-%d_%H-%M-%S}.json')
+                    content = _jitter_tsp(data, rng)
+                else:
+                    path = os.path.join(target, f"{match.group('prefix')}{moment:%d%m%Y%H%M%S}.json")
+                    content = _jitter_ga(data, rng)
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(content, f, indent=2)
+                count += 1
+    return count
+
+
+def generate_long_series(path, length, seed=0):
+    """Файл запуска с одним длинным рядом Costs для потокового чтения."""
+    rng = np.random.default_rng(seed)
+    costs = rng.integers(1, 100, size=length)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n  "Algorithm": "TwoOpt",\n  "Costs": [\n    ')
+        for start in range(0, length, 100_000):
+            if start:
+                f.write(',\n    ')
+            f.write(',\n    '.join(map(str, costs[start:start + 100_000].tolist())))
+        f.write(f'\n  ],\n  "TotalSum": {int(costs.sum())}\n}}\n')
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Синтетические данные для замеров производительности.')
+    parser.add_argument('--scale', type=int, required=True, help='во сколько раз больше исходных данных')
+    parser.add_argument('--output', required=True, help='папка, в которой создаётся data/initial')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    count = generate(args.output, args.scale, args.seed)
+    generate_long_series(os.path.join(args.output, 'long_costs.json'), LONG_SERIES * args.scale, args.seed)
+    print(f'Записано файлов: {count}')
+
+
+if __name__ == '__main__':
+    main()
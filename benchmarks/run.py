@@ -0,0 +1,292 @@
+"""Замеры загрузки, агрегации и отрисовки по разделам страниц.
+
+Для каждого замера измеряются время холодного запуска (кэши сброшены),
+медиана времени тёплых повторов и пиковый объём памяти Python (tracemalloc)
+холодного запуска. Результаты сохраняются в JSON; с --baseline результаты
+сравниваются с прошлым запуском и код возврата 1 означает, что какой-то
+замер стал медленнее больше чем на --threshold.
+
+Пример:
+    python -m benchmarks.run --scale 10 --output x10.json
+    python -m benchmarks.run --scale 10 --baseline x10.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pyarrow as pa
+
+from benchmarks.generate import LONG_SERIES, generate, generate_long_series
+
+# Разница меньше этого порога (сек) не считается замедлением
+NOISE_FLOOR = 0.005
+METRICS = ('cold_s', 'warm_s')
+
+SELECTIONS = ["EliteSelection", "RouletteWheel", "StochasticUniversalSampling", "Tournament"]
+MUTATIONS = ["DisplacementMutation", "InsertionMutation", "ReverseSequenceMutation", "TworsMutation"]
+CROSSOVERS = ["CycleCrossover", "OnePointCrossover", "OrderBasedCrossover", "OrderedCrossover", "PartiallyMappedCrossover",
+              "PositionBasedCrossover", "ThreeParentCrossover", "TwoPointCrossover", "UniformCrossover"]
+ITERATIONS = [10, 100, 1000, 10000]
+
+
+def _reset_store():
+    """Удаление хранилища: следующий ingest загружает всё заново."""
+    from core import aggregates, shared
+    shutil.rmtree('data/store', ignore_errors=True)
+    aggregates.clear_cache()
+    shared.clear()
+
+
+def _reset_index():
+    """Сброс индекса агрегатов в памяти и на диске."""
+    from core import aggregates
+    aggregates.clear_cache()
+    for kind in ('ga', 'tsp'):
+        path = aggregates.index_path(kind)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _reset_shared():
+    """Сброс общего слоя данных вместе с файлами Arrow."""
+    from core import shared
+    shared.clear()
+    shutil.rmtree(shared.CACHE_DIR, ignore_errors=True)
+
+
+def _reset_charts():
+    from core import charts
+    charts.clear_cache()
+
+
+def _reset_loader():
+    from core import loader
+    loader.clear_cache()
+
+
+def _reset_stats():
+    from core import stats
+    stats.clear_cache()
+
+
+def _reset_query():
+    """Сброс единого индекса, кэша ответов и индекса агрегатов."""
+    from core import query
+    query.clear_cache()
+    _reset_index()
+
+
+def _nothing():
+    pass
+
+
+def benchmarks(workdir):
+    """Замеры: (имя, раздел страницы, функция, сброс кэшей для холодного запуска)."""
+    from core import aggregates, bundle, charts, ingest, loader, query, shared, stats, streaming, tours
+
+    def ingest_full():
+        ingest.ingest(full=True)
+
+    def ingest_incremental():
+        ingest.ingest()
+
+    def load_json_files():
+        folder = 'data/initial/Tournament/TworsMutation'
+        for name in sorted(os.listdir(folder)):
+            loader.load_json(os.path.join(folder, name))
+
+    def index():
+        aggregates.get_index()
+
+    def comparison():
+        query.clear_cache()
+        query.comparison(SELECTIONS, MUTATIONS, CROSSOVERS, ITERATIONS)
+
+    def tsp_best():
+        aggregates.tsp_best('TwoOpt', 100)
+        aggregates.stats_frame(aggregates.tsp_stats('TwoOpt', 100), {'Сумма': 'total', 'Время': 'elapsed'})
+
+    def tsp_initial():
+        shared.frame('tsp', sort_by='repeat', algorithm='twoopt', iterations=100)
+
+    def ga_best():
+        aggregates.ga_best('Tournament', 'TworsMutation', 'CycleCrossover', 1000)
+        aggregates.stats_frame(aggregates.ga_stats('Tournament', 'TworsMutation', 'CycleCrossover', 1000),
+                               {'Дистанция': 'distance', 'Время': 'time'})
+
+    def ga_initial():
+        shared.frame('ga', ['iterations', 'TimeInSec', 'Fitness', 'Distance'],
+                     selection='Tournament', mutation='TworsMutation', crossover='CycleCrossover')
+
+    def costs_figure():
+        import pandas as pd
+        costs = aggregates.tsp_best('TwoOpt', 100)['Costs']
+        df = pd.DataFrame({'Index': range(len(costs)), 'Costs': costs})
+        charts.line_png(df, 'Index', {'Costs': 'Costs'}, 'Costs', 'Индекс', 'Costs', annotate=True)
+
+    def comparison_figure():
+        matrix = query.comparison(SELECTIONS, MUTATIONS, CROSSOVERS, ITERATIONS)
+        df = matrix.T
+        df.columns = ['_'.join(key) for key in matrix.index]
+        df = df.rename_axis(None, axis=1).rename_axis('Iterations').reset_index()
+        columns = [column for column in df.columns if column != 'Iterations']
+        charts.line_png(df, 'Iterations', {column: column for column in columns}, 'Сравнение', 'Итерации', 'Дистанция')
+
+    def ga_ranking():
+        stats.ga_ranking()
+
+    def verify_tours():
+        tours.verify_stored()
+
+    def tour_overlap():
+        tours.overlap_matrix(tours.stored_tours()['Solution'])
+
+    def query_best():
+        for count in ITERATIONS:
+            query.query('ga', 'best', selection='Tournament', iterations=count)
+
+    def query_runs():
+        query.query('tsp', 'runs', algorithm='twoopt', iterations=100, offset=0, limit=50)
+
+    def bundle_export():
+        bundle.export_bundle(os.path.join(workdir, 'experiments' + bundle.SUFFIX))
+
+    def bundle_check():
+        bundle.import_bundle(os.path.join(workdir, 'experiments' + bundle.SUFFIX), dry_run=True)
+
+    def stream_costs():
+        for _ in streaming.running_aggregates(streaming.iter_number_chunks(os.path.join(workdir, 'long_costs.json'),
+                                                                           'Costs')):
+            pass
+
+    return [
+        ('ingest.full', 'хранилище', ingest_full, _reset_store),
+        ('ingest.incremental', 'хранилище', ingest_incremental, _nothing),
+        ('loader.json', 'load_data', load_json_files, _reset_loader),
+        ('aggregates.index', 'агрегаты', index, _reset_index),
+        ('query.comparison', 'Генетический алгоритм / Сравнение методов', comparison, _reset_query),
+        ('tsp.best', 'TwoOpt и LKH / Лучшие результаты', tsp_best, _reset_index),
+        ('tsp.initial', 'TwoOpt и LKH / Исходные данные', tsp_initial, _reset_shared),
+        ('tsp.costs_figure', 'TwoOpt и LKH / Лучшие результаты', costs_figure, _reset_charts),
+        ('ga.best', 'Генетический алгоритм / Лучшие результаты', ga_best, _reset_index),
+        ('ga.initial', 'Генетический алгоритм / Исходные данные', ga_initial, _reset_shared),
+        ('ga.comparison_figure', 'Генетический алгоритм / Сравнение методов', comparison_figure, _reset_charts),
+        ('stats.ga_ranking', 'Генетический алгоритм / Статистика запусков', ga_ranking, _reset_stats),
+        ('tours.verify', 'TwoOpt и LKH / Проверка маршрутов', verify_tours, _reset_shared),
+        ('tours.overlap', 'TwoOpt и LKH / Проверка маршрутов', tour_overlap, _nothing),
+        ('query.best', 'сервис запросов', query_best, _reset_query),
+        ('query.runs', 'сервис запросов', query_runs, _reset_query),
+        ('bundle.export', 'Обмен данными / Экспорт', bundle_export, _nothing),
+        ('bundle.check', 'Обмен данными / Импорт', bundle_check, _nothing),
+        ('streaming.costs', 'TwoOpt и LKH / Исходные данные (поток)', stream_costs, _nothing),
+    ]
+
+
+def measure(function, reset, repeats):
+    """Холодное и тёплое время, пиковая память Python и прирост памяти Arrow."""
+    reset()
+    started = time.perf_counter()
+    function()
+    cold = time.perf_counter() - started
+
+    warm = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        warm.append(time.perf_counter() - started)
+
+    reset()
+    arrow_before = pa.total_allocated_bytes()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'cold_s': cold,
+        'warm_s': statistics.median(warm) if warm else None,
+        'peak_bytes': peak,
+        'arrow_bytes': pa.total_allocated_bytes() - arrow_before,
+    }
+
+
+def run(workdir, repeats=5, only=None):
+    """Выполнение замеров в workdir (в нём должна быть папка data/initial)."""
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        results = {}
+        for name, section, function, reset in benchmarks(workdir):
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            results[name] = dict(measure(function, reset, repeats), section=section)
+            print(f"{name:<24} холодный {results[name]['cold_s']:8.3f} с  тёплый {results[name]['warm_s']:8.4f} с  "
+                  f"память {results[name]['peak_bytes'] / 2 ** 20:8.1f} МБ", file=sys.stderr)
+        files = sum(len(names) for _, _, names in os.walk('data/initial'))
+    finally:
+        os.chdir(previous)
+    return {'files': files, 'repeats': repeats, 'python': platform.python_version(),
+            'machine': platform.machine(), 'created': time.time(), 'results': results}
+
+
+def compare(report, baseline, threshold):
+    """Замеры, ставшие медленнее базовых больше чем на threshold (доля)."""
+    regressions = []
+    for name, result in report['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+        for metric in METRICS:
+            new, old = result.get(metric), base.get(metric)
+            if new is None or not old:
+                continue
+            if new > old * (1 + threshold) and new - old > NOISE_FLOOR:
+                regressions.append({'name': name, 'metric': metric, 'baseline': old, 'value': new,
+                                    'change': new / old - 1})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замеры производительности загрузки, агрегации и отрисовки.')
+    parser.add_argument('--scale', type=int, default=1, help='во сколько раз больше исходных данных (1, 10, 100, 1000)')
+    parser.add_argument('--workdir', default=None, help='папка с синтетическими данными; создаётся, если её нет')
+    parser.add_argument('--repeats', type=int, default=5, help='число тёплых повторов')
+    parser.add_argument('--only', nargs='+', default=None, help='префиксы имён замеров')
+    parser.add_argument('--output', default=None, help='файл JSON с результатами')
+    parser.add_argument('--baseline', default=None, help='файл JSON прошлого запуска для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.2, help='допустимое замедление (доля)')
+    args = parser.parse_args()
+
+    workdir = args.workdir or os.path.join(tempfile.gettempdir(), f'tsp-benchmark-x{args.scale}')
+    if not os.path.isdir(os.path.join(workdir, 'data', 'initial')):
+        print(f'Генерация данных x{args.scale} в {workdir}', file=sys.stderr)
+        generate(workdir, args.scale, initial_dir=os.path.abspath('data/initial'))
+        generate_long_series(os.path.join(workdir, 'long_costs.json'), LONG_SERIES * args.scale)
+
+    report = dict(run(os.path.abspath(workdir), args.repeats, args.only), scale=args.scale)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for item in regressions:
+            print(f"Замедление {item['name']} ({item['metric']}): {item['baseline']:.4f} -> {item['value']:.4f} с "
+                  f"(+{item['change']:.0%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
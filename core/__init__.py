@@ -0,0 +1 @@
+"""Общие модули приложения: загрузка, хранение и обработка данных экспериментов."""
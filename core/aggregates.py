@@ -0,0 +1,188 @@
+"""Индекс агрегатов по исходным запускам: лучшие значения и статистики.
+
+Индекс строится из колоночного хранилища, сохраняется рядом с ним и
+пересобирается только при изменении поколения хранилища.
+"""
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from core import store
+from core.ingest import store_generation
+from core.metrics import instrument
+
+GA_KEYS = ['selection', 'mutation', 'crossover', 'iterations']
+TSP_KEYS = ['algorithm', 'iterations']
+
+_lock = threading.Lock()
+_index = {'generation': None, 'ga': {}, 'tsp': {}, 'frames': {}, 'matrices': {}}
+
+
+def _describe(df, keys, value, prefix):
+    """Статистики столбца value по группам keys."""
+    grouped = df.groupby(keys, observed=True)[value]
+    stats = grouped.agg(['min', 'mean', 'median', 'std', 'count'])
+    stats['p95'] = grouped.quantile(0.95)
+    stats.columns = [f'{prefix}_{name}' for name in stats.columns]
+    return stats
+
+
+def build_ga_index(df):
+    """Агрегаты Distance и TimeInSec по (метод выбора, мутация, кроссовер, поколения)."""
+    df = df.reset_index(drop=True)
+    best = df.loc[df.groupby(GA_KEYS, observed=True)['Distance'].idxmin()].set_index(GA_KEYS)
+    best = best[['Distance', 'TimeInSec', 'Fitness', 'MinPopulation', 'MaxPopulation']].add_prefix('best_')
+    stats = [best, _describe(df, GA_KEYS, 'Distance', 'distance'), _describe(df, GA_KEYS, 'TimeInSec', 'time')]
+    return pd.concat(stats, axis=1).reset_index()
+
+
+def build_tsp_index(df):
+    """Агрегаты TotalSum и ElapsedMilliseconds по (алгоритм, итерации) с лучшим запуском."""
+    df = df.sort_values(['TotalSum', 'ElapsedMilliseconds']).reset_index(drop=True)
+    best = df.loc[df.groupby(TSP_KEYS, observed=True)['TotalSum'].idxmin()].set_index(TSP_KEYS)
+    best = best[['Algorithm', 'TotalSum', 'ElapsedMilliseconds', 'Iterations', 'Costs', 'Solution', 'source']].add_prefix('best_')
+    stats = [best, _describe(df, TSP_KEYS, 'TotalSum', 'total'), _describe(df, TSP_KEYS, 'ElapsedMilliseconds', 'elapsed')]
+    return pd.concat(stats, axis=1).reset_index()
+
+
+def index_path(kind, store_dir=store.STORE_DIR):
+    """Путь к файлу индекса агрегатов."""
+    return os.path.join(store_dir, f'aggregates_{kind}.parquet')
+
+
+def _load_or_build(kind, generation, store_dir):
+    """Чтение индекса с диска или его пересборка, если поколение устарело."""
+    path = index_path(kind, store_dir)
+    if os.path.exists(path):
+        table = pq.read_table(path)
+        if (table.schema.metadata or {}).get(b'generation') == str(generation).encode():
+            return table.to_pandas()
+    source = store.read_table(kind, store_dir=store_dir)
+    if source is None or source.num_rows == 0:
+        return None
+    df = source.to_pandas()
+    for key in ('selection', 'mutation', 'algorithm'):
+        if key in df:
+            df[key] = df[key].astype(str)
+    index = build_ga_index(df) if kind == 'ga' else build_tsp_index(df)
+    table = pa.Table.from_pandas(index, preserve_index=False)
+    table = table.replace_schema_metadata({'generation': str(generation)})
+    pq.write_table(table, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return index
+
+
+@instrument('aggregates.get_index')
+def get_index(store_dir=store.STORE_DIR):
+    """Словари агрегатов {ключ: строка} для ГА и TwoOpt/LKH."""
+    store.ensure_store(store_dir)
+    generation = store_generation(store_dir)
+    with _lock:
+        if _index['generation'] != generation:
+            for kind, keys in (('ga', GA_KEYS), ('tsp', TSP_KEYS)):
+                df = _load_or_build(kind, generation, store_dir)
+                _index['frames'][kind] = df
+                records = df.to_dict('records') if df is not None else []
+                _index[kind] = {tuple(record[key] for key in keys): record for record in records}
+            _index['matrices'] = {}
+            _index['generation'] = generation
+        return _index
+
+
+def clear_cache():
+    """Сброс индекса в памяти; при следующем обращении он читается с диска."""
+    with _lock:
+        _index.update(generation=None, ga={}, tsp={}, frames={}, matrices={})
+
+
+@instrument('aggregates.comparison_matrix')
+def comparison_matrix(value='best_Distance', index=None):
+    """Матрица значения ГА: строки (метод выбора, мутация, кроссовер), столбцы - поколения.
+
+    index - индекс с ключами 'frames' и 'matrices' (по умолчанию get_index();
+    core.query передаёт свой единый индекс). Матрица строится один раз на
+    версию индекса, срезы для любых наборов параметров берутся через
+    select_comparison.
+    """
+    index = get_index() if index is None else index
+    with _lock:
+        matrices = index['matrices']
+        if value not in matrices:
+            df = index['frames'].get('ga')
+            matrices[value] = None if df is None or df.empty else df.pivot_table(
+                index=GA_KEYS[:3], columns='iterations', values=value, aggfunc='first')
+        return matrices[value]
+
+
+@instrument('aggregates.select_comparison')
+def select_comparison(selections, mutations, crossovers, iterations, value='best_Distance', index=None):
+    """Срез матрицы сравнения для декартова произведения параметров.
+
+    Отсутствующие комбинации заполняются NaN.
+    """
+    matrix = comparison_matrix(value, index)
+    rows = pd.MultiIndex.from_product([selections, mutations, crossovers], names=GA_KEYS[:3])
+    if matrix is None:
+        return pd.DataFrame(index=rows, columns=iterations, dtype=float)
+    return matrix.reindex(index=rows, columns=iterations)
+
+
+def ga_stats(selection, mutation, crossover, iterations):
+    """Строка агрегатов ГА или None."""
+    return get_index()['ga'].get((selection, mutation, crossover, int(iterations)))
+
+
+def tsp_stats(algorithm, iterations):
+    """Строка агрегатов TwoOpt/LKH или None."""
+    return get_index()['tsp'].get((algorithm.lower(), int(iterations)))
+
+
+def ga_best_record(row):
+    """Строка индекса ГА в формате data/best/best_results_*.json."""
+    return {
+        'Distance': row['best_Distance'],
+        'Data': {
+            'GenerationCount': row['iterations'],
+            'MinPopulation': row['best_MinPopulation'],
+            'MaxPopulation': row['best_MaxPopulation'],
+            'TimeInSec': row['best_TimeInSec'],
+            'Fintess': row['best_Fitness'],
+            'Distance': row['best_Distance'],
+        },
+    }
+
+
+def tsp_best_record(row):
+    """Строка индекса TwoOpt/LKH в формате data/best/best_solutions_*.json."""
+    return {
+        'Algorithm': row['best_Algorithm'],
+        'Solution': list(row['best_Solution']),
+        'Costs': list(row['best_Costs']),
+        'TotalSum': row['best_TotalSum'],
+        'Iterations': row['best_Iterations'],
+        'ElapsedMilliseconds': row['best_ElapsedMilliseconds'],
+    }
+
+
+def ga_best(selection, mutation, crossover, iterations):
+    """Лучший результат ГА в формате data/best/best_results_*.json."""
+    row = ga_stats(selection, mutation, crossover, iterations)
+    return None if row is None else ga_best_record(row)
+
+
+def tsp_best(algorithm, iterations):
+    """Лучший запуск TwoOpt/LKH в формате data/best/best_solutions_*.json."""
+    row = tsp_stats(algorithm, iterations)
+    return None if row is None else tsp_best_record(row)
+
+
+def stats_frame(row, prefixes):
+    """Таблица статистик строки индекса: {подпись: префикс столбцов}."""
+    names = ['min', 'mean', 'median', 'std', 'p95', 'count']
+    return pd.DataFrame(
+        {label: [row[f'{prefix}_{name}'] for name in names] for label, prefix in prefixes.items()},
+        index=['Лучшее', 'Среднее', 'Медиана', 'Ст. отклонение', '95-й перцентиль', 'Количество'],
+    )
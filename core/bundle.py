@@ -0,0 +1,396 @@
+"""Архивы экспериментов: перенос data/initial одним сжатым файлом.
+
+Архив - поток zstd (pyarrow.CompressedOutputStream), внутри которого подряд
+записаны сигнатура, длина и JSON манифеста и по одному потоку Arrow IPC на
+таблицу: 'ga' (файл ГА на строку, NumericalIndicators - список структур) и
+'tsp' (запуск TwoOpt/LKH на строку). Схемы таблиц версионируются
+(SCHEMA_VERSION) и при импорте сверяются с ожидаемыми, затем проверяются поля,
+без которых страницы не покажут запуск. Архив читается одним
+последовательным проходом; файлы распаковываются во временный каталог и
+переносятся в data/initial, только если весь архив прочитан и прошёл проверку.
+
+Пример:
+    python -m core.bundle export experiments.bundle.zst
+    python -m core.bundle info experiments.bundle.zst
+    python -m core.bundle import experiments.bundle.zst
+"""
+import argparse
+import datetime
+import json
+import os
+import posixpath
+import re
+import shutil
+import struct
+import sys
+import tempfile
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from core import store
+
+MAGIC = b'TSPBUNDLE\n'
+FORMAT = 'kursovaya-bundle'
+SCHEMA_VERSION = 1
+SUFFIX = '.bundle.zst'
+# Файлов в одном пакете записи
+BATCH_FILES = 256
+
+INDICATOR = pa.struct([
+    ('GenerationCount', pa.int32()),
+    ('MinPopulation', pa.int32()),
+    ('MaxPopulation', pa.int32()),
+    ('TimeInSec', pa.float64()),
+    ('Fintess', pa.float64()),
+    ('Distance', pa.int64()),
+])
+
+# Столбцы идут в порядке ключей файлов запусков, чтобы импорт воспроизводил их разметку
+SCHEMAS = {
+    'ga': pa.schema([
+        ('source', pa.string()),
+        ('Mutation', pa.string()),
+        ('Selection', pa.string()),
+        ('Crossover', pa.string()),
+        ('Fitness', pa.string()),
+        ('Chromosome', pa.string()),
+        ('Population', pa.string()),
+        ('NumericalIndicators', pa.list_(INDICATOR)),
+        ('extra', pa.string()),
+    ]),
+    'tsp': pa.schema([
+        ('source', pa.string()),
+        ('Algorithm', pa.string()),
+        ('Solution', pa.list_(pa.int32())),
+        ('Costs', pa.list_(pa.int64())),
+        ('TotalSum', pa.int64()),
+        ('Iterations', pa.int32()),
+        ('ElapsedMilliseconds', pa.int64()),
+        ('Instance', pa.string()),
+        ('extra', pa.string()),
+    ]),
+}
+
+# Поля, без которых запуск не отображается на страницах (display_algorithm_data,
+# display_genetic_algorithm_data и графики Costs)
+REQUIRED = {
+    'ga': ['source', 'NumericalIndicators'],
+    'tsp': ['source', 'TotalSum', 'ElapsedMilliseconds', 'Iterations', 'Costs', 'Solution'],
+}
+REQUIRED_INDICATORS = ['GenerationCount', 'TimeInSec', 'Fintess', 'Distance']
+
+# Ключ исходного файла: ga - {Selection}/{Mutation}/{имя}.json, tsp - {алгоритм}/{итерации}/{имя}.json
+_SOURCE = {
+    'ga': re.compile(r'^[A-Za-z0-9_]+/[A-Za-z0-9_]+/[A-Za-z0-9_.-]+\.json$'),
+    'tsp': re.compile(r'^(%s)/\d+/[A-Za-z0-9_.-]+\.json$' % '|'.join(store.TSP_ALGORITHMS)),
+}
+
+
+class BundleError(ValueError):
+    """Архив повреждён или не соответствует схеме."""
+
+
+def _extra(data, known):
+    """Поля файла, для которых нет столбцов, в виде JSON (или None)."""
+    extra = {key: value for key, value in data.items() if key not in known}
+    return json.dumps(extra, ensure_ascii=False) if extra else None
+
+
+def _ga_record(source, data):
+    record = {name: data.get(name) for name in SCHEMAS['ga'].names if name not in ('source', 'extra')}
+    record['source'] = source
+    record['extra'] = _extra(data, SCHEMAS['ga'].names)
+    return record
+
+
+def _tsp_record(source, data):
+    record = {name: data.get(name) for name in SCHEMAS['tsp'].names if name not in ('source', 'extra')}
+    record['source'] = source
+    record['extra'] = _extra(data, SCHEMAS['tsp'].names)
+    return record
+
+
+def sources(initial_dir):
+    """Файлы запусков data/initial по видам: {'ga': [...], 'tsp': [...]}."""
+    found = {'ga': [], 'tsp': []}
+    for folder, _, names in sorted(os.walk(initial_dir)):
+        relative = os.path.relpath(folder, initial_dir)
+        parts = relative.split(os.sep)
+        if len(parts) != 2:
+            continue
+        kind = store.partition_kind(parts[0])
+        for name in sorted(names):
+            if name.endswith('.json'):
+                found[kind].append(posixpath.join(parts[0], parts[1], name))
+    return found
+
+
+def _batches(kind, names, initial_dir):
+    """Пакеты записей таблицы kind, читаемые из файлов по BATCH_FILES."""
+    make = _ga_record if kind == 'ga' else _tsp_record
+    for start in range(0, len(names), BATCH_FILES):
+        records = []
+        for source in names[start:start + BATCH_FILES]:
+            with open(os.path.join(initial_dir, source), encoding='utf-8') as f:
+                records.append(make(source, json.load(f)))
+        yield pa.RecordBatch.from_pylist(records, schema=SCHEMAS[kind])
+
+
+def write_bundle(sink, initial_dir=store.INITIAL_DIR):
+    """Запись data/initial в поток sink (pyarrow NativeFile). Возвращает манифест."""
+    files = sources(initial_dir)
+    manifest = {
+        'format': FORMAT,
+        'schema_version': SCHEMA_VERSION,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'tables': {kind: {'files': len(names)} for kind, names in files.items()},
+    }
+    header = json.dumps(manifest, ensure_ascii=False).encode()
+    out = pa.CompressedOutputStream(sink, 'zstd')
+    out.write(MAGIC + struct.pack('<Q', len(header)) + header)
+    for kind, names in files.items():
+        schema = SCHEMAS[kind].with_metadata({'table': kind, 'schema_version': str(SCHEMA_VERSION)})
+        with pa.ipc.new_stream(out, schema) as writer:
+            for batch in _batches(kind, names, initial_dir):
+                writer.write_batch(batch)
+    out.close()
+    return manifest
+
+
+def export_bundle(path, initial_dir=store.INITIAL_DIR):
+    """Запись data/initial в файл архива. Возвращает манифест."""
+    with pa.OSFile(path + '.tmp', 'wb') as sink:
+        manifest = write_bundle(sink, initial_dir)
+    os.replace(path + '.tmp', path)
+    return manifest
+
+
+def export_bytes(initial_dir=store.INITIAL_DIR):
+    """Архив data/initial в памяти (для скачивания со страницы)."""
+    sink = pa.BufferOutputStream()
+    write_bundle(sink, initial_dir)
+    return sink.getvalue().to_pybytes()
+
+
+def _open(source):
+    """Поток распаковки архива из пути, байтов или файлового объекта."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = pa.BufferReader(source)
+    elif not isinstance(source, (str, os.PathLike, pa.NativeFile)):
+        source = pa.PythonFile(source, mode='r')
+    return pa.CompressedInputStream(source, 'zstd')
+
+
+def _read_manifest(stream):
+    """Сигнатура и манифест в начале архива."""
+    try:
+        prefix = stream.read(len(MAGIC) + 8)
+    except OSError as e:
+        raise BundleError(f'не поток zstd: {e}') from None
+    if len(prefix) < len(MAGIC) + 8 or prefix[:len(MAGIC)] != MAGIC:
+        raise BundleError('не архив экспериментов')
+    length, = struct.unpack('<Q', prefix[len(MAGIC):])
+    try:
+        manifest = json.loads(stream.read(length))
+    except (OSError, ValueError) as e:
+        raise BundleError(f'манифест повреждён: {e}') from None
+    if manifest.get('format') != FORMAT:
+        raise BundleError(f"неизвестный формат {manifest.get('format')}")
+    if manifest.get('schema_version') != SCHEMA_VERSION:
+        raise BundleError(f"версия схемы {manifest.get('schema_version')} не поддерживается (ожидалась {SCHEMA_VERSION})")
+    return manifest
+
+
+def validate_batch(kind, batch):
+    """Проверка пакета таблицы kind: обязательные поля и пути файлов. Возвращает список ошибок."""
+    errors = []
+    for name in REQUIRED[kind]:
+        nulls = batch.column(name).null_count
+        if nulls:
+            errors.append(f'{kind}: {nulls} строк без {name}')
+    for source in batch.column('source').to_pylist():
+        if source is not None and (not _SOURCE[kind].match(source) or '..' in source.split('/')):
+            errors.append(f'{kind}: недопустимый путь {source}')
+    if kind == 'ga':
+        indicators = pc.list_flatten(batch.column('NumericalIndicators'))
+        for name in REQUIRED_INDICATORS:
+            nulls = pc.struct_field(indicators, name).null_count
+            if nulls:
+                errors.append(f'ga: {nulls} показателей без {name}')
+        empty = pc.sum(pc.equal(pc.list_value_length(batch.column('NumericalIndicators')), 0)).as_py() or 0
+        if empty:
+            errors.append(f'ga: {empty} файлов без NumericalIndicators')
+    else:
+        from core import tours
+
+        result = tours.verify(batch.column('Solution'), batch.column('Costs'),
+                              batch.column('TotalSum').to_numpy(zero_copy_only=False))
+        for source, problems in zip(batch.column('source').to_pylist(), result['problems']):
+            if problems:
+                errors.append(f'tsp: {source}: {problems}')
+    return errors
+
+
+def read_bundle(source):
+    """Манифест и генератор пакетов (таблица, RecordBatch) с проверкой схем.
+
+    Пакеты распаковываются по мере чтения, архив читается один раз.
+    """
+    stream = _open(source)
+    manifest = _read_manifest(stream)
+
+    def batches():
+        try:
+            for kind in manifest['tables']:
+                if kind not in SCHEMAS:
+                    raise BundleError(f'неизвестная таблица {kind}')
+                reader = pa.ipc.open_stream(stream)
+                metadata = reader.schema.metadata or {}
+                if metadata.get(b'table') != kind.encode():
+                    raise BundleError(f'ожидалась таблица {kind}')
+                if not reader.schema.remove_metadata().equals(SCHEMAS[kind]):
+                    raise BundleError(f'схема таблицы {kind} не совпадает с версией {SCHEMA_VERSION}')
+                rows = 0
+                for batch in reader:
+                    rows += batch.num_rows
+                    yield kind, batch
+                if rows != manifest['tables'][kind]['files']:
+                    raise BundleError(f"{kind}: {rows} строк вместо {manifest['tables'][kind]['files']}")
+        except (pa.ArrowInvalid, OSError) as e:
+            raise BundleError(f'архив повреждён: {e}') from None
+        finally:
+            stream.close()
+
+    return manifest, batches()
+
+
+def _json_record(kind, record):
+    """Содержимое файла запуска из строки таблицы (в исходном порядке полей)."""
+    extra = json.loads(record.pop('extra') or '{}')
+    record.pop('source')
+    if kind == 'ga':
+        data = {name: value for name, value in record.items() if value is not None or name == 'NumericalIndicators'}
+    else:
+        data = {name: value for name, value in record.items() if value is not None}
+    data.update(extra)
+    return data
+
+
+def _target_path(initial_dir, relative):
+    """Путь файла запуска внутри initial_dir; путь за его пределами - BundleError."""
+    root = os.path.realpath(initial_dir)
+    path = os.path.join(initial_dir, *relative.split('/'))
+    if os.path.commonpath([os.path.realpath(path), root]) != root:
+        raise BundleError(f'недопустимый путь {relative}')
+    return path
+
+
+def import_bundle(source, initial_dir=store.INITIAL_DIR, store_dir=store.STORE_DIR, replace=False, dry_run=False,
+                  ingest=True):
+    """Проверка и распаковка архива в initial_dir.
+
+    Существующие файлы с другим содержимым пропускаются, если не задан replace.
+    Новые и изменённые файлы сначала пишутся во временный каталог рядом с
+    initial_dir и переносятся на место, только если все пакеты прошли
+    validate_batch; иначе ничего не записывается, а ошибки возвращаются в
+    сводке импорта. Повреждённый или обрезанный архив - BundleError, тоже без
+    записи.
+    """
+    manifest, batches = read_bundle(source)
+    summary = {'manifest': manifest, 'written': 0, 'unchanged': 0, 'skipped': [], 'errors': []}
+    parent = os.path.dirname(os.path.abspath(initial_dir))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.bundle-import-', dir=parent)
+    staged = []
+    try:
+        for kind, batch in batches:
+            errors = validate_batch(kind, batch)
+            if errors:
+                summary['errors'].extend(errors)
+                continue
+            if dry_run or summary['errors']:
+                continue
+            for record in batch.to_pylist():
+                relative = record['source']
+                data = _json_record(kind, record)
+                path = _target_path(initial_dir, relative)
+                if os.path.exists(path):
+                    with open(path, encoding='utf-8') as f:
+                        try:
+                            same = json.load(f) == data
+                        except ValueError:
+                            same = False
+                    if same:
+                        summary['unchanged'] += 1
+                        continue
+                    if not replace:
+                        summary['skipped'].append(relative)
+                        continue
+                temporary = os.path.join(staging, *relative.split('/'))
+                os.makedirs(os.path.dirname(temporary), exist_ok=True)
+                with open(temporary, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                staged.append((temporary, path))
+        if summary['errors'] or dry_run:
+            return summary
+        for temporary, path in staged:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temporary, path)
+            summary['written'] += 1
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    if ingest and summary['written']:
+        from core import ingest as ingest_module
+
+        ingest_module.ingest(initial_dir, store_dir)
+    return summary
+
+
+def info(source):
+    """Манифест архива и число строк таблиц (архив читается целиком с проверкой схем)."""
+    manifest, batches = read_bundle(source)
+    rows = {}
+    for kind, batch in batches:
+        rows[kind] = rows.get(kind, 0) + batch.num_rows
+    return dict(manifest, rows=rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Экспорт и импорт архивов экспериментов.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help='запись data/initial в архив')
+    export.add_argument('path')
+    export.add_argument('--initial-dir', default=store.INITIAL_DIR)
+    load = commands.add_parser('import', help='распаковка архива в data/initial')
+    load.add_argument('path')
+    load.add_argument('--initial-dir', default=store.INITIAL_DIR)
+    load.add_argument('--store-dir', default=store.STORE_DIR)
+    load.add_argument('--replace', action='store_true', help='перезаписывать файлы с другим содержимым')
+    load.add_argument('--dry-run', action='store_true', help='только проверка')
+    show = commands.add_parser('info', help='манифест архива')
+    show.add_argument('path')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'export':
+            manifest = export_bundle(args.path, args.initial_dir)
+            files = sum(table['files'] for table in manifest['tables'].values())
+            print(f'Записано файлов: {files}, размер архива: {os.path.getsize(args.path) / 1024:.0f} КБ')
+        elif args.command == 'info':
+            print(json.dumps(info(args.path), indent=2, ensure_ascii=False))
+        else:
+            summary = import_bundle(args.path, args.initial_dir, args.store_dir, args.replace, args.dry_run)
+            for error in summary['errors']:
+                print(error, file=sys.stderr)
+            print(f"Записано: {summary['written']}, без изменений: {summary['unchanged']}, "
+                  f"пропущено: {len(summary['skipped'])}, ошибок: {len(summary['errors'])}")
+            if summary['errors']:
+                sys.exit(1)
+    except BundleError as e:
+        print(f'Ошибка архива: {e}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
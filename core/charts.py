@@ -0,0 +1,302 @@
+"""Слой отрисовки графиков: кэш готовых изображений, прореживание длинных рядов
+и выбор между Matplotlib и клиентской отрисовкой Vega-Lite."""
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from core.lazy import lazy_import
+from core.metrics import instrument
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+BACKENDS = ["Matplotlib", "Vega-Lite"]
+
+# Максимум точек одного ряда на графике и подписей значений
+MAX_POINTS = 500
+MAX_ANNOTATIONS = 20
+
+# Минимальный интервал между обновлениями потокового графика (сек)
+LIVE_INTERVAL = 0.5
+
+# Лимит памяти кэша готовых PNG изображений
+CACHE_BYTES = 64 * 1024 * 1024
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'bytes': 0}
+
+
+def select_backend():
+    """Переключатель способа отрисовки графиков в боковой панели."""
+    return st.sidebar.radio("Отрисовка графиков:", BACKENDS, key='chart_backend')
+
+
+def lttb(x, y, threshold):
+    """Индексы точек после прореживания Largest-Triangle-Three-Buckets.
+
+    Глобальные минимум и максимум ряда всегда сохраняются.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:max(next_end, next_start + 1)].mean()
+        avg_y = y[next_start:max(next_end, next_start + 1)].mean()
+        # Площадь треугольника (предыдущая точка, кандидат, среднее следующей корзины)
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    extremes = [int(np.nanargmin(y)), int(np.nanargmax(y))]
+    return np.unique(np.concatenate([selected, extremes]))
+
+
+def downsample(df, x, columns, threshold=MAX_POINTS):
+    """Прореживание таблицы: объединение точек, отобранных LTTB для каждого ряда."""
+    if len(df) <= threshold:
+        return df
+    keep = set()
+    for column in columns:
+        values = df[column].to_numpy(dtype=float)
+        mask = ~np.isnan(values)
+        positions = np.flatnonzero(mask)
+        keep.update(positions[lttb(df[x].to_numpy()[mask], values[mask], threshold)])
+    return df.iloc[sorted(keep)]
+
+
+def key_points(values, limit=MAX_ANNOTATIONS):
+    """Индексы точек для подписей: все точки короткого ряда, иначе крайние,
+    минимум, максимум и равномерная выборка."""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n <= limit:
+        return np.flatnonzero(~np.isnan(values))
+    points = [0, n - 1, int(np.nanargmin(values)), int(np.nanargmax(values))]
+    points.extend(np.linspace(0, n - 1, limit - len(points)).astype(int))
+    points = np.unique(points)
+    return points[~np.isnan(values[points])]
+
+
+def _digest(value, h):
+    """Добавление значения в хэш входных данных графика."""
+    if isinstance(value, pd.DataFrame):
+        h.update(repr(list(value.columns)).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(value.tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            h.update(repr(key).encode())
+            _digest(value[key], h)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _digest(item, h)
+    else:
+        h.update(repr(value).encode())
+    h.update(b'|')
+
+
+@instrument('charts.render')
+def render(builder, **kwargs):
+    """PNG изображение фигуры builder(**kwargs) с кэшированием по хэшу входных данных.
+
+    Фигура всегда закрывается после сохранения.
+    """
+    import matplotlib.pyplot as plt
+
+    h = hashlib.sha1(f'{builder.__module__}.{builder.__qualname__}'.encode())
+    _digest(kwargs, h)
+    key = h.hexdigest()
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            _stats['hits'] += 1
+            return _cache[key]
+
+    with plt.style.context('ggplot'):
+        fig = builder(**kwargs)
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    png = buffer.getvalue()
+
+    with _lock:
+        _stats['misses'] += 1
+        if key not in _cache:
+            _cache[key] = png
+            _stats['bytes'] += len(png)
+        while _stats['bytes'] > CACHE_BYTES and len(_cache) > 1:
+            _, old = _cache.popitem(last=False)
+            _stats['bytes'] -= len(old)
+    return png
+
+
+def cache_info():
+    """Статистика кэша изображений."""
+    with _lock:
+        return dict(_stats, entries=len(_cache), max_bytes=CACHE_BYTES)
+
+
+def clear_cache():
+    """Очистка кэша изображений и счётчиков."""
+    with _lock:
+        _cache.clear()
+        _stats.update(hits=0, misses=0, bytes=0)
+
+
+def _line_figure(df, x, series, right_series, title, xlabel, ylabel, right_label,
+                 colors, axis_colors, annotate, ylim, right_ylim, marker):
+    """Фигура Matplotlib с одним или двумя осями y."""
+    import matplotlib.pyplot as plt
+
+    fig, ax1 = plt.subplots(figsize=(12, 5))
+    axes = [(ax1, series, ylabel, ylim, axis_colors[0])]
+    if right_series:
+        axes.append((ax1.twinx(), right_series, right_label, right_ylim, axis_colors[1]))
+
+    for ax, columns, label, limits, axis_color in axes:
+        for column, legend in columns.items():
+            color = colors.get(column)
+            ax.plot(df[x], df[column], marker=marker, markersize=6 if marker else 0,
+                    color=color, label=legend)
+            if annotate:
+                values = df[column].to_numpy(dtype=float)
+                xs = df[x].to_numpy()
+                for i in key_points(values):
+                    ax.annotate(f'{values[i]:g}', xy=(xs[i], values[i]), textcoords="offset points",
+                                xytext=(0, 10), ha='center', fontsize=8)
+        ax.set_ylabel(label, fontsize=14)
+        if axis_color:
+            ax.yaxis.label.set_color(axis_color)
+            ax.tick_params(axis='y', labelcolor=axis_color)
+        if limits:
+            ax.set_ylim(*limits)
+
+    ax1.set_xlabel(xlabel, fontsize=14)
+    ax1.set_title(title, fontsize=16)
+    ax1.grid(True, linestyle='--', alpha=0.7)
+    if right_series:
+        ax1.legend(loc='upper left', fontsize=12)
+        axes[1][0].legend(loc='upper right', fontsize=12)
+    else:
+        ax1.legend(fontsize=12)
+    return fig
+
+
+def _vega_chart(df, x, series, right_series, title, xlabel, ylabel, right_label):
+    """Слоистый график Altair (Vega-Lite), отрисовываемый в браузере."""
+    import altair as alt
+
+    def layer(columns, label):
+        data = df[[x, *columns]].melt(x, var_name='series', value_name='value').dropna()
+        data['series'] = data['series'].map(columns)
+        return alt.Chart(data).mark_line(point=len(df) <= 50).encode(
+            x=alt.X(f'{x}:Q', title=xlabel),
+            y=alt.Y('value:Q', title=label, scale=alt.Scale(zero=False)),
+            color=alt.Color('series:N', title=None),
+            tooltip=[alt.Tooltip(f'{x}:Q', title=xlabel), 'series:N', alt.Tooltip('value:Q', title=label)],
+        )
+
+    chart = layer(series, ylabel)
+    if right_series:
+        chart = alt.layer(chart, layer(right_series, right_label)).resolve_scale(y='independent')
+    return chart.properties(title=title, height=400).interactive()
+
+
+def line_png(df, x, series, title, xlabel, ylabel, right_series=None, right_label=None,
+             colors=None, axis_colors=(None, None), annotate=False, ylim=None, right_ylim=None, marker='o'):
+    """PNG изображение линейного графика Matplotlib (с прореживанием и кэшем)."""
+    columns = list(series) + list(right_series or {})
+    df = downsample(df, x, columns)
+    return render(_line_figure, df=df, x=x, series=series, right_series=right_series, title=title,
+                  xlabel=xlabel, ylabel=ylabel, right_label=right_label, colors=colors or {},
+                  axis_colors=axis_colors, annotate=annotate, ylim=ylim, right_ylim=right_ylim, marker=marker)
+
+
+def line_chart(df, x, series, title, xlabel, ylabel, right_series=None, right_label=None,
+               colors=None, axis_colors=(None, None), annotate=False, ylim=None, right_ylim=None, marker='o'):
+    """Линейный график выбранным способом отрисовки.
+
+    series и right_series - словари {столбец: подпись в легенде} для левой и
+    правой оси y, colors - цвета рядов по столбцам. Длинные ряды прореживаются
+    до MAX_POINTS точек, подписи ставятся только у ключевых точек.
+    """
+    if st.session_state.get('chart_backend', BACKENDS[0]) == "Vega-Lite":
+        columns = list(series) + list(right_series or {})
+        df = downsample(df, x, columns)
+        st.altair_chart(_vega_chart(df, x, series, right_series, title, xlabel, ylabel, right_label),
+                        use_container_width=True)
+        return
+    st.image(line_png(df, x, series, title, xlabel, ylabel, right_series, right_label,
+                      colors, axis_colors, annotate, ylim, right_ylim, marker))
+
+
+def _tour_figure(coordinates, path, costs, title, closed):
+    """Карта маршрута: рёбра одним LineCollection, окрашенные по стоимости."""
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    order = np.append(path, path[0]) if closed else path
+    points = coordinates[order]
+    segments = np.stack([points[:-1], points[1:]], axis=1)
+    fig, ax = plt.subplots(figsize=(8, 8))
+    lines = LineCollection(segments, array=costs, cmap='viridis', linewidths=1.5 if len(path) <= 1000 else 0.5)
+    ax.add_collection(lines)
+    ax.scatter(coordinates[:, 0], coordinates[:, 1], s=12 if len(path) <= 1000 else 1, color='black', zorder=3)
+    ax.scatter(*coordinates[path[0]], s=80, color='tab:red', zorder=4, label='Начало')
+    fig.colorbar(lines, ax=ax, label='Стоимость ребра', shrink=0.8)
+    ax.set_title(title, fontsize=16)
+    ax.set_aspect('equal', adjustable='datalim')
+    ax.autoscale_view()
+    ax.legend(fontsize=12)
+    return fig
+
+
+def tour_png(coordinates, path, costs, title, closed=False):
+    """PNG изображение карты маршрута (с кэшем)."""
+    return render(_tour_figure, coordinates=np.asarray(coordinates, dtype=np.float64), path=np.asarray(path),
+                  costs=np.asarray(costs, dtype=np.float64), title=title, closed=closed)
+
+
+def tour_map(coordinates, path, costs, title, closed=False):
+    """Карта маршрута по координатам городов; costs - стоимости рёбер в порядке обхода."""
+    st.image(tour_png(coordinates, path, costs, title, closed))
+
+
+def live_chart(frames, x, series, title, xlabel, ylabel, **kwargs):
+    """Потоковый график: перерисовка на месте по мере поступления таблиц frames.
+
+    Обновления не чаще LIVE_INTERVAL секунд, последняя таблица отображается всегда.
+    Возвращает последнюю таблицу.
+    """
+    placeholder = st.empty()
+    shown = 0.0
+    df = None
+    pending = False
+    for df in frames:
+        pending = True
+        if time.perf_counter() - shown >= LIVE_INTERVAL:
+            with placeholder.container():
+                line_chart(df, x, series, title, xlabel, ylabel, **kwargs)
+            shown = time.perf_counter()
+            pending = False
+    if pending:
+        with placeholder.container():
+            line_chart(df, x, series, title, xlabel, ylabel, **kwargs)
+    return df
@@ -0,0 +1,184 @@
+"""Инкрементальная загрузка data/initial в колоночное хранилище по манифесту файлов.
+
+Манифест хранит размер, время изменения и хэш каждого файла запуска, поэтому
+разбираются только новые и изменённые файлы, а удалённые убираются из хранилища.
+Повреждённый или недописанный файл пропускается с ошибкой в сводке загрузки и
+разбирается снова при следующей загрузке; прежние строки изменённого файла
+остаются в хранилище, пока он не прочитается.
+
+Запуск из командной строки:
+    python -m core.ingest          # инкрементальная загрузка
+    python -m core.ingest --full   # полная пересборка
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+import pyarrow as pa
+
+from core import store
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Минимальный интервал между проверками data/initial в одном процессе (сек)
+REFRESH_INTERVAL = 5.0
+
+_lock = threading.Lock()
+_last_refresh = {}
+
+
+def manifest_path(store_dir=store.STORE_DIR):
+    """Путь к файлу манифеста."""
+    return os.path.join(store_dir, MANIFEST_NAME)
+
+
+def load_manifest(store_dir=store.STORE_DIR):
+    """Чтение манифеста, пустой манифест если файла нет или формат устарел."""
+    try:
+        with open(manifest_path(store_dir), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') == MANIFEST_VERSION:
+            return manifest
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {'format': MANIFEST_VERSION, 'generation': 0, 'dirs': {}, 'files': {}}
+
+
+def save_manifest(manifest, store_dir=store.STORE_DIR):
+    """Атомарная запись манифеста."""
+    os.makedirs(store_dir, exist_ok=True)
+    path = manifest_path(store_dir)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def store_generation(store_dir=store.STORE_DIR):
+    """Номер поколения хранилища, увеличивается при каждом изменении данных."""
+    return load_manifest(store_dir)['generation']
+
+
+def _leaf_dirs(initial_dir):
+    """Папки с файлами запусков: {top}/{sub}."""
+    leaves = []
+    for top in sorted(os.listdir(initial_dir)):
+        top_path = os.path.join(initial_dir, top)
+        if not os.path.isdir(top_path):
+            continue
+        for sub in sorted(os.listdir(top_path)):
+            if os.path.isdir(os.path.join(top_path, sub)):
+                leaves.append(f'{top}/{sub}')
+    return leaves
+
+
+def _list_files(initial_dir, leaf, manifest):
+    """Файлы папки: из манифеста, если папка не менялась, иначе через listdir."""
+    dir_mtime = os.stat(os.path.join(initial_dir, leaf)).st_mtime_ns
+    if manifest['dirs'].get(leaf) == dir_mtime:
+        prefix = leaf + '/'
+        return [source for source in manifest['files'] if source.startswith(prefix)], dir_mtime
+    names = os.listdir(os.path.join(initial_dir, leaf))
+    return [f'{leaf}/{name}' for name in sorted(names) if name.endswith('.json')], dir_mtime
+
+
+def ingest(initial_dir=store.INITIAL_DIR, store_dir=store.STORE_DIR, full=False):
+    """Загрузка новых и изменённых файлов запусков, удаление отсутствующих.
+
+    Возвращает словарь со списками добавленных, изменённых и удалённых файлов
+    и списком ошибок ('файл: ошибка') пропущенных файлов.
+    """
+    with _lock:
+        manifest = load_manifest(store_dir)
+        if full or not manifest['files']:
+            for kind in ('ga', 'tsp'):
+                shutil.rmtree(os.path.join(store_dir, kind), ignore_errors=True)
+            manifest = dict(manifest, dirs={}, files={})
+
+        old_files = manifest['files']
+        files = {}
+        dirs = {}
+        changed = {}
+        summary = {'added': [], 'modified': [], 'removed': [], 'errors': []}
+
+        for leaf in _leaf_dirs(initial_dir):
+            sources, dirs[leaf] = _list_files(initial_dir, leaf, manifest)
+            for source in sources:
+                path = os.path.join(initial_dir, source)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entry = old_files.get(source)
+                if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                    files[source] = entry
+                    continue
+                with open(path, 'rb') as f:
+                    content = f.read()
+                digest = hashlib.sha1(content).hexdigest()
+                if entry and entry['sha1'] == digest:
+                    files[source] = dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                    continue
+                try:
+                    table = store.build_partition(store.partition_kind(leaf.split('/')[0]),
+                                                  [(source, json.loads(content))])
+                except (ValueError, TypeError, AttributeError, KeyError) as e:
+                    summary['errors'].append(f'{source}: {e}')
+                    if entry:
+                        files[source] = entry
+                    # Папка перечитывается при следующей загрузке, иначе новый файл не попадёт в список
+                    dirs.pop(leaf, None)
+                    continue
+                files[source] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': digest}
+                changed[source] = table
+                summary['modified' if entry else 'added'].append(source)
+
+        summary['removed'] = sorted(set(old_files) - set(files))
+
+        # Группировка изменений по партициям {top}/{sub}
+        partitions = {}
+        for source in list(changed) + summary['removed']:
+            top, sub, _ = source.split('/', 2)
+            partitions.setdefault((top, sub), []).append(source)
+
+        for (top, sub), sources in partitions.items():
+            kind = store.partition_kind(top)
+            tables = [changed[source] for source in sources if source in changed]
+            new_table = pa.concat_tables(tables) if tables else None
+            table = store.read_partition(kind, top, sub, store_dir)
+            table = store.merge_partition(kind, table, new_table, set(sources))
+            store.write_partition(kind, top, sub, table, store_dir)
+
+        if partitions or files != old_files or dirs != manifest['dirs']:
+            manifest['files'] = files
+            manifest['dirs'] = dirs
+            if partitions:
+                manifest['generation'] += 1
+            save_manifest(manifest, store_dir)
+
+        _last_refresh[store_dir] = time.monotonic()
+        return summary
+
+
+def refresh(initial_dir=store.INITIAL_DIR, store_dir=store.STORE_DIR, min_interval=REFRESH_INTERVAL):
+    """Инкрементальная загрузка не чаще одного раза в min_interval секунд."""
+    last = _last_refresh.get(store_dir)
+    if last is not None and time.monotonic() - last < min_interval:
+        return None
+    summary = ingest(initial_dir, store_dir)
+    # Сводку неявной загрузки никто не читает, поэтому пропущенные файлы попадают в журнал сервера
+    for error in summary['errors']:
+        print(f'Файл пропущен: {error}', file=sys.stderr)
+    return summary
+
+
+if __name__ == '__main__':
+    result = ingest(full='--full' in sys.argv[1:])
+    for error in result['errors']:
+        print(f'Файл пропущен: {error}', file=sys.stderr)
+    print(f"Добавлено: {len(result['added'])}, изменено: {len(result['modified'])}, удалено: {len(result['removed'])}, "
+          f"пропущено: {len(result['errors'])}")
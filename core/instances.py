@@ -0,0 +1,535 @@
+"""Экземпляры задачи коммивояжёра: файлы TSPLIB и матрицы расстояний на диске.
+
+Файлы *.tsp лежат в data/instances. При первом обращении экземпляр
+разбирается в data/instances/cache/{имя}: координаты (coordinates.npy) и,
+для явных матриц, матрица расстояний (distances.npy) в компактном типе -
+int32 для целых весов, float32 для дробных. Матрица строится и читается
+блоками строк, размер которых ограничен BUDGET_BYTES, и открывается через
+memmap, поэтому экземпляры на 10 000+ городов не требуют памяти под всю
+матрицу. Для экземпляров с координатами матрица на диск не пишется:
+расстояния считаются по координатам (CoordinateDistances), а решателям
+матрица в памяти строится, только если помещается в BUDGET_BYTES.
+
+Пример:
+    python -m core.instances data/instances/berlin52.tsp
+"""
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+import threading
+
+import numpy as np
+
+INSTANCES_DIR = 'data/instances'
+CACHE_DIR = os.path.join(INSTANCES_DIR, 'cache')
+# Память под рабочие массивы при построении матрицы и под матрицу, загружаемую целиком
+BUDGET_BYTES = 256 * 1024 * 1024
+FORMAT_VERSION = 2
+# Случайные экземпляры страницы решателей: хранятся последние RANDOM_KEEP,
+# вытесненные пересоздаются по имени при обращении
+RANDOM_NAME = re.compile(r'random-(\d+)-(\d+)')
+RANDOM_KEEP = 8
+
+# Метрики по координатам, значения которых округляются до целого
+COORDINATE_TYPES = {'EUC_2D', 'EUC_3D', 'CEIL_2D', 'MAN_2D', 'MAN_3D', 'MAX_2D', 'MAX_3D', 'ATT', 'GEO'}
+# Форматы явных матриц: (строки верхнего треугольника, с диагональю); *_COL - транспонированные *_ROW
+EXPLICIT_FORMATS = {
+    'UPPER_ROW': (True, False), 'LOWER_COL': (True, False),
+    'LOWER_ROW': (False, False), 'UPPER_COL': (False, False),
+    'UPPER_DIAG_ROW': (True, True), 'LOWER_DIAG_COL': (True, True),
+    'LOWER_DIAG_ROW': (False, True), 'UPPER_DIAG_COL': (False, True),
+}
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+class InstanceError(ValueError):
+    """Файл экземпляра не разобран или не поддерживается."""
+
+
+def _nint(values):
+    """Округление TSPLIB: (int)(x + 0.5)."""
+    return np.floor(values + 0.5)
+
+
+def _geo_radians(coordinates):
+    """Широта и долгота в радианах по правилу GEO из TSPLIB (градусы.минуты, PI = 3.141592)."""
+    degrees = np.trunc(coordinates)
+    return 3.141592 * (degrees + 5.0 * (coordinates - degrees) / 3.0) / 180.0
+
+
+def pair_distances(kind, first, second):
+    """Расстояния между точками first[i] и second[i] (или с широковещанием) по метрике TSPLIB."""
+    if kind == 'GEO':
+        a, b = _geo_radians(first), _geo_radians(second)
+        q1 = np.cos(a[..., 1] - b[..., 1])
+        q2 = np.cos(a[..., 0] - b[..., 0])
+        q3 = np.cos(a[..., 0] + b[..., 0])
+        arc = np.arccos(np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0))
+        return np.trunc(6378.388 * arc + 1.0)
+    # Покоординатно: суммирование по короткой последней оси в NumPy медленное
+    diffs = [first[..., k] - second[..., k] for k in range(first.shape[-1])]
+    if kind in ('MAN_2D', 'MAN_3D'):
+        return _nint(sum(np.abs(diff) for diff in diffs))
+    if kind in ('MAX_2D', 'MAX_3D'):
+        return np.maximum.reduce([_nint(np.abs(diff)) for diff in diffs])
+    squared = sum(diff * diff for diff in diffs)
+    if kind == 'ATT':
+        r = np.sqrt(squared / 10.0)
+        t = _nint(r)
+        return np.where(t < r, t + 1, t)
+    if kind == 'CEIL_2D':
+        return np.ceil(np.sqrt(squared))
+    return _nint(np.sqrt(squared))
+
+
+def _header_value(value):
+    value = value.strip()
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def _to_array(tokens):
+    try:
+        return np.array(tokens, dtype=np.float64)
+    except ValueError as e:
+        raise InstanceError(f'не число в секции: {e}') from None
+
+
+def _batches(lines, count, batch_size=1 << 18):
+    """Ровно count чисел секции пакетами массивов (секция не читается в память целиком)."""
+    remaining = count
+    tokens = []
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == 'EOF':
+            break
+        tokens.extend(parts)
+        remaining -= len(parts)
+        if len(tokens) >= batch_size:
+            yield _to_array(tokens)
+            tokens = []
+        if remaining <= 0:
+            break
+    if tokens:
+        yield _to_array(tokens)
+    if remaining != 0:
+        raise InstanceError(f'в секции {"не хватает" if remaining > 0 else "лишние"} числа: ожидалось {count}')
+
+
+def _explicit_count(weight_format, dimension):
+    """Число весов в EDGE_WEIGHT_SECTION для формата матрицы."""
+    if weight_format == 'FULL_MATRIX':
+        return dimension * dimension
+    if weight_format not in EXPLICIT_FORMATS:
+        raise InstanceError(f'EDGE_WEIGHT_FORMAT {weight_format} не поддерживается')
+    _, diagonal = EXPLICIT_FORMATS[weight_format]
+    return dimension * (dimension + 1) // 2 if diagonal else dimension * (dimension - 1) // 2
+
+
+def parse_tsplib(path, on_weights=None):
+    """Разбор файла TSPLIB: заголовок, координаты и явные веса.
+
+    Без on_weights веса собираются плоским массивом в instance['weights'];
+    с on_weights(dimension, weight_format, batches) пакеты весов передаются
+    ему по мере чтения.
+    """
+    header = {}
+    instance = {'coordinates': None, 'display': None, 'weights': None}
+    with open(path, encoding='utf-8', errors='replace') as f:
+        lines = iter(f)
+        for line in lines:
+            line = line.strip()
+            if not line or line == 'EOF':
+                continue
+            section = line.split(':')[0].strip().upper()
+            if not section.endswith('_SECTION'):
+                key, _, value = line.partition(':')
+                header[key.strip().upper()] = _header_value(value)
+                continue
+            dimension = header.get('DIMENSION')
+            if not isinstance(dimension, int):
+                raise InstanceError(f'{path}: секция {section} до DIMENSION')
+            if section in ('NODE_COORD_SECTION', 'DISPLAY_DATA_SECTION'):
+                three = section == 'NODE_COORD_SECTION' and (header.get('NODE_COORD_TYPE') == 'THREED_COORDS' or
+                                                            str(header.get('EDGE_WEIGHT_TYPE')).endswith('_3D'))
+                width = 4 if three else 3
+                rows = np.concatenate(list(_batches(lines, dimension * width))).reshape(dimension, width)
+                order = np.argsort(rows[:, 0], kind='stable')
+                instance['coordinates' if section == 'NODE_COORD_SECTION' else 'display'] = rows[order, 1:]
+            elif section == 'EDGE_WEIGHT_SECTION':
+                weight_format = header.get('EDGE_WEIGHT_FORMAT', 'FULL_MATRIX')
+                batches = _batches(lines, _explicit_count(weight_format, dimension))
+                if on_weights is None:
+                    instance['weights'] = np.concatenate(list(batches))
+                else:
+                    on_weights(dimension, weight_format, batches)
+                instance['weights_read'] = True
+            else:
+                raise InstanceError(f'{path}: секция {section} не поддерживается')
+
+    kind = header.get('EDGE_WEIGHT_TYPE')
+    if not isinstance(header.get('DIMENSION'), int):
+        raise InstanceError(f'{path}: нет DIMENSION')
+    if kind == 'EXPLICIT':
+        if not instance.get('weights_read'):
+            raise InstanceError(f'{path}: нет EDGE_WEIGHT_SECTION')
+    elif kind in COORDINATE_TYPES:
+        if instance['coordinates'] is None:
+            raise InstanceError(f'{path}: нет NODE_COORD_SECTION')
+    else:
+        raise InstanceError(f'{path}: EDGE_WEIGHT_TYPE {kind} не поддерживается')
+    instance.update(
+        name=str(header.get('NAME', os.path.splitext(os.path.basename(path))[0])),
+        type=header.get('TYPE', 'TSP'),
+        dimension=header['DIMENSION'],
+        edge_weight_type=kind,
+        edge_weight_format=header.get('EDGE_WEIGHT_FORMAT'),
+        comment=str(header.get('COMMENT', '')),
+    )
+    return instance
+
+
+def _block_rows(n, itemsize=8, arrays=4):
+    """Число строк матрицы в одном блоке при заданном бюджете памяти."""
+    return max(1, BUDGET_BYTES // max(1, n * itemsize * arrays))
+
+
+class CoordinateDistances:
+    """Матрица расстояний экземпляра с координатами, вычисляемая по запросу.
+
+    Поддерживает выборку строки distances[i], блока строк distances[a:b] и
+    пар distances[rows, columns] - доступ решателей и проверки маршрутов;
+    значения int32, как в матрице на диске.
+    """
+
+    def __init__(self, kind, coordinates):
+        self.kind = kind
+        self.coordinates = np.asarray(coordinates, dtype=np.float64)
+        self.dtype = np.dtype(np.int32)
+        self.shape = (len(self.coordinates), len(self.coordinates))
+        self.nbytes = self.shape[0] * self.shape[1] * self.dtype.itemsize
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            rows, columns = key
+            first, second = self.coordinates[rows], self.coordinates[columns]
+        else:
+            first, second = self.coordinates[key], self.coordinates
+            if first.ndim > 1:
+                first, second = first[:, None, :], second[None, :, :]
+        return pair_distances(self.kind, first, second).astype(self.dtype)[()]
+
+    def dense(self):
+        """Вся матрица в памяти, заполняемая блоками строк."""
+        n = len(self)
+        matrix = np.empty(self.shape, dtype=self.dtype)
+        step = _block_rows(n, arrays=2 + self.coordinates.shape[1])
+        for start in range(0, n, step):
+            matrix[start:start + step] = self[start:start + step]
+        return matrix
+
+
+def _row_columns(weight_format, n, row):
+    """Столбцы строки row, заданные в явном формате: (первый, после последнего)."""
+    if weight_format == 'FULL_MATRIX':
+        return 0, n
+    upper, diagonal = EXPLICIT_FORMATS[weight_format]
+    if upper:
+        return (row if diagonal else row + 1), n
+    return 0, (row + 1 if diagonal else row)
+
+
+def _as_float(matrix, path):
+    """Перевод частично заполненной матрицы int32 в float32 (встречены дробные веса)."""
+    n = len(matrix)
+    converted = np.lib.format.open_memmap(path + '.float', mode='w+', dtype=np.float32, shape=(n, n))
+    step = _block_rows(n)
+    for start in range(0, n, step):
+        converted[start:start + step] = matrix[start:start + step]
+    converted.flush()
+    del converted, matrix
+    os.replace(path + '.float', path)
+    return np.load(path, mmap_mode='r+')
+
+
+def _symmetrize(matrix, upper):
+    """Отражение заданного треугольника квадратными блоками, чтобы не читать матрицу по столбцам."""
+    n = len(matrix)
+    step = max(1, int(math.sqrt(BUDGET_BYTES / 24)))
+    for i in range(0, n, step):
+        for j in range(i, n, step):
+            if i == j:
+                block = np.array(matrix[i:i + step, i:i + step])
+                if upper:
+                    matrix[i:i + step, i:i + step] = np.triu(block) + np.triu(block, 1).T
+                else:
+                    matrix[i:i + step, i:i + step] = np.tril(block) + np.tril(block, -1).T
+            elif upper:
+                matrix[j:j + step, i:i + step] = np.array(matrix[i:i + step, j:j + step]).T
+            else:
+                matrix[i:i + step, j:j + step] = np.array(matrix[j:j + step, i:i + step]).T
+
+
+def _write_explicit_matrix(path, n, weight_format, batches):
+    """Матрица из пакетов весов явного формата: int32, пока все веса целые, иначе float32."""
+    matrix = np.lib.format.open_memmap(path, mode='w+', dtype=np.int32, shape=(n, n))
+    row, position, stop = -1, 0, 0
+    for values in batches:
+        if matrix.dtype == np.int32 and (np.any(np.mod(values, 1) != 0) or np.abs(values).max() >= 2 ** 31):
+            matrix = _as_float(matrix, path)
+        offset = 0
+        while offset < len(values):
+            while position >= stop:
+                row += 1
+                position, stop = _row_columns(weight_format, n, row)
+            take = min(stop - position, len(values) - offset)
+            matrix[row, position:position + take] = values[offset:offset + take]
+            position += take
+            offset += take
+    if weight_format != 'FULL_MATRIX':
+        _symmetrize(matrix, EXPLICIT_FORMATS[weight_format][0])
+    matrix.flush()
+    return matrix.dtype
+
+
+def instance_name(path):
+    """Имя экземпляра по имени файла."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def source_path(name, instances_dir=INSTANCES_DIR):
+    return os.path.join(instances_dir, f'{name}.tsp')
+
+
+def _cache_dir(name, instances_dir):
+    return os.path.join(instances_dir, 'cache', name)
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'version': FORMAT_VERSION}
+
+
+def compile_instance(path, instances_dir=INSTANCES_DIR):
+    """Разбор файла TSPLIB и запись координат и явной матрицы расстояний в кэш экземпляров."""
+    name = instance_name(path)
+    folder = _cache_dir(name, instances_dir)
+    temporary = folder + '.tmp'
+    shutil.rmtree(temporary, ignore_errors=True)
+    os.makedirs(temporary)
+    matrix_path = os.path.join(temporary, 'distances.npy')
+    dtype = {}
+
+    def on_weights(dimension, weight_format, batches):
+        dtype['name'] = np.dtype(_write_explicit_matrix(matrix_path, dimension, weight_format, batches)).name
+
+    instance = parse_tsplib(path, on_weights)
+    if instance['edge_weight_type'] != 'EXPLICIT':
+        dtype['name'] = 'int32'
+    coordinates = instance['coordinates'] if instance['coordinates'] is not None else instance['display']
+    if coordinates is not None:
+        np.save(os.path.join(temporary, 'coordinates.npy'), coordinates)
+    meta = {key: instance[key] for key in ('name', 'type', 'dimension', 'edge_weight_type', 'edge_weight_format', 'comment')}
+    meta.update(file=name, dtype=dtype['name'], has_coordinates=coordinates is not None,
+                metric_coordinates=instance['coordinates'] is not None, source=_source_stamp(path))
+    with open(os.path.join(temporary, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    shutil.rmtree(folder, ignore_errors=True)
+    os.replace(temporary, folder)
+    return meta
+
+
+def load(name, instances_dir=INSTANCES_DIR):
+    """Экземпляр по имени: метаданные, координаты и матрица расстояний.
+
+    Матрица - memmap для явных матриц и CoordinateDistances для экземпляров
+    с координатами. Кэш пересобирается, если файл TSPLIB изменился;
+    вытесненный случайный экземпляр создаётся заново.
+    """
+    path = source_path(name, instances_dir)
+    if not os.path.exists(path):
+        match = RANDOM_NAME.fullmatch(name)
+        if match is None:
+            return None
+        random_instance(int(match[1]), int(match[2]), instances_dir)
+    folder = _cache_dir(name, instances_dir)
+    key = (os.path.abspath(instances_dir), name)
+    with _lock:
+        stamp = _source_stamp(path)
+        cached = _loaded.get(key)
+        if cached is not None and cached['source'] == stamp:
+            return cached
+        meta = None
+        try:
+            with open(os.path.join(folder, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            pass
+        if meta is None or meta.get('source') != stamp:
+            meta = compile_instance(path, instances_dir)
+        instance = dict(meta, distances=None, coordinates=None)
+        if meta['has_coordinates']:
+            instance['coordinates'] = np.load(os.path.join(folder, 'coordinates.npy'), mmap_mode='r')
+        if meta['metric_coordinates']:
+            instance['distances'] = CoordinateDistances(meta['edge_weight_type'], instance['coordinates'])
+        else:
+            instance['distances'] = np.load(os.path.join(folder, 'distances.npy'), mmap_mode='r')
+        _loaded[key] = instance
+        return instance
+
+
+def available(dimension=None, instances_dir=INSTANCES_DIR):
+    """Имена экземпляров в data/instances (с заданным числом городов, если указано)."""
+    if not os.path.isdir(instances_dir):
+        return []
+    names = sorted(instance_name(name) for name in os.listdir(instances_dir) if name.endswith('.tsp'))
+    if dimension is None:
+        return names
+    return [name for name in names if _dimension(source_path(name, instances_dir)) == dimension]
+
+
+def _dimension(path):
+    """DIMENSION из заголовка файла без разбора секций."""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key.strip().upper() == 'DIMENSION':
+                return _header_value(value)
+            if key.strip().upper().endswith('_SECTION'):
+                return None
+    return None
+
+
+def matrix(instance):
+    """Матрица расстояний для решателей: в памяти, если помещается в BUDGET_BYTES.
+
+    Иначе - memmap явной матрицы или CoordinateDistances; решатели читают их
+    блоками строк и парами индексов, не копируя матрицу в память.
+    """
+    distances = instance['distances']
+    if distances.nbytes > BUDGET_BYTES:
+        return distances
+    if isinstance(distances, CoordinateDistances):
+        return distances.dense()
+    return np.array(distances)
+
+
+def edge_costs(instance, path, closed=False):
+    """Стоимости рёбер маршрута одной векторной операцией.
+
+    Для экземпляров с координатами метрики стоимости считаются по координатам,
+    для явных матриц - выборкой из memmap.
+    """
+    path = np.asarray(path, dtype=np.int64)
+    following = np.roll(path, -1) if closed else path[1:]
+    path = path[:len(following)]
+    if instance.get('metric_coordinates'):
+        coordinates = instance['coordinates']
+        costs = np.empty(len(path), dtype=np.int64)
+        step = _block_rows(coordinates.shape[1], arrays=4)
+        for start in range(0, len(path), step):
+            a = np.asarray(coordinates[path[start:start + step]])
+            b = np.asarray(coordinates[following[start:start + step]])
+            costs[start:start + step] = pair_distances(instance['edge_weight_type'], a, b)
+        return costs
+    return np.asarray(instance['distances'][path, following])
+
+
+def tour_length(instance, path, closed=False):
+    """Длина маршрута (по умолчанию незамкнутого пути, как в данных проекта)."""
+    return edge_costs(instance, path, closed).sum().item()
+
+
+def solve(solver, name, progress=None, **options):
+    """Запуск решателя (функция solve модуля core.solvers) на экземпляре name - задача core.jobs.
+
+    Возвращает запись запуска с полем Instance.
+    """
+    record = solver(matrix(load(name)), progress=progress, **options)
+    record['Instance'] = name
+    return record
+
+
+def write_tsplib(path, name, coordinates, comment=''):
+    """Запись координат в файл TSPLIB с метрикой EUC_2D (координаты без потери точности)."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(f'NAME : {name}\nCOMMENT : {comment}\nTYPE : TSP\nDIMENSION : {len(coordinates)}\n'
+                'EDGE_WEIGHT_TYPE : EUC_2D\nNODE_COORD_SECTION\n')
+        for number, (x, y) in enumerate(np.asarray(coordinates, dtype=np.float64).tolist(), 1):
+            f.write(f'{number} {x!r} {y!r}\n')
+        f.write('EOF\n')
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def random_name(cities, seed):
+    """Имя случайного экземпляра common.random_coordinates(cities, seed)."""
+    return f'random-{cities}-{seed}'
+
+
+def random_instance(cities, seed, instances_dir=INSTANCES_DIR):
+    """Случайный экземпляр встроенных решателей (common.random_coordinates) в виде файла TSPLIB.
+
+    Возвращает имя экземпляра; файл создаётся, если его ещё нет. Хранятся
+    RANDOM_KEEP последних случайных экземпляров, более старые удаляются
+    вместе с кэшем.
+    """
+    from core.solvers.common import random_coordinates
+
+    name = random_name(cities, seed)
+    path = source_path(name, instances_dir)
+    if os.path.exists(path):
+        os.utime(path)
+    else:
+        write_tsplib(path, name, random_coordinates(cities, seed),
+                     f'common.random_coordinates({cities}, seed={seed})')
+    _evict_random(instances_dir)
+    return name
+
+
+def _evict_random(instances_dir=INSTANCES_DIR):
+    """Удаление случайных экземпляров сверх RANDOM_KEEP, начиная с давно использованных."""
+    names = [instance_name(file) for file in os.listdir(instances_dir)
+             if file.endswith('.tsp') and RANDOM_NAME.fullmatch(instance_name(file))]
+    names.sort(key=lambda name: os.path.getmtime(source_path(name, instances_dir)), reverse=True)
+    for name in names[RANDOM_KEEP:]:
+        with _lock:
+            _loaded.pop((os.path.abspath(instances_dir), name), None)
+            try:
+                os.remove(source_path(name, instances_dir))
+            except FileNotFoundError:
+                pass
+            shutil.rmtree(_cache_dir(name, instances_dir), ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Разбор файлов TSPLIB в кэш экземпляров.')
+    parser.add_argument('files', nargs='+', help='файлы *.tsp; файлы вне data/instances копируются туда')
+    parser.add_argument('--instances-dir', default=INSTANCES_DIR)
+    args = parser.parse_args()
+    for path in args.files:
+        target = source_path(instance_name(path), args.instances_dir)
+        if os.path.abspath(path) != os.path.abspath(target):
+            os.makedirs(args.instances_dir, exist_ok=True)
+            shutil.copyfile(path, target)
+        instance = load(instance_name(path), args.instances_dir)
+        storage = 'по координатам' if instance['metric_coordinates'] else 'на диске'
+        print(f"{instance['file']}: {instance['dimension']} городов, {instance['edge_weight_type']}, "
+              f"матрица {instance['dtype']} {instance['distances'].nbytes / 2 ** 20:.1f} МБ ({storage})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Отображение фоновых задач core.jobs на страницах: прогресс, живой график
+промежуточных значений, отмена и список задач сессии."""
+import uuid
+
+import streamlit as st
+
+from core import jobs
+from core.charts import line_chart
+from core.lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+# Период опроса состояния задачи (сек)
+POLL_INTERVAL = 1
+
+STATUS_LABELS = {
+    jobs.QUEUED: "в очереди",
+    jobs.RUNNING: "выполняется",
+    jobs.DONE: "завершена",
+    jobs.FAILED: "ошибка",
+    jobs.CANCELLED: "отменена",
+}
+
+
+def session_owner():
+    """Идентификатор текущей сессии для таблицы задач."""
+    if 'session_id' not in st.session_state:
+        st.session_state['session_id'] = uuid.uuid4().hex
+    return st.session_state['session_id']
+
+
+def history_chart(job, x, y, title, xlabel, ylabel):
+    """График промежуточных значений задачи."""
+    if job['history']:
+        df = pd.DataFrame(job['history'])
+        line_chart(df, x, {y: y}, title, xlabel, ylabel, marker=None)
+
+
+@st.fragment(run_every=POLL_INTERVAL)
+def _live(job_id, x, y, title, xlabel, ylabel):
+    """Фрагмент, перерисовываемый по таймеру, пока задача выполняется."""
+    job = jobs.get(job_id)
+    if job is None or job['status'] in jobs.FINISHED:
+        st.rerun()
+    st.progress(job['progress'], text=f"{job['name']}: {STATUS_LABELS[job['status']]}")
+    history_chart(job, x, y, title, xlabel, ylabel)
+    if st.button("Отменить", key=f'cancel_{job_id}'):
+        jobs.cancel(job_id)
+
+
+def show_job(job_id, x, y, title, xlabel, ylabel):
+    """Состояние задачи на странице. Возвращает снимок завершённой задачи или None."""
+    job = jobs.get(job_id)
+    if job is None:
+        return None
+    if job['status'] not in jobs.FINISHED:
+        _live(job_id, x, y, title, xlabel, ylabel)
+        return None
+    if job['status'] == jobs.FAILED:
+        st.error(f"Задача {job['name']} завершилась с ошибкой:\n\n{job['error']}")
+        return None
+    if job['status'] == jobs.CANCELLED:
+        st.write(f"Задача {job['name']} отменена.")
+        return None
+    history_chart(job, x, y, title, xlabel, ylabel)
+    return job
+
+
+def display_jobs(owner):
+    """Таблица задач сессии."""
+    rows = jobs.jobs(owner)
+    if not rows:
+        return
+    df = pd.DataFrame(rows)
+    df['status'] = df['status'].map(STATUS_LABELS)
+    df['progress'] = (df['progress'] * 100).round().astype(int)
+    df['submitted'] = pd.to_datetime(df['submitted'], unit='s')
+    st.dataframe(df[['id', 'name', 'status', 'progress', 'submitted']].rename(columns={
+        'id': 'Номер', 'name': 'Задача', 'status': 'Состояние', 'progress': 'Прогресс, %', 'submitted': 'Поставлена'}),
+        use_container_width=True, hide_index=True)
@@ -0,0 +1,167 @@
+"""Фоновое выполнение долгих задач: отдельные процессы, общая таблица задач,
+прогресс, промежуточные значения и отмена.
+
+Таблица общая для процесса, поэтому задачи разных сессий Streamlit
+выполняются в одной очереди и не блокируют сценарии страниц. Каждая задача
+запускается в своём процессе (spawn), поэтому вычисления не конкурируют с
+интерфейсом за GIL; одновременно выполняется не больше WORKERS задач. Функция
+задачи должна импортироваться по имени (функция модуля core, а не сценария
+страницы) и получает аргумент progress - вызов progress(выполнено, всего,
+**значения) передаёт через очередь прогресс и значения для истории задачи.
+Отмена завершает процесс задачи.
+"""
+import concurrent.futures
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+
+# Число задач, выполняемых одновременно
+WORKERS = 4
+# Сколько завершённых задач хранится в таблице
+MAX_FINISHED = 200
+# Максимум точек истории промежуточных значений одной задачи
+MAX_HISTORY = 2000
+# Период проверки процесса задачи (сек)
+POLL_INTERVAL = 0.2
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+PROGRESS = 'progress'
+
+# fork в многопоточном процессе сервера небезопасен, поэтому процессы задач запускаются через spawn
+_context = multiprocessing.get_context('spawn')
+_lock = threading.Lock()
+_jobs = {}
+_counter = itertools.count(1)
+_pool = None
+
+
+def _executor():
+    """Пул потоков, следящих за процессами задач; создаётся при первой задаче."""
+    global _pool
+    if _pool is None:
+        _pool = concurrent.futures.ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='job')
+    return _pool
+
+
+def _child(function, args, kwargs, messages):
+    """Тело процесса задачи: прогресс и итог передаются в очередь messages."""
+    def progress(done, total, **values):
+        messages.put((PROGRESS, done, total, values))
+
+    try:
+        result = function(*args, progress=progress, **kwargs)
+    except Exception:
+        messages.put((FAILED, None, traceback.format_exc()))
+    else:
+        messages.put((DONE, result, None))
+
+
+def _record_progress(job, done, total, values):
+    """Прогресс и промежуточные значения задачи в таблице."""
+    with _lock:
+        job['progress'] = min(done / total, 1.0) if total else 0.0
+        if values:
+            history = job['history']
+            history.append(values)
+            if len(history) > MAX_HISTORY:
+                # Прореживание: сохраняется каждая вторая точка, последняя остаётся
+                del history[1:-1:2]
+
+
+def _execute(job, function, args, kwargs):
+    """Запуск процесса задачи и запись его прогресса и итога в таблицу."""
+    messages = _context.Queue()
+    process = _context.Process(target=_child, args=(function, args, kwargs, messages), daemon=True,
+                               name=f"job-{job['id']}")
+    with _lock:
+        if job['cancel'].is_set():
+            return
+        process.start()
+        job.update(status=RUNNING, started=time.time(), process=process)
+    status, result, error = None, None, None
+    while status is None:
+        try:
+            message = messages.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            if process.is_alive():
+                continue
+            # Процесс завершён: последнее сообщение могло прийти после проверки
+            try:
+                message = messages.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                break
+        if message[0] == PROGRESS:
+            _record_progress(job, *message[1:])
+        else:
+            status, result, error = message
+    process.join()
+    messages.close()
+    if status is None:
+        if job['cancel'].is_set():
+            status = CANCELLED
+        else:
+            status, error = FAILED, f'процесс задачи завершился с кодом {process.exitcode}'
+    with _lock:
+        job.update(status=status, result=result, error=error, finished=time.time(), process=None)
+        if status == DONE:
+            job['progress'] = 1.0
+
+
+def _prune():
+    """Удаление самых старых завершённых задач сверх MAX_FINISHED."""
+    finished = [job_id for job_id, job in _jobs.items() if job['status'] in FINISHED]
+    for job_id in finished[:max(0, len(finished) - MAX_FINISHED)]:
+        del _jobs[job_id]
+
+
+def submit(name, function, *args, owner=None, **kwargs):
+    """Постановка задачи в очередь. Возвращает номер задачи."""
+    with _lock:
+        job_id = next(_counter)
+        job = {
+            'id': job_id, 'name': name, 'owner': owner, 'status': QUEUED, 'progress': 0.0, 'history': [],
+            'result': None, 'error': None, 'submitted': time.time(), 'started': None, 'finished': None,
+            'cancel': threading.Event(), 'process': None,
+        }
+        _jobs[job_id] = job
+        _prune()
+    _executor().submit(_execute, job, function, args, kwargs)
+    return job_id
+
+
+def get(job_id):
+    """Снимок состояния задачи или None."""
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        snapshot = {key: value for key, value in job.items() if key not in ('cancel', 'process')}
+        snapshot['history'] = list(job['history'])
+        return snapshot
+
+
+def cancel(job_id):
+    """Отмена задачи: задача в очереди отменяется сразу, процесс выполняемой завершается."""
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None or job['status'] in FINISHED:
+            return False
+        job['cancel'].set()
+        if job['status'] == QUEUED:
+            job.update(status=CANCELLED, finished=time.time())
+        elif job['process'] is not None:
+            job['process'].terminate()
+        return True
+
+
+def jobs(owner=None):
+    """Список задач (без истории и результатов), новые первыми."""
+    with _lock:
+        return [
+            {key: job[key] for key in ('id', 'name', 'owner', 'status', 'progress', 'submitted', 'started', 'finished')}
+            for job in reversed(_jobs.values()) if owner is None or job['owner'] == owner
+        ]
@@ -0,0 +1,54 @@
+"""Отложенная загрузка: модули, импортируемые при первом обращении,
+выбор раздела страницы и фоновый прогрев при старте сервера."""
+import importlib
+import sys
+import threading
+import types
+
+# Модули, импортируемые при прогреве, до построения единого индекса
+WARM_MODULES = ['numpy', 'pandas', 'pyarrow.dataset', 'pyarrow.parquet', 'core.query', 'core.charts']
+
+_warm_lock = threading.Lock()
+_warm = {'thread': None, 'error': None}
+
+
+class _LazyModule(types.ModuleType):
+    """Заместитель модуля: настоящий модуль импортируется при первом обращении к атрибуту."""
+
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+
+def lazy_import(name):
+    """Модуль name, если он уже загружен, иначе заместитель с отложенным импортом."""
+    module = sys.modules.get(name)
+    return module if module is not None else _LazyModule(name)
+
+
+def select_section(sections, key):
+    """Выбор раздела страницы: вычисляется только выбранный раздел."""
+    import streamlit as st
+
+    return st.radio("Раздел:", sections, horizontal=True, key=key)
+
+
+def _warm_up():
+    """Импорт тяжёлых модулей и построение единого индекса сервиса запросов."""
+    try:
+        for name in WARM_MODULES:
+            importlib.import_module(name)
+        from core.query import get_index
+        get_index()
+    except Exception as error:
+        _warm['error'] = error
+
+
+def warm_up():
+    """Запуск прогрева в фоновом потоке, один раз на процесс. Страница не ждёт его завершения."""
+    with _warm_lock:
+        if _warm['thread'] is None:
+            _warm['thread'] = threading.Thread(target=_warm_up, name='warm-up', daemon=True)
+            _warm['thread'].start()
+        return _warm['thread']
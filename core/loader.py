@@ -0,0 +1,79 @@
+"""Общий слой загрузки JSON файлов с кэшированием на уровне процесса."""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from core.metrics import instrument
+
+# Ограничения кэша: по количеству файлов и по суммарному размеру на диске
+MAX_ENTRIES = 512
+MAX_BYTES = 256 * 1024 * 1024
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+
+
+@instrument('loader.load_json')
+def load_json(path):
+    """Загрузка JSON файла с кэшированием по пути и времени изменения.
+
+    Возвращаемый объект общий для всех вызовов, изменять его нельзя.
+    Если файл не найден, выбрасывается FileNotFoundError.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == stamp:
+            _cache.move_to_end(path)
+            _stats['hits'] += 1
+            return entry[1]
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    with _lock:
+        _stats['misses'] += 1
+        old = _cache.pop(path, None)
+        if old is not None:
+            _stats['bytes'] -= old[0][1]
+        _cache[path] = (stamp, data)
+        _stats['bytes'] += stamp[1]
+        _evict()
+    return data
+
+
+def _evict():
+    """Удаление самых давно использованных записей при превышении лимитов."""
+    while _cache and (len(_cache) > MAX_ENTRIES or _stats['bytes'] > MAX_BYTES):
+        _, (stamp, _) = _cache.popitem(last=False)
+        _stats['bytes'] -= stamp[1]
+        _stats['evictions'] += 1
+
+
+def configure(max_entries=None, max_bytes=None):
+    """Изменение лимитов кэша."""
+    global MAX_ENTRIES, MAX_BYTES
+    with _lock:
+        if max_entries is not None:
+            MAX_ENTRIES = max_entries
+        if max_bytes is not None:
+            MAX_BYTES = max_bytes
+        _evict()
+
+
+def cache_info():
+    """Статистика кэша: попадания, промахи, вытеснения и занятый объём."""
+    with _lock:
+        return dict(_stats, entries=len(_cache), max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES)
+
+
+def clear_cache():
+    """Очистка кэша и счётчиков."""
+    with _lock:
+        _cache.clear()
+        _stats.update(hits=0, misses=0, evictions=0, bytes=0)
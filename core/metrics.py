@@ -0,0 +1,249 @@
+"""Замеры разделов страниц: время, память и обращения к кэшам.
+
+Декоратор instrument() записывает каждый вызов функции в замеры текущего
+прогона сценария страницы (если прогон начат через begin) и в файл метрик
+(если экспорт включён). Без начатого прогона и экспорта декоратор почти
+ничего не стоит. Память считается через tracemalloc, который включается
+только на время прогонов с замерами; он общий для процесса, поэтому в
+значения попадают и выделения параллельных сессий. Пик tracemalloc тоже
+общий: перед каждым сбросом он переносится в максимум всех открытых замеров
+(_frames), поэтому вложенные и параллельные замеры не теряют пики друг друга.
+"""
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+METRICS_DIR = 'data/metrics'
+JSONL_FILE = os.path.join(METRICS_DIR, 'metrics.jsonl')
+PROMETHEUS_FILE = os.path.join(METRICS_DIR, 'metrics.prom')
+
+# Кэши, счётчики которых учитываются в замерах: подпись и модуль с cache_info()
+CACHES = {'json': 'core.loader', 'charts': 'core.charts', 'shared': 'core.shared'}
+
+_run = contextvars.ContextVar('metrics_run', default=None)
+_depth = contextvars.ContextVar('metrics_depth', default=0)
+_lock = threading.Lock()
+_export = {'jsonl': False, 'prometheus': False}
+_totals = {}
+_tracing = {'runs': 0}
+# Открытые замеры памяти: {id: {'start': байт при входе, 'peak': максимум}}
+_frames = {}
+
+
+def _cache_counters():
+    """Попадания и промахи уже загруженных кэшей (модули не импортируются)."""
+    counters = {}
+    for name, module_name in CACHES.items():
+        module = sys.modules.get(module_name)
+        if module is not None:
+            info = module.cache_info()
+            counters[name] = (info['hits'], info['misses'])
+    return counters
+
+
+def _fold_peak():
+    """Перенос пика tracemalloc в максимум открытых замеров и сброс пика (под _lock)."""
+    current, peak = tracemalloc.get_traced_memory()
+    for frame in _frames.values():
+        frame['peak'] = max(frame['peak'], peak)
+    tracemalloc.reset_peak()
+    return current
+
+
+def _enter_frame(key):
+    """Открытие замера памяти. Возвращает объём памяти при входе."""
+    with _lock:
+        current = _fold_peak()
+        _frames[key] = {'start': current, 'peak': current}
+        return current
+
+
+def _exit_frame(key):
+    """Закрытие замера памяти: (объём при выходе, пик за время замера)."""
+    with _lock:
+        current = _fold_peak()
+        frame = _frames.pop(key)
+        return current, frame['peak']
+
+
+def _record(record):
+    """Учёт завершённого замера в итогах и файле JSONL."""
+    with _lock:
+        total = _totals.setdefault(record['name'], {'count': 0, 'seconds': 0.0, 'alloc_bytes': 0})
+        total['count'] += 1
+        total['seconds'] += record['wall_ms'] / 1000
+        total['alloc_bytes'] += max(record.get('alloc_bytes') or 0, 0)
+        if _export['jsonl']:
+            # Ошибка записи файла метрик не должна подменять результат или исключение функции
+            try:
+                os.makedirs(METRICS_DIR, exist_ok=True)
+                with open(JSONL_FILE, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            except OSError:
+                pass
+
+
+def instrument(name=None):
+    """Декоратор замера функции: время, прирост памяти и обращения к кэшам."""
+    def decorator(function):
+        label = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            run = _run.get()
+            if run is None and not _export['jsonl'] and not _export['prometheus']:
+                return function(*args, **kwargs)
+            depth = _depth.get()
+            token = _depth.set(depth + 1)
+            record = {'name': label, 'depth': depth, 'time': time.time()}
+            if run is not None:
+                # Замер добавляется при входе, чтобы вложенные вызовы шли после внешнего
+                record['page'] = run['page']
+                run['records'].append(record)
+            caches = _cache_counters()
+            tracing = tracemalloc.is_tracing()
+            if tracing:
+                current = _enter_frame(id(record))
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record['wall_ms'] = (time.perf_counter() - started) * 1000
+                _depth.reset(token)
+                if tracing and tracemalloc.is_tracing():
+                    after, peak = _exit_frame(id(record))
+                    record['alloc_bytes'] = after - current
+                    record['peak_bytes'] = peak - current
+                elif tracing:
+                    with _lock:
+                        _frames.pop(id(record), None)
+                for cache, (hits, misses) in _cache_counters().items():
+                    old_hits, old_misses = caches.get(cache, (0, 0))
+                    if hits != old_hits or misses != old_misses:
+                        record[f'{cache}_hits'] = hits - old_hits
+                        record[f'{cache}_misses'] = misses - old_misses
+                _record(record)
+        return wrapper
+    return decorator
+
+
+def start_run(page, memory=False):
+    """Начало прогона с замерами в текущем потоке сценария."""
+    if memory:
+        with _lock:
+            _tracing['runs'] += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+    run = {'page': page, 'records': [], 'memory': memory, 'started': time.perf_counter()}
+    _run.set(run)
+    return run
+
+
+def end_run():
+    """Завершение прогона. Возвращает его замеры."""
+    run = _run.get()
+    _run.set(None)
+    if run is None:
+        return None
+    run['wall_ms'] = (time.perf_counter() - run['started']) * 1000
+    if run['memory']:
+        with _lock:
+            _tracing['runs'] -= 1
+            if _tracing['runs'] == 0:
+                tracemalloc.stop()
+    if _export['prometheus']:
+        write_prometheus()
+    return run
+
+
+def configure(jsonl=None, prometheus=None):
+    """Включение экспорта замеров в JSONL и/или текстовый формат Prometheus."""
+    with _lock:
+        if jsonl is not None:
+            _export['jsonl'] = jsonl
+        if prometheus is not None:
+            _export['prometheus'] = prometheus
+
+
+def export_settings():
+    """Текущие настройки экспорта."""
+    with _lock:
+        return dict(_export)
+
+
+def totals():
+    """Накопленные итоги по функциям с момента запуска процесса."""
+    with _lock:
+        return {name: dict(total) for name, total in _totals.items()}
+
+
+def write_prometheus(path=PROMETHEUS_FILE):
+    """Запись итогов в текстовом формате Prometheus (файл заменяется целиком)."""
+    lines = [
+        '# HELP app_section_seconds Время выполнения функций разделов страниц.',
+        '# TYPE app_section_seconds summary',
+    ]
+    data = totals()
+    for name, total in sorted(data.items()):
+        lines.append(f'app_section_seconds_sum{{name="{name}"}} {total["seconds"]:.6f}')
+        lines.append(f'app_section_seconds_count{{name="{name}"}} {total["count"]}')
+    lines.append('# HELP app_section_alloc_bytes Прирост памяти Python в функциях разделов страниц.')
+    lines.append('# TYPE app_section_alloc_bytes counter')
+    for name, total in sorted(data.items()):
+        lines.append(f'app_section_alloc_bytes_total{{name="{name}"}} {total["alloc_bytes"]}')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(path + '.tmp', path)
+
+
+def begin(page):
+    """Переключатели отладки в боковой панели и начало прогона с замерами, если они включены."""
+    import streamlit as st
+
+    enabled = st.sidebar.toggle("Отладка: замеры разделов", key='debug_metrics')
+    if enabled:
+        settings = export_settings()
+        jsonl = st.sidebar.checkbox("Записывать в metrics.jsonl", value=settings['jsonl'], key='debug_metrics_jsonl')
+        prometheus = st.sidebar.checkbox("Записывать metrics.prom", value=settings['prometheus'],
+                                         key='debug_metrics_prom')
+        configure(jsonl=jsonl, prometheus=prometheus)
+        start_run(page, memory=st.sidebar.checkbox("Учитывать память (медленнее)", key='debug_metrics_memory'))
+    return enabled
+
+
+def run_page(page, main):
+    """Выполнение сценария страницы с панелью замеров в боковой панели."""
+    begin(page)
+    try:
+        main()
+    except BaseException:
+        # Прерванный прогон (в том числе st.rerun) завершается без отображения панели
+        end_run()
+        raise
+    panel()
+
+
+def panel():
+    """Завершение прогона и таблица его замеров в боковой панели."""
+    import pandas as pd
+    import streamlit as st
+
+    run = end_run()
+    if run is None:
+        return
+    with st.sidebar.expander(f"Замеры прогона: {run['wall_ms']:.0f} мс", expanded=True):
+        if not run['records']:
+            st.write("Нет замеров.")
+            return
+        df = pd.DataFrame(run['records'])
+        df['name'] = ['  ' * depth + name for depth, name in zip(df['depth'], df['name'])]
+        columns = ['name', 'wall_ms'] + [column for column in df.columns
+                                         if column.endswith(('_bytes', '_hits', '_misses'))]
+        df = df[columns].rename(columns={'name': 'Функция', 'wall_ms': 'Время (мс)'})
+        st.dataframe(df.round(1), use_container_width=True, hide_index=True)
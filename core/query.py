@@ -0,0 +1,524 @@
+"""Сервис запросов к результатам экспериментов только для чтения.
+
+Единый индекс в памяти процесса объединяет агрегаты исходных запусков
+(core.aggregates) и лучшие результаты data/best: комбинации без исходных
+запусков берутся из data/best. Запуски читаются из общего слоя данных
+(core.shared). Доступ из Python - функции best, runs, summary и query, по
+HTTP - локальный сервер с теми же ресурсами:
+
+    GET /api/version
+    GET /api/{ga|tsp}/best?selection=Tournament&iterations=100
+    GET /api/{ga|tsp}/runs?algorithm=twoopt&offset=0&limit=50&columns=TotalSum,Iterations
+    GET /api/{ga|tsp}/summary?by=selection,iterations&value=Distance
+
+Ответы кэшируются по ETag: тег вычисляется из поколения хранилища, отметки
+файлов data/best и нормализованного запроса без чтения данных, поэтому
+повторный запрос (и If-None-Match -> 304) обслуживается из кэша ответов.
+
+Пример:
+    python -m core.query serve --port 8765
+    python -m core.query get ga/best selection=Tournament iterations=100
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from core import aggregates, shared, store
+from core.ingest import store_generation
+from core.loader import load_json
+from core.metrics import instrument
+
+BEST_DIR = 'data/best'
+# Файлы лучших решений TwoOpt/LKH по папкам алгоритмов хранилища
+TSP_BEST_FILES = {'twoopt': 'best_solutions_2opt.json', 'lkh': 'best_solutions_LKH.json'}
+
+KEYS = {'ga': aggregates.GA_KEYS, 'tsp': aggregates.TSP_KEYS}
+VALUES = {
+    'ga': ['Distance', 'TimeInSec', 'Fitness', 'MinPopulation', 'MaxPopulation'],
+    'tsp': ['TotalSum', 'ElapsedMilliseconds'],
+}
+SUMMARY_STATS = ['count', 'min', 'max', 'mean', 'median', 'std']
+RESOURCES = ['best', 'runs', 'summary']
+
+# Размер страницы по умолчанию и наибольший
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Ответов в кэше
+RESPONSE_ENTRIES = 512
+# Версия данных проверяется не чаще одного раза в этот интервал (сек)
+VERSION_INTERVAL = 1.0
+
+_lock = threading.Lock()
+_index = {'version': None, 'frames': {}, 'records': {}, 'matrices': {}}
+_version = {'value': None, 'checked': 0.0}
+_responses = OrderedDict()
+_stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+
+
+class QueryError(ValueError):
+    """Некорректный запрос: неизвестный ресурс, фильтр или столбец."""
+
+
+def _best_stamp():
+    """Отметка файлов data/best: имя, время изменения, размер."""
+    if not os.path.isdir(BEST_DIR):
+        return ()
+    stamp = []
+    for name in sorted(os.listdir(BEST_DIR)):
+        if name.endswith('.json'):
+            stat = os.stat(os.path.join(BEST_DIR, name))
+            stamp.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def version():
+    """Версия данных: (поколение хранилища, отметка data/best).
+
+    Между проверками (не чаще VERSION_INTERVAL) возвращается прошлое значение:
+    манифест хранилища не читается на каждый запрос.
+    """
+    with _lock:
+        if _version['value'] is not None and time.monotonic() - _version['checked'] < VERSION_INTERVAL:
+            return _version['value']
+    store.ensure_store()
+    current = store_generation(), _best_stamp()
+    with _lock:
+        _version.update(value=current, checked=time.monotonic())
+    return current
+
+
+def _ga_best_rows():
+    """Строки индекса ГА из data/best/best_results_{метод выбора}.json."""
+    rows = []
+    for name in sorted(os.listdir(BEST_DIR)) if os.path.isdir(BEST_DIR) else []:
+        if not (name.startswith('best_results_') and name.endswith('.json')):
+            continue
+        selection = name[len('best_results_'):-len('.json')]
+        for mutation, by_crossover in load_json(os.path.join(BEST_DIR, name)).items():
+            for crossover, by_iterations in by_crossover.items():
+                for count, best in by_iterations.items():
+                    data = best.get('Data', {})
+                    rows.append({
+                        'selection': selection, 'mutation': mutation, 'crossover': crossover,
+                        'iterations': int(count),
+                        'best_Distance': best.get('Distance'),
+                        'best_TimeInSec': data.get('TimeInSec'),
+                        'best_Fitness': data.get('Fintess'),
+                        'best_MinPopulation': data.get('MinPopulation'),
+                        'best_MaxPopulation': data.get('MaxPopulation'),
+                    })
+    return rows
+
+
+def _tsp_best_rows():
+    """Строки индекса TwoOpt/LKH из data/best/best_solutions_*.json."""
+    rows = []
+    for algorithm, name in TSP_BEST_FILES.items():
+        path = os.path.join(BEST_DIR, name)
+        if not os.path.exists(path):
+            continue
+        for count, best in load_json(path).get('BestSolutions', {}).items():
+            rows.append({
+                'algorithm': algorithm, 'iterations': int(count),
+                'best_Algorithm': best.get('Algorithm'),
+                'best_TotalSum': best.get('TotalSum'),
+                'best_ElapsedMilliseconds': best.get('ElapsedMilliseconds'),
+                'best_Iterations': best.get('Iterations'),
+                'best_Costs': best.get('Costs'),
+                'best_Solution': best.get('Solution'),
+            })
+    return rows
+
+
+def _build_frame(kind, initial):
+    """Индекс вида kind: агрегаты исходных запусков и недостающие комбинации из data/best."""
+    keys = KEYS[kind]
+    best = pd.DataFrame(_ga_best_rows() if kind == 'ga' else _tsp_best_rows())
+    frames = []
+    if initial is not None:
+        frames.append(initial.assign(origin='initial'))
+    if not best.empty:
+        if initial is not None:
+            known = pd.MultiIndex.from_frame(initial[keys])
+            best = best[~pd.MultiIndex.from_frame(best[keys]).isin(known)]
+        frames.append(best.assign(origin='best'))
+    if not frames:
+        return pd.DataFrame(columns=keys + ['origin'])
+    return pd.concat(frames, ignore_index=True).sort_values(keys, ignore_index=True)
+
+
+@instrument('query.get_index')
+def get_index():
+    """Единый индекс: {'frames': {вид: DataFrame}, 'records': {вид: {ключ: строка}}}.
+
+    Пересобирается при смене версии данных, изменять его нельзя.
+    """
+    current = version()
+    with _lock:
+        if _index['version'] == current:
+            return _index
+    frames = aggregates.get_index()['frames']
+    built = {kind: _build_frame(kind, frames.get(kind)) for kind in KEYS}
+    with _lock:
+        _index['frames'] = built
+        _index['records'] = {
+            kind: {tuple(record[key] for key in KEYS[kind]): record for record in df.to_dict('records')}
+            for kind, df in built.items()
+        }
+        _index['matrices'] = {}
+        _index['version'] = current
+        return _index
+
+
+def _check_kind(kind):
+    if kind not in KEYS:
+        raise QueryError(f'неизвестный вид данных {kind}, ожидался ga или tsp')
+
+
+def _conditions(kind, filters):
+    """Нормализованные фильтры по ключам вида kind, значения None пропускаются."""
+    _check_kind(kind)
+    conditions = {}
+    for name, value in filters.items():
+        if name not in KEYS[kind]:
+            raise QueryError(f'фильтр {name} недоступен для {kind}, допустимы: {", ".join(KEYS[kind])}')
+        if value is None or value == '':
+            continue
+        if name == 'iterations':
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise QueryError(f'iterations должно быть целым числом: {value}') from None
+        elif name == 'algorithm':
+            value = str(value).lower()
+        conditions[name] = value
+    return conditions
+
+
+def _filter(df, conditions):
+    """Строки DataFrame, удовлетворяющие равенствам."""
+    for name, value in conditions.items():
+        df = df[df[name] == value]
+    return df
+
+
+def _columns(columns, available):
+    """Список столбцов (строка через запятую или последовательность) с проверкой."""
+    if columns is None or columns == '':
+        return None
+    if isinstance(columns, str):
+        columns = [column.strip() for column in columns.split(',') if column.strip()]
+    unknown = [column for column in columns if column not in available]
+    if unknown:
+        raise QueryError(f'неизвестные столбцы: {", ".join(unknown)}')
+    return list(columns)
+
+
+def best(kind, columns=None, **filters):
+    """Строки единого индекса (лучшие результаты и статистики) с фильтром."""
+    conditions = _conditions(kind, filters)
+    df = _filter(get_index()['frames'][kind], conditions)
+    columns = _columns(columns, df.columns)
+    if columns is not None:
+        df = df[list(dict.fromkeys(KEYS[kind] + columns))]
+    return df
+
+
+def statistics(kind, **key):
+    """Строка единого индекса по полному ключу или None."""
+    conditions = _conditions(kind, key)
+    if len(conditions) != len(KEYS[kind]):
+        raise QueryError(f'нужны все ключи {kind}: {", ".join(KEYS[kind])}')
+    return get_index()['records'][kind].get(tuple(conditions[name] for name in KEYS[kind]))
+
+
+def best_record(kind, **key):
+    """Лучший результат в формате data/best или None."""
+    row = statistics(kind, **key)
+    if row is None:
+        return None
+    return aggregates.ga_best_record(row) if kind == 'ga' else aggregates.tsp_best_record(row)
+
+
+def statistics_frame(kind, prefixes, **key):
+    """Таблица статистик исходных запусков комбинации или None (если запусков нет)."""
+    row = statistics(kind, **key)
+    if row is None or row['origin'] != 'initial':
+        return None
+    return aggregates.stats_frame(row, prefixes)
+
+
+def comparison(selections, mutations, crossovers, iterations, value='best_Distance'):
+    """Матрица сравнения ГА по единому индексу (с запасными значениями data/best)
+    для декартова произведения параметров; отсутствующие комбинации - NaN."""
+    index = get_index()
+    if value not in index['frames']['ga'].columns:
+        raise QueryError(f'столбец {value} отсутствует в индексе ga')
+    return aggregates.select_comparison(selections, mutations, crossovers, iterations, value, index)
+
+
+def runs(kind, columns=None, sort_by=None, **filters):
+    """Запуски среза из общего слоя данных (DataFrame, изменять нельзя) или None."""
+    conditions = _conditions(kind, filters)
+    df = shared.frame(kind, columns, sort_by=sort_by, **conditions)
+    if df is None or df.empty:
+        return None
+    return df
+
+
+def runs_table(kind, columns=None, **filters):
+    """Запуски среза таблицей Arrow в порядке ключей (для TwoOpt/LKH - и номера повтора)."""
+    conditions = _conditions(kind, filters)
+    table = shared.table(kind, **conditions)
+    if table is None:
+        return None
+    columns = _columns(columns, table.column_names)
+    order = KEYS[kind] + (['repeat'] if kind == 'tsp' else ['source'])
+    table = table.sort_by([(name, 'ascending') for name in order])
+    return table if columns is None else table.select(columns)
+
+
+def run(kind, repeat, columns=None, **filters):
+    """Один запуск TwoOpt/LKH по номеру повтора (словарь) или None.
+
+    Строка выбирается в общей таблице среза, столбцы остальных повторов в
+    объекты Python не переводятся.
+    """
+    if kind != 'tsp':
+        raise QueryError('номер повтора есть только у запусков tsp')
+    conditions = _conditions(kind, filters)
+    table = shared.table(kind, **conditions)
+    if table is None:
+        return None
+    columns = _columns(columns, table.column_names)
+    rows = table.filter(pc.equal(table['repeat'], int(repeat)))
+    if rows.num_rows == 0:
+        return None
+    return (rows if columns is None else rows.select(columns)).slice(0, 1).to_pylist()[0]
+
+
+def summary(kind, by=None, value=None, **filters):
+    """Статистики value по группам by среди запусков среза."""
+    _check_kind(kind)
+    value = value or VALUES[kind][0]
+    if value not in VALUES[kind]:
+        raise QueryError(f'value должно быть одним из: {", ".join(VALUES[kind])}')
+    by = _columns(by, KEYS[kind]) or KEYS[kind]
+    conditions = _conditions(kind, filters)
+    table = shared.table(kind, list(dict.fromkeys(by + [value])), **conditions)
+    if table is None or table.num_rows == 0:
+        return pd.DataFrame(columns=by + SUMMARY_STATS)
+    return table.to_pandas().groupby(by, observed=True)[value].agg(SUMMARY_STATS).reset_index()
+
+
+def _records(df):
+    """Строки DataFrame в виде словарей из типов Python (NaN -> None)."""
+    return pa.Table.from_pandas(df, preserve_index=False).to_pylist()
+
+
+def _page(items, offset, limit):
+    """Постраничная выборка: (страница, всего)."""
+    return items.slice(offset, limit) if isinstance(items, pa.Table) else items.iloc[offset:offset + limit], len(items)
+
+
+def _int(params, name, default, maximum=None):
+    value = params.pop(name, None)
+    if value is None or value == '':
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise QueryError(f'{name} должно быть целым числом: {value}') from None
+    if value < 0:
+        raise QueryError(f'{name} не может быть отрицательным')
+    return value if maximum is None else min(value, maximum)
+
+
+def _build(kind, resource, params, current):
+    """Ответ на запрос без кэша."""
+    params = dict(params)
+    offset = _int(params, 'offset', 0)
+    limit = _int(params, 'limit', PAGE_SIZE, MAX_PAGE_SIZE)
+    columns = params.pop('columns', None)
+    if resource == 'best':
+        items = best(kind, columns, **params)
+    elif resource == 'runs':
+        items = runs_table(kind, columns, **params)
+        if items is None:
+            items = pa.table({})
+    else:
+        if columns is not None:
+            raise QueryError('columns не поддерживается для summary')
+        items = summary(kind, params.pop('by', None), params.pop('value', None), **params)
+    page, total = _page(items, offset, limit)
+    return {
+        'kind': kind, 'resource': resource, 'generation': current[0],
+        'total': total, 'offset': offset, 'limit': limit,
+        'items': page.to_pylist() if isinstance(page, pa.Table) else _records(page),
+    }
+
+
+def _normalize(params):
+    """Параметры запроса в каноническом виде для ключа кэша."""
+    normalized = []
+    for name, value in sorted(params.items()):
+        if value is None or value == '':
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ','.join(map(str, value))
+        normalized.append((name, str(value)))
+    return tuple(normalized)
+
+
+def etag(kind, resource, params, current=None):
+    """ETag ответа: хэш версии данных и нормализованного запроса."""
+    current = version() if current is None else current
+    digest = hashlib.sha1(repr((current, kind, resource, _normalize(params))).encode()).hexdigest()
+    return f'"{digest[:24]}"'
+
+
+def _response(kind, resource, params):
+    """(ETag, ответ, тело JSON) из кэша ответов или построенные заново."""
+    if resource not in RESOURCES:
+        raise QueryError(f'неизвестный ресурс {resource}, допустимы: {", ".join(RESOURCES)}')
+    _check_kind(kind)
+    current = version()
+    tag = etag(kind, resource, params, current)
+    with _lock:
+        cached = _responses.get(tag)
+        if cached is not None:
+            _responses.move_to_end(tag)
+            _stats['hits'] += 1
+            return tag, cached[0], cached[1]
+    payload = _build(kind, resource, params, current)
+    body = json.dumps(payload, ensure_ascii=False, default=str).encode()
+    with _lock:
+        _stats['misses'] += 1
+        _responses[tag] = (payload, body)
+        while len(_responses) > RESPONSE_ENTRIES:
+            _responses.popitem(last=False)
+    return tag, payload, body
+
+
+@instrument('query.query')
+def query(kind, resource, **params):
+    """Ответ на запрос в виде словаря (общий для всех вызовов, изменять нельзя).
+
+    resource - 'best', 'runs' или 'summary'; params - фильтры по ключам вида,
+    offset, limit, columns, для summary - by и value.
+    """
+    return _response(kind, resource, params)[1]
+
+
+def execute(path, params, if_none_match=None):
+    """Обработка HTTP запроса: (код, тело, ETag)."""
+    parts = [part for part in path.split('/') if part]
+    if parts == ['api', 'version']:
+        generation, stamp = version()
+        body = json.dumps({'generation': generation, 'best': [name for name, _, _ in stamp]}).encode()
+        return 200, body, None
+    if len(parts) != 3 or parts[0] != 'api':
+        return 404, json.dumps({'error': f'неизвестный путь {path}'}, ensure_ascii=False).encode(), None
+    tag, _, body = _response(parts[1], parts[2], params)
+    if if_none_match and (if_none_match.strip() == '*' or tag in [value.strip() for value in if_none_match.split(',')]):
+        with _lock:
+            _stats['not_modified'] += 1
+        return 304, b'', tag
+    return 200, body, tag
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Обработчик GET запросов локального сервера."""
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело пишутся отдельно: без этого ответы keep-alive ждут задержанного ACK
+    disable_nagle_algorithm = True
+    quiet = True
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = {name: values[-1] for name, values in urllib.parse.parse_qs(url.query).items()}
+        try:
+            status, body, tag = execute(url.path, params, self.headers.get('If-None-Match'))
+        except QueryError as e:
+            status, body, tag = 400, json.dumps({'error': str(e)}, ensure_ascii=False).encode(), None
+        self.send_response(status)
+        if tag is not None:
+            self.send_header('ETag', tag)
+            self.send_header('Cache-Control', 'no-cache')
+        if status != 304:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def serve(host='127.0.0.1', port=8765, quiet=True):
+    """Запуск локального HTTP сервера (блокирует поток)."""
+    _Handler.quiet = quiet
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    print(f'Сервис запросов: http://{host}:{server.server_port}/api/version')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def cache_info():
+    """Статистика кэша ответов."""
+    with _lock:
+        return dict(_stats, entries=len(_responses), max_entries=RESPONSE_ENTRIES)
+
+
+def clear_cache():
+    """Сброс единого индекса и кэша ответов."""
+    with _lock:
+        _index.update(version=None, frames={}, records={}, matrices={})
+        _version.update(value=None, checked=0.0)
+        _responses.clear()
+        _stats.update(hits=0, misses=0, not_modified=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Запросы к результатам экспериментов.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    server = commands.add_parser('serve', help='локальный HTTP сервер')
+    server.add_argument('--host', default='127.0.0.1')
+    server.add_argument('--port', type=int, default=8765)
+    server.add_argument('--verbose', action='store_true', help='журнал запросов')
+    get = commands.add_parser('get', help='один запрос, ответ JSON в stdout')
+    get.add_argument('resource', help='ga/best, tsp/runs, ga/summary, ...')
+    get.add_argument('params', nargs='*', help='параметры имя=значение')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.host, args.port, quiet=not args.verbose)
+        return
+    try:
+        kind, _, resource = args.resource.partition('/')
+        params = dict(param.split('=', 1) for param in args.params)
+        print(json.dumps(query(kind, resource, **params), indent=2, ensure_ascii=False, default=str))
+    except (QueryError, ValueError) as e:
+        print(f'Ошибка запроса: {e}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""Параллельный запуск сетки экспериментов генетического алгоритма.
+
+Сетка - все комбинации методов выбора, мутаций, кроссоверов и числа поколений
+с заданным числом повторов. Каждая задача выполняется в пуле процессов
+решателем - функцией ("модуль:функция") или командой оболочки, которые
+возвращают одну запись NumericalIndicators. Выполненные задачи дописываются в
+файл контрольной точки вместе с seed и решателем, поэтому прерванный запуск
+продолжается с места остановки, а контрольная точка запуска с другими --seed
+или --target не используется. Упавшие задачи тоже отмечаются в контрольной
+точке, остальные выполняются до конца, и при повторном запуске упавшие
+выполняются заново. Готовые комбинации сразу записываются в разметку
+data/initial.
+
+Пример:
+    python -m core.runner --target "mysolver {selection} {mutation} {crossover} {generations} {seed}" --repeats 30
+"""
+import argparse
+import concurrent.futures
+import datetime
+import importlib
+import itertools
+import json
+import os
+import shlex
+import subprocess
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+INITIAL_DIR = 'data/initial'
+# Запуски на других экземплярах, чем эталонные данные: хранилище и агрегаты их не читают
+RUNS_DIR = 'data/runs/initial'
+CHECKPOINT = 'data/runs/checkpoint.jsonl'
+
+SELECTIONS = ["EliteSelection", "RouletteWheel", "StochasticUniversalSampling", "Tournament"]
+MUTATIONS = ["DisplacementMutation", "InsertionMutation", "ReverseSequenceMutation", "TworsMutation"]
+CROSSOVERS = ["CycleCrossover", "OnePointCrossover", "OrderBasedCrossover", "OrderedCrossover", "PartiallyMappedCrossover",
+              "PositionBasedCrossover", "ThreeParentCrossover", "TwoPointCrossover", "UniformCrossover"]
+GENERATIONS = [10, 100, 1000, 10000]
+
+# Поля файла запуска, не зависящие от конфигурации
+RUN_FIELDS = {'Fitness': 'MyFitness', 'Chromosome': 'MyChromosome', 'Population': 'TplPopulation'}
+
+
+class CheckpointError(ValueError):
+    """Контрольная точка записана запуском с другими seed или решателем."""
+
+
+class GridError(RuntimeError):
+    """Часть задач сетки завершилась ошибкой; failures - {id: текст ошибки}."""
+
+    def __init__(self, failures):
+        super().__init__(f'задач с ошибкой: {len(failures)}')
+        self.failures = failures
+
+
+def selection_name(selection):
+    """Имя метода выбора в файлах запусков: к имени папки добавляется 'Selection'."""
+    return selection if selection.endswith('Selection') else selection + 'Selection'
+
+
+def make_grid(selections=SELECTIONS, mutations=MUTATIONS, crossovers=CROSSOVERS, generations=GENERATIONS,
+              repeats=1, seed=0):
+    """Список задач сетки. Seed задачи определяется её номером, поэтому
+    повторный запуск с теми же параметрами воспроизводит те же задачи."""
+    tasks = []
+    for number, (selection, mutation, crossover, count, repeat) in enumerate(
+            itertools.product(selections, mutations, crossovers, generations, range(1, repeats + 1))):
+        tasks.append({
+            'id': f'{selection}/{mutation}/{crossover}/{count}/{repeat}',
+            'selection': selection,
+            'mutation': mutation,
+            'crossover': crossover,
+            'generations': count,
+            'repeat': repeat,
+            'seed': seed * 1_000_003 + number,
+        })
+    return tasks
+
+
+def resolve_target(target):
+    """Функция по строке 'модуль:функция', иначе None (команда оболочки)."""
+    if callable(target):
+        return target
+    if ':' in target and ' ' not in target:
+        module, name = target.split(':', 1)
+        return getattr(importlib.import_module(module), name)
+    return None
+
+
+def target_name(target):
+    """Решатель строкой для контрольной точки."""
+    if callable(target):
+        return f'{target.__module__}:{target.__qualname__}'
+    return target
+
+
+def execute(target, task):
+    """Выполнение одной задачи, результат - запись NumericalIndicators."""
+    params = {key: task[key] for key in ('selection', 'mutation', 'crossover', 'generations', 'seed')}
+    function = resolve_target(target)
+    if function is not None:
+        return function(**params)
+    command = [part.format(**params) for part in shlex.split(target)]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f'код возврата {completed.returncode}: {completed.stderr.strip()[-500:]}')
+    return json.loads(completed.stdout)
+
+
+def load_checkpoint(path):
+    """Состояние из файла контрольной точки: ({id: запись задачи}, записанные комбинации).
+
+    Запись задачи - {'id', 'seed', 'target', 'result'}; записи об ошибках
+    ({'id', 'seed', 'target', 'error'}) не считаются выполненными.
+    """
+    done = {}
+    written = set()
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                if 'combination' in entry:
+                    written.add(entry['combination'])
+                elif 'result' in entry:
+                    done[entry['id']] = entry
+    return done, written
+
+
+def check_checkpoint(done, target, tasks, path):
+    """Отказ, если задачи в контрольной точке выполнены с другими seed или решателем."""
+    name = target_name(target)
+    stale = [task['id'] for task in tasks if task['id'] in done
+             and (done[task['id']].get('seed'), done[task['id']].get('target')) != (task['seed'], name)]
+    if stale:
+        raise CheckpointError(f'{path}: {len(stale)} задач (например, {stale[0]}) выполнены с другими --seed '
+                              'или --target; укажите другой --checkpoint или удалите файл')
+
+
+def write_combination(selection, mutation, crossover, indicators, initial_dir=INITIAL_DIR, replace=False,
+                      instance=None):
+    """Запись файла комбинации в {initial_dir}/{selection}/{mutation}/.
+
+    При replace удаляются прежние файлы этой комбинации. instance - имя
+    экземпляра задачи, записывается в поле Instance.
+    """
+    folder = os.path.join(initial_dir, selection, mutation)
+    os.makedirs(folder, exist_ok=True)
+    prefix = f'{selection_name(selection)}{mutation}{crossover}'
+    if replace:
+        for name in os.listdir(folder):
+            if name.startswith(prefix) and name[len(prefix):-len('.json')].isdigit():
+                os.remove(os.path.join(folder, name))
+    stamp = datetime.datetime.now().strftime('%d%m%Y%H%M%S')
+    path = os.path.join(folder, f'{prefix}{stamp}.json')
+    suffix = 1
+    while os.path.exists(path):
+        path = os.path.join(folder, f'{prefix}{stamp}{suffix}.json')
+        suffix += 1
+    data = {'Mutation': mutation, 'Selection': selection_name(selection), 'Crossover': crossover}
+    data.update(RUN_FIELDS)
+    if instance is not None:
+        data['Instance'] = instance
+    data['NumericalIndicators'] = indicators
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def write_results_file(tasks, results, path):
+    """Запись всех результатов в один Parquet файл."""
+    rows = []
+    for task in tasks:
+        result = results.get(task['id'])
+        if result is not None:
+            rows.append(dict({key: task[key] for key in ('selection', 'mutation', 'crossover', 'repeat', 'seed')},
+                             **result))
+    pq.write_table(pa.Table.from_pylist(rows), path, compression='zstd')
+
+
+def run_grid(target, tasks, checkpoint=CHECKPOINT, workers=None, initial_dir=INITIAL_DIR, results_file=None,
+             replace=False, progress=None, write=True):
+    """Выполнение задач в пуле процессов с контрольной точкой.
+
+    Если results_file не задан, каждая комбинация записывается в data/initial,
+    как только выполнены все её задачи (при write=False комбинации не
+    записываются, см. core.scheduler). progress(выполнено, всего) вызывается
+    после каждой задачи. Возвращает {id: результат}.
+
+    Ошибка задачи записывается в контрольную точку, остальные задачи
+    выполняются; в конце, если ошибки были, выбрасывается GridError.
+    Контрольная точка с другими seed или решателем - CheckpointError.
+    """
+    os.makedirs(os.path.dirname(checkpoint) or '.', exist_ok=True)
+    done, written = load_checkpoint(checkpoint)
+    check_checkpoint(done, target, tasks, checkpoint)
+    results = {key: entry['result'] for key, entry in done.items()}
+    pending = [task for task in tasks if task['id'] not in results]
+    name = target_name(target)
+    failures = {}
+
+    combinations = {}
+    for task in tasks:
+        combinations.setdefault((task['selection'], task['mutation'], task['crossover']), []).append(task)
+    remaining = {key: sum(task['id'] not in results for task in group) for key, group in combinations.items()}
+
+    def finish(key, log):
+        name = '/'.join(key)
+        if not write or results_file is not None or name in written:
+            return
+        group = sorted(combinations[key], key=lambda task: (task['generations'], task['repeat']))
+        write_combination(*key, [results[task['id']] for task in group], initial_dir, replace)
+        written.add(name)
+        log.write(json.dumps({'combination': name}) + '\n')
+        log.flush()
+
+    with open(checkpoint, 'a', encoding='utf-8') as log, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        # Комбинации, выполненные до прерывания, но ещё не записанные
+        for key, count in remaining.items():
+            if count == 0:
+                finish(key, log)
+        futures = {pool.submit(execute, target, task): task for task in pending}
+        for future in concurrent.futures.as_completed(futures):
+            task = futures[future]
+            entry = {'id': task['id'], 'seed': task['seed'], 'target': name}
+            try:
+                results[task['id']] = entry['result'] = future.result()
+            except Exception as e:
+                failures[task['id']] = entry['error'] = f'{type(e).__name__}: {e}'
+            log.write(json.dumps(entry) + '\n')
+            log.flush()
+            key = (task['selection'], task['mutation'], task['crossover'])
+            if task['id'] not in failures:
+                remaining[key] -= 1
+                if remaining[key] == 0:
+                    finish(key, log)
+            if progress is not None:
+                progress(len(results) + len(failures), len(tasks))
+
+    if results_file is not None:
+        write_results_file(tasks, results, results_file)
+    if failures:
+        raise GridError(failures)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Параллельный запуск сетки экспериментов ГА.')
+    parser.add_argument('--target', required=True, help="функция 'модуль:функция' или команда с полями "
+                                                        "{selection} {mutation} {crossover} {generations} {seed}")
+    parser.add_argument('--selections', nargs='+', default=SELECTIONS)
+    parser.add_argument('--mutations', nargs='+', default=MUTATIONS)
+    parser.add_argument('--crossovers', nargs='+', default=CROSSOVERS)
+    parser.add_argument('--generations', nargs='+', type=int, default=GENERATIONS)
+    parser.add_argument('--repeats', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--checkpoint', default=CHECKPOINT)
+    parser.add_argument('--results-file', default=None, help='один Parquet файл вместо разметки data/initial')
+    parser.add_argument('--replace', action='store_true', help='удалить прежние файлы перезаписываемых комбинаций')
+    args = parser.parse_args()
+
+    tasks = make_grid(args.selections, args.mutations, args.crossovers, args.generations, args.repeats, args.seed)
+    try:
+        run_grid(args.target, tasks, args.checkpoint, args.workers, results_file=args.results_file,
+                 replace=args.replace, progress=lambda done, total: print(f'\r{done}/{total}', end='', flush=True))
+    except CheckpointError as e:
+        parser.error(str(e))
+    except GridError as e:
+        print()
+        for key, error in sorted(e.failures.items()):
+            print(f'{key}: {error}')
+        raise SystemExit(f'Задач с ошибкой: {len(e.failures)} из {len(tasks)}; повторный запуск выполнит их заново')
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+"""Адаптивный запуск экспериментов ГА: последовательное деление (successive
+halving) и Hyperband поверх core.runner.
+
+Ступени - числа поколений runner.GENERATIONS (10, 100, 1000, 10000). На
+первой ступени запускаются все комбинации операторов, на каждую следующую
+переходит лучшая 1/eta часть по медиане Distance повторов. Hyperband
+выполняет несколько таких прогонов (скобок), начинающихся с разных ступеней:
+от многих комбинаций с 10 поколений до немногих сразу с 10000.
+
+Задачи берутся из полной сетки runner.make_grid с теми же seed, выполняются
+run_grid с контрольной точкой (прерванный запуск продолжается, решения о
+переходе воспроизводятся по сохранённым результатам; контрольная точка с
+другими --seed или --target отклоняется), а по завершении все
+запуски каждой комбинации записываются файлом в разметку data/initial.
+
+По умолчанию файлы пишутся в runner.RUNS_DIR с полем Instance, а не в
+эталонные data/initial: встроенный решатель работает на своём случайном
+экземпляре, и его результаты несравнимы с исходными запусками. Запись в
+data/initial и обновление хранилища (--initial-dir data/initial --ingest)
+имеют смысл, только если --target решает тот же экземпляр, что и исходные
+данные.
+
+Пример:
+    python -m core.scheduler --repeats 5 --eta 4
+    python -m core.scheduler --mode hyperband --repeats 5 --workers 8
+    python -m core.scheduler --target "mysolver ..." --instance ИМЯ --initial-dir data/initial --ingest
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+
+import numpy as np
+
+from core import runner
+
+TARGET = 'core.solvers.ga:run'
+# Экземпляр TARGET: ga.run с параметрами по умолчанию (100 городов, instance_seed=0)
+INSTANCE = 'random-100-0'
+CHECKPOINT = 'data/runs/schedule.jsonl'
+# Во сколько раз уменьшается число комбинаций на каждой ступени
+ETA = 4
+REPEATS = 5
+
+
+def configurations(selections=runner.SELECTIONS, mutations=runner.MUTATIONS, crossovers=runner.CROSSOVERS):
+    """Комбинации операторов (метод выбора, мутация, кроссовер)."""
+    return list(itertools.product(selections, mutations, crossovers))
+
+
+def task_id(config, generations, repeat):
+    """Идентификатор задачи в формате runner.make_grid."""
+    return '/'.join(config + (str(generations), str(repeat)))
+
+
+def scores(config_list, generations, repeats, results):
+    """Оценки комбинаций на ступени: (медиана, среднее) Distance повторов."""
+    values = np.array([[results[task_id(config, generations, repeat)]['Distance']
+                        for repeat in range(1, repeats + 1)] for config in config_list], dtype=float)
+    return np.median(values, axis=1), values.mean(axis=1)
+
+
+def promote(config_list, median, mean, keep):
+    """keep лучших комбинаций: меньшая медиана, при равенстве меньшее среднее."""
+    order = np.lexsort((mean, median))[:keep]
+    return [config_list[i] for i in order]
+
+
+def brackets(mode, count, rungs, eta=ETA):
+    """Скобки прогона: [(число комбинаций, номер первой ступени)].
+
+    successive halving - одна скобка со всеми комбинациями с первой ступени;
+    Hyperband - скобки s = s_max..0 с ceil((s_max + 1) / (s + 1) * eta^s)
+    комбинациями, начинающиеся со ступени s_max - s.
+    """
+    if mode == 'halving':
+        return [(count, 0)]
+    top = rungs - 1
+    return [(min(count, math.ceil((top + 1) / (s + 1) * eta ** s)), top - s) for s in range(top, -1, -1)]
+
+
+def run_bracket(config_list, start, generations, grid, repeats, eta, results, execute):
+    """Последовательное деление одной скобки. Возвращает список ступеней отчёта."""
+    rungs = []
+    for rung in range(start, len(generations)):
+        count = generations[rung]
+        tasks = [grid[task_id(config, count, repeat)] for config in config_list for repeat in range(1, repeats + 1)]
+        results.update(execute(tasks))
+        median, mean = scores(config_list, count, repeats, results)
+        rungs.append({
+            'generations': count,
+            'configurations': ['/'.join(config) for config in config_list],
+            'median': median.tolist(),
+        })
+        if rung < len(generations) - 1:
+            config_list = promote(config_list, median, mean, max(1, len(config_list) // eta))
+    return rungs
+
+
+def written_tasks(checkpoint):
+    """Задачи, уже записанные в разметку data/initial по контрольной точке."""
+    written = set()
+    if os.path.exists(checkpoint):
+        with open(checkpoint, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    written.update(json.loads(line).get('tasks', ()))
+    return written
+
+
+def write_results(results, grid, checkpoint, initial_dir=runner.RUNS_DIR, replace=False, instance=None):
+    """Запись выполненных задач в разметку data/initial: файл на комбинацию.
+
+    Задачи, записанные прошлыми прогонами с той же контрольной точкой,
+    пропускаются; новые задачи комбинации дописываются отдельным файлом
+    (replace удаляет прежние файлы только при первой записи комбинации).
+    instance записывается в поле Instance. Возвращает пути записанных файлов.
+    """
+    written = written_tasks(checkpoint)
+    groups = {}
+    for task_key, result in results.items():
+        task = grid.get(task_key)
+        if task is not None:
+            groups.setdefault((task['selection'], task['mutation'], task['crossover']), []).append((task, result))
+    paths = []
+    with open(checkpoint, 'a', encoding='utf-8') as log:
+        for key, items in sorted(groups.items()):
+            started = any(task_key.startswith('/'.join(key) + '/') for task_key in written)
+            items = sorted((item for item in items if item[0]['id'] not in written),
+                           key=lambda item: (item[0]['generations'], item[0]['repeat']))
+            if not items:
+                continue
+            paths.append(runner.write_combination(*key, [result for _, result in items], initial_dir,
+                                                  replace and not started, instance))
+            # Ключ 'combination' - формат записи контрольной точки core.runner
+            log.write(json.dumps({'combination': '/'.join(key), 'tasks': [task['id'] for task, _ in items]}) + '\n')
+            log.flush()
+    return paths
+
+
+def schedule(mode='halving', selections=runner.SELECTIONS, mutations=runner.MUTATIONS, crossovers=runner.CROSSOVERS,
+             generations=runner.GENERATIONS, repeats=REPEATS, eta=ETA, seed=0, target=TARGET, checkpoint=CHECKPOINT,
+             workers=None, initial_dir=runner.RUNS_DIR, store_dir=None, replace=False, ingest=False, instance=None,
+             progress=None):
+    """Адаптивный прогон ('halving' или 'hyperband').
+
+    Результаты записываются в initial_dir с полем Instance (для TARGET по
+    умолчанию - INSTANCE); хранилище обновляется только при ingest.
+    progress(скобка, ступень, задач) вызывается перед каждой ступенью.
+    Возвращает отчёт: скобки со ступенями, лучшая комбинация, затраты в
+    поколениях по сравнению с полной сеткой.
+    """
+    generations = sorted(generations)
+    if instance is None and target == TARGET:
+        instance = INSTANCE
+    all_configs = configurations(selections, mutations, crossovers)
+    grid = {task['id']: task for task in runner.make_grid(selections, mutations, crossovers, generations, repeats, seed)}
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(checkpoint) or '.', exist_ok=True)
+    results = {}
+    requested = set()
+
+    report = {'mode': mode, 'eta': eta, 'repeats': repeats, 'brackets': []}
+    plan = brackets(mode, len(all_configs), len(generations), eta)
+    for number, (count, start) in enumerate(plan):
+        if count >= len(all_configs):
+            config_list = list(all_configs)
+        else:
+            config_list = [all_configs[i] for i in sorted(rng.choice(len(all_configs), count, replace=False))]
+
+        def execute(tasks, number=number):
+            if progress is not None:
+                progress(number, tasks[0]['generations'], len(tasks))
+            requested.update(task['id'] for task in tasks)
+            return runner.run_grid(target, tasks, checkpoint, workers, initial_dir, write=False)
+
+        report['brackets'].append({'start': generations[start],
+                                   'rungs': run_bracket(config_list, start, generations, grid, repeats, eta,
+                                                        results, execute)})
+
+    # Лучшая комбинация - по медиане на последней ступени среди всех скобок
+    finalists = {}
+    for bracket in report['brackets']:
+        last = bracket['rungs'][-1]
+        for name, median in zip(last['configurations'], last['median']):
+            finalists[name] = median
+    best = min(finalists, key=finalists.get)
+    report.update(
+        best=best,
+        best_median=finalists[best],
+        tasks=len(requested),
+        cost=sum(grid[key]['generations'] for key in requested),
+        grid_tasks=len(grid),
+        grid_cost=sum(task['generations'] for task in grid.values()),
+    )
+    report['paths'] = write_results({key: results[key] for key in requested}, grid, checkpoint, initial_dir, replace,
+                                    instance)
+    if ingest and report['paths']:
+        from core import ingest as ingest_module, store
+
+        ingest_module.ingest(initial_dir, store_dir or store.STORE_DIR)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Адаптивный запуск экспериментов ГА (successive halving, Hyperband).')
+    parser.add_argument('--mode', choices=['halving', 'hyperband'], default='halving')
+    parser.add_argument('--target', default=TARGET, help="функция 'модуль:функция' или команда, см. core.runner")
+    parser.add_argument('--selections', nargs='+', default=runner.SELECTIONS)
+    parser.add_argument('--mutations', nargs='+', default=runner.MUTATIONS)
+    parser.add_argument('--crossovers', nargs='+', default=runner.CROSSOVERS)
+    parser.add_argument('--generations', nargs='+', type=int, default=runner.GENERATIONS)
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    parser.add_argument('--eta', type=int, default=ETA)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--checkpoint', default=CHECKPOINT)
+    parser.add_argument('--replace', action='store_true', help='удалить прежние файлы записываемых комбинаций')
+    parser.add_argument('--instance', default=None,
+                        help=f'имя экземпляра для поля Instance (для {TARGET} - {INSTANCE})')
+    parser.add_argument('--initial-dir', default=runner.RUNS_DIR,
+                        help='куда записывать комбинации; data/initial - только для запусков на экземпляре '
+                             'исходных данных')
+    parser.add_argument('--ingest', action='store_true', help='обновить хранилище по --initial-dir')
+    args = parser.parse_args()
+    if args.eta < 2:
+        parser.error('--eta должно быть не меньше 2')
+
+    try:
+        report = schedule(args.mode, args.selections, args.mutations, args.crossovers, args.generations, args.repeats,
+                          args.eta, args.seed, args.target, args.checkpoint, args.workers, args.initial_dir,
+                          replace=args.replace, ingest=args.ingest, instance=args.instance,
+                          progress=lambda bracket, count, tasks: print(f'Скобка {bracket + 1}: {count} поколений, '
+                                                                       f'задач {tasks}', flush=True))
+    except runner.CheckpointError as e:
+        parser.error(str(e))
+    except runner.GridError as e:
+        for key, error in sorted(e.failures.items()):
+            print(f'{key}: {error}')
+        raise SystemExit(f'Задач с ошибкой: {len(e.failures)}; ступень не завершена, повторный запуск '
+                         'продолжит с контрольной точки')
+    for number, bracket in enumerate(report['brackets'], 1):
+        for rung in bracket['rungs']:
+            print(f"Скобка {number}, {rung['generations']} поколений: комбинаций {len(rung['configurations'])}, "
+                  f"лучшая медиана {min(rung['median']):.0f}")
+    print(f"Лучшая комбинация: {report['best']} (медиана {report['best_median']:.0f})")
+    print(f"Задач: {report['tasks']} из {report['grid_tasks']}, "
+          f"поколений: {report['cost']} из {report['grid_cost']} ({report['cost'] / report['grid_cost']:.1%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""Общий для всех сессий слой данных только для чтения.
+
+Срез хранилища (таблица с фильтром по партициям) один раз на поколение
+хранилища сохраняется в несжатый файл Arrow IPC и отображается в память:
+все сессии обеих страниц получают одну и ту же неизменяемую таблицу без
+копирования, а несколько процессов сервера делят страницы файла через кэш ОС.
+Таблицы и построенные по ним DataFrame учитываются в общем бюджете памяти,
+при превышении вытесняются самые давно использованные записи.
+"""
+import hashlib
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from core import store
+from core.ingest import store_generation
+from core.metrics import instrument
+
+CACHE_DIR = os.path.join(store.STORE_DIR, 'cache')
+# Бюджет памяти общего слоя: отображённые таблицы и DataFrame
+BUDGET_BYTES = 512 * 1024 * 1024
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_loading = {}
+_state = {'generation': None}
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+
+
+def _cache_path(generation, key):
+    """Файл Arrow IPC среза хранилища."""
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f'g{generation}', f'{key[0]}-{digest}.arrow')
+
+
+def _materialize(key, generation):
+    """Запись среза в файл Arrow IPC (если его ещё нет) и отображение файла в память."""
+    kind, conditions = key
+    path = _cache_path(generation, key)
+    if not os.path.exists(path):
+        table = store.read_table(kind, filter=store.make_filter(**dict(conditions)))
+        if table is None:
+            return None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with pa.OSFile(tmp, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path)
+    return ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def _check_generation():
+    """Сброс кэша и старых файлов при смене поколения хранилища."""
+    store.ensure_store()
+    generation = store_generation()
+    with _lock:
+        if _state['generation'] == generation:
+            return generation
+        _entries.clear()
+        _stats['bytes'] = 0
+        _state['generation'] = generation
+    if os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            if name != f'g{generation}':
+                # Файлы, ещё отображённые другими процессами, удалятся позже
+                shutil.rmtree(os.path.join(CACHE_DIR, name), ignore_errors=True)
+    return generation
+
+
+def _evict():
+    """Вытеснение самых давно использованных записей сверх бюджета."""
+    while len(_entries) > 1 and _stats['bytes'] > BUDGET_BYTES:
+        _, entry = _entries.popitem(last=False)
+        _stats['bytes'] -= entry['bytes']
+        _stats['evictions'] += 1
+
+
+def _get(key, build):
+    """Запись кэша по ключу; build() вызывается один раз, даже при одновременных запросах."""
+    while True:
+        with _lock:
+            entry = _entries.get(key)
+            if entry is not None:
+                _entries.move_to_end(key)
+                entry['hits'] += 1
+                _stats['hits'] += 1
+                return entry['value']
+            event = _loading.get(key)
+            if event is None:
+                event = _loading[key] = threading.Event()
+                break
+        # Срез уже загружается другой сессией
+        event.wait()
+
+    try:
+        started = time.perf_counter()
+        value, size = build()
+        with _lock:
+            _stats['misses'] += 1
+            if value is not None:
+                _entries[key] = {'value': value, 'bytes': size, 'hits': 0,
+                                 'load_ms': (time.perf_counter() - started) * 1000, 'loaded': time.time()}
+                _stats['bytes'] += size
+                _evict()
+        return value
+    finally:
+        with _lock:
+            del _loading[key]
+        event.set()
+
+
+@instrument('shared.table')
+def table(kind, columns=None, **conditions):
+    """Общая неизменяемая таблица среза хранилища ('ga' или 'tsp').
+
+    conditions - равенства по столбцам партиций и данных, значения None
+    пропускаются. Проекция columns не копирует данные.
+    """
+    generation = _check_generation()
+    key = (kind, tuple(sorted((name, value) for name, value in conditions.items() if value is not None)))
+
+    def build():
+        result = _materialize(key, generation)
+        return result, 0 if result is None else result.nbytes
+
+    result = _get(('table',) + key, build)
+    if result is None or columns is None:
+        return result
+    return result.select(columns)
+
+
+@instrument('shared.frame')
+def frame(kind, columns=None, sort_by=None, **conditions):
+    """Общий DataFrame среза хранилища. Изменять его нельзя."""
+    def build():
+        result = table(kind, columns, **conditions)
+        if result is None:
+            return None, 0
+        if sort_by is not None and sort_by in result.column_names:
+            result = result.sort_by(sort_by)
+        df = result.to_pandas()
+        return df, int(df.memory_usage(deep=True).sum())
+
+    key = ('frame', kind, tuple(columns or ()), sort_by,
+           tuple(sorted((name, value) for name, value in conditions.items() if value is not None)))
+    return _get(key, build)
+
+
+def configure(budget_bytes=None):
+    """Изменение бюджета памяти."""
+    global BUDGET_BYTES
+    with _lock:
+        if budget_bytes is not None:
+            BUDGET_BYTES = budget_bytes
+        _evict()
+
+
+def cache_info():
+    """Статистика общего слоя: попадания, промахи, вытеснения, занятый объём."""
+    with _lock:
+        return dict(_stats, entries=len(_entries), budget_bytes=BUDGET_BYTES, generation=_state['generation'])
+
+
+def _describe_key(key):
+    """Подпись записи для просмотра: вид, срез, столбцы."""
+    parts = []
+    for part in key:
+        if isinstance(part, tuple):
+            if part and isinstance(part[0], tuple):
+                parts.append(', '.join(f'{name}={value}' for name, value in part))
+            elif part:
+                parts.append(', '.join(map(str, part)))
+        elif part is not None:
+            parts.append(str(part))
+    return ' / '.join(parts)
+
+
+def entries():
+    """Записи кэша от самой давно использованной к последней."""
+    with _lock:
+        return [
+            {'key': _describe_key(key), 'bytes': entry['bytes'],
+             'hits': entry['hits'], 'load_ms': entry['load_ms'], 'loaded': entry['loaded']}
+            for key, entry in _entries.items()
+        ]
+
+
+def clear():
+    """Очистка кэша и счётчиков."""
+    with _lock:
+        _entries.clear()
+        _stats.update(hits=0, misses=0, evictions=0, bytes=0)
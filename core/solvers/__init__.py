@@ -0,0 +1 @@
+"""Встроенные решатели задачи коммивояжёра."""
@@ -0,0 +1,164 @@
+"""Общие функции решателей: матрица расстояний, стоимость маршрута и запись запусков.
+
+Маршруты в данных проекта - незамкнутые пути: Costs содержит n-1 стоимостей
+рёбер, TotalSum - их сумму. Замкнутый обход сводится к пути через фиктивную
+вершину с нулевыми расстояниями до всех городов.
+
+Матрица расстояний и списки соседей строятся блоками строк (BLOCK_BYTES на
+временные массивы блока). Матрица с фиктивной вершиной копируется целиком,
+только если помещается в DENSE_BYTES; для больших матриц (в том числе memmap
+экземпляров) фиктивная вершина обрабатывается по индексу без копии.
+"""
+import datetime
+import json
+import os
+
+import numpy as np
+
+INITIAL_DIR = 'data/initial'
+# Запуски встроенных решателей: тот же формат, что у data/initial, но хранилище
+# и агрегаты их не читают - они сделаны на других экземплярах, чем эталонные данные
+RUNS_DIR = 'data/runs/initial'
+# Память под временные массивы одного блока строк
+BLOCK_BYTES = 64 * 1024 * 1024
+# Наибольший размер плотной копии матрицы с фиктивной вершиной
+DENSE_BYTES = 256 * 1024 * 1024
+
+
+def random_coordinates(n, seed=None, size=100):
+    """Случайные координаты n городов на квадрате size x size."""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0, size, (n, 2))
+
+
+def _block_rows(n, itemsize=8, arrays=3):
+    """Число строк в блоке, чтобы arrays массивов блока укладывались в BLOCK_BYTES."""
+    return max(1, BLOCK_BYTES // max(1, n * itemsize * arrays))
+
+
+def as_matrix(distances):
+    """Матрица для решателей: ndarray, memmap или объект с выборкой по индексам - как есть."""
+    return distances if hasattr(distances, 'shape') else np.asarray(distances)
+
+
+def distance_matrix(coordinates, dtype=np.int32):
+    """Матрица евклидовых расстояний, округлённых до целого (EUC_2D в TSPLIB), по блокам строк."""
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    n = len(coordinates)
+    matrix = np.empty((n, n), dtype=dtype)
+    step = _block_rows(n, arrays=2 * coordinates.shape[1] + 2)
+    for start in range(0, n, step):
+        diff = coordinates[start:start + step, None, :] - coordinates[None, :, :]
+        matrix[start:start + step] = np.rint(np.sqrt((diff ** 2).sum(-1)))
+    return matrix
+
+
+class DummyDistances:
+    """Матрица с фиктивной вершиной n поверх матрицы городов без её копирования.
+
+    Поддерживает выборку пар distances[i, j] (числа или массивы индексов) -
+    единственный доступ решателей к матрице с фиктивной вершиной.
+    """
+
+    def __init__(self, distances):
+        self.distances = distances
+        self.dtype = np.dtype(distances.dtype)
+        self.shape = (len(distances) + 1, len(distances) + 1)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        rows, columns = np.broadcast_arrays(*(np.asarray(index) for index in key))
+        last = len(self.distances) - 1
+        values = np.asarray(self.distances[np.minimum(rows, last), np.minimum(columns, last)])
+        return np.where((rows > last) | (columns > last), 0, values).astype(self.dtype, copy=False)[()]
+
+
+def with_dummy(distances):
+    """Матрица с фиктивной вершиной n: путь по городам становится замкнутым обходом.
+
+    Плотная копия делается только для матриц в памяти до DENSE_BYTES.
+    """
+    n = len(distances)
+    itemsize = np.dtype(distances.dtype).itemsize
+    if type(distances) is not np.ndarray or (n + 1) ** 2 * itemsize > DENSE_BYTES:
+        return DummyDistances(distances)
+    augmented = np.zeros((n + 1, n + 1), dtype=distances.dtype)
+    augmented[:n, :n] = distances
+    return augmented
+
+
+def cut_at_dummy(tour, dummy):
+    """Путь из замкнутого обхода с фиктивной вершиной."""
+    tour = np.asarray(tour)
+    i = int(np.flatnonzero(tour == dummy)[0])
+    return np.concatenate([tour[i + 1:], tour[:i]])
+
+
+def tour_length(distances, tour, closed=True):
+    """Длина маршрута одной векторной выборкой из матрицы."""
+    tour = np.asarray(tour)
+    following = np.roll(tour, -1) if closed else tour[1:]
+    return int(distances[tour[:len(following)], following].sum())
+
+
+def path_costs(distances, path):
+    """Стоимости рёбер незамкнутого пути."""
+    path = np.asarray(path)
+    return distances[path[:-1], path[1:]]
+
+
+def nearest_neighbors(distances, k, dummy=False):
+    """Списки k ближайших соседей каждой вершины, отсортированные по расстоянию.
+
+    Считаются по блокам строк: argpartition применяется к блоку, а не ко всей
+    матрице. dummy - списки для матрицы с фиктивной вершиной n (with_dummy),
+    её строки и столбец дописываются к блоку без копии всей матрицы.
+    """
+    n = len(distances)
+    size = n + 1 if dummy else n
+    k = min(k, size - 1)
+    result = np.empty((size, k), dtype=np.int64)
+    step = _block_rows(size)
+    for start in range(0, size, step):
+        block = np.zeros((min(step, size - start), size))
+        cities = max(0, min(len(block), n - start))
+        block[:cities, :n] = distances[start:start + cities]
+        rows = np.arange(len(block))
+        block[rows, start + rows] = np.inf
+        candidates = np.argpartition(block, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(block, candidates, axis=1).argsort(axis=1, kind='stable')
+        result[start:start + len(block)] = np.take_along_axis(candidates, order, axis=1)
+    return result
+
+
+def make_record(algorithm, distances, path, iterations, elapsed_ms):
+    """Запись запуска в формате data/initial/{twoopt,lkh}/*/solution_*.json."""
+    costs = path_costs(distances, path)
+    return {
+        'Algorithm': algorithm,
+        'Solution': [int(city) for city in path],
+        'Costs': costs.tolist(),
+        'TotalSum': costs.sum().item(),
+        'Iterations': int(iterations),
+        'ElapsedMilliseconds': int(elapsed_ms),
+    }
+
+
+def save_run(record, folder, iterations, initial_dir=RUNS_DIR):
+    """Сохранение запуска в {initial_dir}/{folder}/{iterations}/solution_{время}.json.
+
+    По умолчанию запуск пишется в RUNS_DIR, а не в эталонные data/initial.
+    """
+    path_dir = os.path.join(initial_dir, folder, str(iterations))
+    os.makedirs(path_dir, exist_ok=True)
+    stamp = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    path = os.path.join(path_dir, f'solution_{stamp}.json')
+    suffix = 1
+    while os.path.exists(path):
+        path = os.path.join(path_dir, f'solution_{stamp}_{suffix}.json')
+        suffix += 1
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+    return path
@@ -0,0 +1,329 @@
+"""Генетический алгоритм для задачи коммивояжёра с популяцией в виде 2D массива NumPy.
+
+Все операторы (выбор, кроссовер, мутация) применяются сразу ко всей популяции
+пакетными операциями над массивами, приспособленность всей популяции
+вычисляется одной выборкой из матрицы расстояний. Маршрут - незамкнутый путь,
+как в остальных данных проекта.
+
+Кроссоверы, которые в исходной библиотеке не сохраняют перестановку
+(OnePoint, TwoPoint, Uniform, ThreeParent), реализованы в перестановочном
+варианте: гены из маски берутся у первого родителя, остальные - в порядке
+следования у второго (для ThreeParent - у третьего).
+"""
+import time
+
+import numpy as np
+
+from core.solvers.common import distance_matrix, random_coordinates
+
+# Сколько раз за запуск сообщается прогресс
+PROGRESS_STEPS = 200
+
+# Приспособленность как в исходных данных: Fintess = 1 - Distance / FITNESS_SCALE
+FITNESS_SCALE = 100000
+MIN_POPULATION = 2
+MAX_POPULATION = 100
+CROSSOVER_PROBABILITY = 0.75
+MUTATION_PROBABILITY = 0.1
+TOURNAMENT_SIZE = 2
+
+
+def path_lengths(distances, population):
+    """Длины путей всей популяции одной выборкой из матрицы."""
+    return distances[population[:, :-1], population[:, 1:]].sum(axis=1)
+
+
+# Выбор родителей: по приспособленности возвращают индексы count особей
+
+def elite_selection(fitness, count, rng):
+    """Выбор из лучшей половины популяции."""
+    best = np.argsort(-fitness, kind='stable')[:max(2, len(fitness) // 2)]
+    return best[rng.integers(len(best), size=count)]
+
+
+def roulette_wheel_selection(fitness, count, rng):
+    """Выбор с вероятностью, пропорциональной приспособленности."""
+    return rng.choice(len(fitness), size=count, p=fitness / fitness.sum())
+
+
+def stochastic_universal_sampling(fitness, count, rng):
+    """Стохастическая универсальная выборка: равноотстоящие указатели на колесе."""
+    cumulative = np.cumsum(fitness / fitness.sum())
+    pointers = (rng.random() + np.arange(count)) / count
+    return np.minimum(np.searchsorted(cumulative, pointers), len(fitness) - 1)
+
+
+def tournament_selection(fitness, count, rng, size=TOURNAMENT_SIZE):
+    """Турнирный выбор: лучший из size случайных особей."""
+    contestants = rng.integers(len(fitness), size=(count, size))
+    return contestants[np.arange(count), np.argmax(fitness[contestants], axis=1)]
+
+
+# Кроссоверы: по массивам родителей (m, n) возвращают массив потомков (m, n)
+
+def _fill(keep, first, donor, start=None):
+    """Потомки: гены first на позициях keep, остальные позиции заполняются
+    отсутствующими генами в порядке их следования в donor.
+
+    start - сдвиг по строкам, с которого начинается обход позиций и donor (для OX).
+    """
+    m, n = first.shape
+    rows = np.arange(m)[:, None]
+    if start is not None:
+        order = (start[:, None] + np.arange(n)) % n
+        keep = np.take_along_axis(keep, order, axis=1)
+        donor = np.take_along_axis(donor, order, axis=1)
+    else:
+        order = np.broadcast_to(np.arange(n), (m, n))
+    kept_gene = np.zeros((m, n), dtype=bool)
+    kept_gene[rows, first[rows, order]] = keep
+    free_donor = ~np.take_along_axis(kept_gene, donor, axis=1)
+    donor_genes = np.take_along_axis(donor, np.argsort(~free_donor, axis=1, kind='stable'), axis=1)
+    free_positions = np.take_along_axis(order, np.argsort(keep, axis=1, kind='stable'), axis=1)
+    valid = np.arange(n) < (~keep).sum(axis=1, keepdims=True)
+    child = first.copy()
+    child[np.broadcast_to(rows, (m, n))[valid], free_positions[valid]] = donor_genes[valid]
+    return child
+
+
+def _cut_points(m, n, rng):
+    """Пары точек разреза a <= b для каждой строки."""
+    points = np.sort(rng.integers(n, size=(m, 2)), axis=1)
+    return points[:, :1], points[:, 1:]
+
+
+def ordered_crossover(parents, rng):
+    """OX: отрезок первого родителя, остальное - от второго начиная за отрезком."""
+    first, second = parents[0], parents[1]
+    m, n = first.shape
+    a, b = _cut_points(m, n, rng)
+    positions = np.arange(n)
+    keep = (positions >= a) & (positions <= b)
+    return _fill(keep, first, second, start=(b[:, 0] + 1) % n)
+
+
+def partially_mapped_crossover(parents, rng):
+    """PMX: отрезок первого родителя, остальные гены второго через отображение."""
+    first, second = parents[0], parents[1]
+    m, n = first.shape
+    rows = np.arange(m)[:, None]
+    a, b = _cut_points(m, n, rng)
+    positions = np.arange(n)
+    segment = (positions >= a) & (positions <= b)
+    in_segment = np.zeros((m, n), dtype=bool)
+    in_segment[rows, first] = segment
+    position_first = np.empty_like(first)
+    position_first[rows, first] = positions
+    genes = second.copy()
+    for _ in range(n):
+        conflict = ~segment & in_segment[rows, genes]
+        if not conflict.any():
+            break
+        mapped = second[rows, position_first[rows, genes]]
+        genes = np.where(conflict, mapped, genes)
+    return np.where(segment, first, genes)
+
+
+def cycle_crossover(parents, rng):
+    """CX: первый цикл позиций от первого родителя, остальные позиции от второго."""
+    first, second = parents[0], parents[1]
+    m, n = first.shape
+    rows = np.arange(m)
+    position_first = np.empty_like(first)
+    position_first[rows[:, None], first] = np.arange(n)
+    in_cycle = np.zeros((m, n), dtype=bool)
+    index = np.zeros(m, dtype=np.int64)
+    active = np.ones(m, dtype=bool)
+    for _ in range(n):
+        in_cycle[rows[active], index[active]] = True
+        index = position_first[rows, second[rows, index]]
+        active &= ~in_cycle[rows, index]
+        if not active.any():
+            break
+    return np.where(in_cycle, first, second)
+
+
+def order_based_crossover(parents, rng):
+    """OX2: гены со случайных позиций второго родителя переставляются в первом
+    в порядке их следования во втором."""
+    first, second = parents[0], parents[1]
+    m, n = first.shape
+    rows = np.arange(m)[:, None]
+    selected = rng.random((m, n)) < 0.5
+    selected_gene = np.zeros((m, n), dtype=bool)
+    selected_gene[rows, second] = selected
+    return _fill(~selected_gene[rows, first], first, second)
+
+
+def position_based_crossover(parents, rng):
+    """Случайное число позиций от первого родителя, остальное - в порядке второго."""
+    first, second = parents[0], parents[1]
+    m, n = first.shape
+    count = rng.integers(1, n, size=(m, 1))
+    keep = np.argsort(rng.random((m, n)), axis=1) < count
+    return _fill(keep, first, second)
+
+
+def one_point_crossover(parents, rng):
+    """Начало до точки разреза от первого родителя, хвост - в порядке второго."""
+    first, second = parents[0], parents[1]
+    m, n = first.shape
+    keep = np.arange(n) < rng.integers(1, n, size=(m, 1))
+    return _fill(keep, first, second)
+
+
+def two_point_crossover(parents, rng):
+    """Края вне отрезка от первого родителя, середина - в порядке второго."""
+    first, second = parents[0], parents[1]
+    m, n = first.shape
+    a, b = _cut_points(m, n, rng)
+    positions = np.arange(n)
+    return _fill((positions < a) | (positions > b), first, second)
+
+
+def uniform_crossover(parents, rng):
+    """Каждая позиция от первого родителя с вероятностью 0.5, остальное - в порядке второго."""
+    first, second = parents[0], parents[1]
+    return _fill(rng.random(first.shape) < 0.5, first, second)
+
+
+def three_parent_crossover(parents, rng):
+    """Совпадающие у первых двух родителей позиции сохраняются, остальное - в порядке третьего."""
+    first, second, third = parents
+    return _fill(first == second, first, third)
+
+
+# Мутации: по массиву особей (m, n) возвращают массив индексов генов (m, n)
+
+def twors_mutation(m, n, rng):
+    """Обмен двух случайных генов."""
+    index = np.tile(np.arange(n), (m, 1))
+    i, j = rng.integers(n, size=m), rng.integers(n, size=m)
+    rows = np.arange(m)
+    index[rows, i], index[rows, j] = j, i
+    return index
+
+
+def reverse_sequence_mutation(m, n, rng):
+    """Разворот случайного отрезка."""
+    a, b = _cut_points(m, n, rng)
+    positions = np.arange(n)
+    return np.where((positions >= a) & (positions <= b), a + b - positions, positions)
+
+
+def displacement_mutation(m, n, rng, length=None):
+    """Перенос случайного отрезка на случайное место."""
+    if length is None:
+        length = rng.integers(1, n, size=(m, 1))
+    a = rng.integers(0, n - length + 1)
+    q = rng.integers(0, n - length + 1)
+    t = np.arange(n)
+
+    def rest(r):
+        return r + length * (r >= a)
+
+    return np.where(t < q, rest(t), np.where(t < q + length, a + t - q, rest(t - length)))
+
+
+def insertion_mutation(m, n, rng):
+    """Перенос одного гена на случайное место."""
+    return displacement_mutation(m, n, rng, length=np.ones((m, 1), dtype=np.int64))
+
+
+SELECTIONS = {
+    "EliteSelection": elite_selection,
+    "RouletteWheel": roulette_wheel_selection,
+    "StochasticUniversalSampling": stochastic_universal_sampling,
+    "Tournament": tournament_selection,
+}
+MUTATIONS = {
+    "DisplacementMutation": displacement_mutation,
+    "InsertionMutation": insertion_mutation,
+    "ReverseSequenceMutation": reverse_sequence_mutation,
+    "TworsMutation": twors_mutation,
+}
+# Кроссовер и число родителей
+CROSSOVERS = {
+    "CycleCrossover": (cycle_crossover, 2),
+    "OnePointCrossover": (one_point_crossover, 2),
+    "OrderBasedCrossover": (order_based_crossover, 2),
+    "OrderedCrossover": (ordered_crossover, 2),
+    "PartiallyMappedCrossover": (partially_mapped_crossover, 2),
+    "PositionBasedCrossover": (position_based_crossover, 2),
+    "ThreeParentCrossover": (three_parent_crossover, 3),
+    "TwoPointCrossover": (two_point_crossover, 2),
+    "UniformCrossover": (uniform_crossover, 2),
+}
+
+
+def evolve(distances, selection, mutation, crossover, generations, population_size=MAX_POPULATION, seed=None,
+           crossover_probability=CROSSOVER_PROBABILITY, mutation_probability=MUTATION_PROBABILITY, progress=None):
+    """Эволюция популяции в течение generations поколений.
+
+    Лучшая особь каждого поколения переходит в следующее без изменений.
+    progress получает номер поколения и длину лучшего пути (см. core.jobs).
+    Возвращает (лучший путь, его длину).
+    """
+    rng = np.random.default_rng(seed)
+    distances = np.asarray(distances)
+    n = len(distances)
+    select = SELECTIONS[selection if selection in SELECTIONS else selection.removesuffix('Selection')]
+    cross, parent_count = CROSSOVERS[crossover]
+    mutate = MUTATIONS[mutation]
+
+    population = np.argsort(rng.random((population_size, n)), axis=1)
+    lengths = path_lengths(distances, population)
+    children_count = population_size - 1
+    rows = np.arange(children_count)[:, None]
+    step = max(1, generations // PROGRESS_STEPS)
+
+    for generation in range(1, generations + 1):
+        best = int(np.argmin(lengths))
+        fitness = np.maximum(1 - lengths / FITNESS_SCALE, 1e-12)
+        parents = population[select(fitness, children_count * parent_count, rng)]
+        parents = parents.reshape(parent_count, children_count, n)
+
+        children = parents[0].copy()
+        crossed = rng.random(children_count) < crossover_probability
+        if crossed.any():
+            children[crossed] = cross(parents[:, crossed], rng)
+
+        mutated = rng.random(children_count) < mutation_probability
+        if mutated.any():
+            index = mutate(int(mutated.sum()), n, rng)
+            children[mutated] = children[mutated][rows[:len(index)], index]
+
+        population = np.concatenate([population[best:best + 1], children])
+        lengths = path_lengths(distances, population)
+        if progress is not None and (generation % step == 0 or generation == generations):
+            progress(generation, generations, Generation=generation, Distance=int(lengths.min()))
+
+    best = int(np.argmin(lengths))
+    return population[best], lengths[best].item()
+
+
+def indicators(distances, selection, mutation, crossover, generations, seed=None, population_size=MAX_POPULATION,
+               progress=None):
+    """Запуск ГА и запись NumericalIndicators в формате data/initial."""
+    started = time.perf_counter()
+    _, distance = evolve(distances, selection, mutation, crossover, generations, population_size, seed,
+                         progress=progress)
+    return {
+        'GenerationCount': generations,
+        'MinPopulation': MIN_POPULATION,
+        'MaxPopulation': population_size,
+        'TimeInSec': time.perf_counter() - started,
+        'Fintess': round(1 - distance / FITNESS_SCALE, 5),
+        'Distance': distance,
+    }
+
+
+_instances = {}
+
+
+def run(selection, mutation, crossover, generations, seed, cities=100, instance_seed=0, progress=None):
+    """Решатель для core.runner и задач core.jobs: случайный экземпляр, общий для всех задач сетки."""
+    key = (cities, instance_seed)
+    if key not in _instances:
+        _instances[key] = distance_matrix(random_coordinates(cities, instance_seed))
+    return indicators(_instances[key], selection, mutation, crossover, generations, seed, progress=progress)
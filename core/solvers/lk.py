@@ -0,0 +1,193 @@
+"""Локальный поиск в стиле Лина-Кернигана: 2-opt и Or-opt ходы по спискам
+кандидатов с итерированными локальными возмущениями и ограничением по времени.
+
+Число итераций (Iterations) - количество попыток возмущения, как в LKH.
+"""
+import time
+from collections import deque
+
+import numpy as np
+
+from core.solvers import twoopt
+from core.solvers.common import as_matrix, cut_at_dummy, make_record, nearest_neighbors, tour_length, with_dummy
+
+ALGORITHM = 'Lkh'
+FOLDER = 'lkh'
+
+# Максимальная длина переносимого участка в Or-opt ходе
+MAX_SEGMENT = 3
+# Окно позиций, в котором выбираются разрезы возмущения double-bridge
+KICK_WINDOW = 50
+
+
+def move_segment(tour, position, first, length, after, reverse):
+    """Перенос участка из length вершин с позиции first между позициями after и after+1.
+
+    Сдвигается более короткая из двух частей обхода между участком и местом вставки.
+    """
+    n = len(tour)
+    segment = tour[(first + np.arange(length)) % n]
+    if reverse:
+        segment = segment[::-1]
+    forward = (after - (first + length - 1)) % n
+    backward = (first - (after + 1)) % n
+    if forward <= backward:
+        index = (first + np.arange(length + forward)) % n
+        middle = tour[(first + length + np.arange(forward)) % n]
+        tour[index] = np.concatenate([middle, segment])
+    else:
+        start = (after + 1) % n
+        index = (start + np.arange(length + backward)) % n
+        middle = tour[(start + np.arange(backward)) % n]
+        tour[index] = np.concatenate([segment, middle])
+    position[tour[index]] = index
+
+
+def best_or_move(distances, tour, position, a, c, max_segment=MAX_SEGMENT):
+    """Лучший Or-opt ход: перенос участка длины 1..max_segment с концом в a
+    к одному из кандидатов c (с разворотом или без).
+
+    Возвращает (выигрыш, аргументы move_segment, затронутые вершины).
+    """
+    n = len(tour)
+    i = position[a]
+    j = position[c]
+    succ_c, pred_c = tour[(j + 1) % n], tour[j - 1]
+    best = (0, None, None)
+
+    for length in range(1, min(max_segment, n - 3) + 1):
+        # a - первая вершина участка (first = i) или последняя (first = i - length + 1)
+        for a_first in (True, False):
+            first = i if a_first else (i - length + 1) % n
+            other = tour[(first + length - 1) % n] if a_first else tour[first]
+            p, q = tour[first - 1], tour[(first + length) % n]
+            removed = distances[p, tour[first]] + distances[tour[(first + length - 1) % n], q] - distances[p, q]
+
+            inside_c = (j - first) % n < length
+            # Вставка между c и succ(c): ребро (c, a), ребро (other, succ c)
+            gain_succ = removed - (distances[c, a] + distances[other, succ_c] - distances[c, succ_c])
+            gain_succ[inside_c | ((position[succ_c] - first) % n < length)] = 0
+            # Вставка между pred(c) и c: ребро (pred c, other), ребро (a, c)
+            gain_pred = removed - (distances[pred_c, other] + distances[a, c] - distances[pred_c, c])
+            gain_pred[inside_c | ((position[pred_c] - first) % n < length)] = 0
+
+            k_succ, k_pred = int(np.argmax(gain_succ)), int(np.argmax(gain_pred))
+            if gain_succ[k_succ] > best[0] and gain_succ[k_succ] >= gain_pred[k_pred]:
+                k = k_succ
+                best = (gain_succ[k], (first, length, j[k], not a_first), (p, q, a, other, c[k], succ_c[k]))
+            elif gain_pred[k_pred] > best[0]:
+                k = k_pred
+                best = (gain_pred[k], (first, length, (j[k] - 1) % n, a_first), (p, q, a, other, pred_c[k], c[k]))
+    return best
+
+
+def improve(distances, tour, position, neighbors, active, max_passes=None, deadline=None):
+    """Улучшение обхода на месте лучшим из 2-opt и Or-opt ходов для каждой вершины.
+
+    Использует очередь активных вершин и don't-look bits. Поиск прекращается
+    после момента deadline (time.perf_counter), обход при этом остаётся
+    допустимым. Возвращает суммарный выигрыш.
+    """
+    n = len(tour)
+    active = deque(active)
+    queued = np.zeros(n, dtype=bool)
+    queued[list(active)] = True
+    total_gain = 0
+    passes = 0
+    while active and (max_passes is None or passes < max_passes):
+        passes += 1
+        for _ in range(len(active)):
+            if deadline is not None and time.perf_counter() > deadline:
+                return total_gain
+            a = active.popleft()
+            queued[a] = False
+            c = neighbors[a]
+            gain, segment, touched = twoopt.best_move(distances, tour, position, a, c)
+            or_gain, move, or_touched = best_or_move(distances, tour, position, a, c)
+            if gain <= 0 and or_gain <= 0:
+                continue
+            if gain >= or_gain:
+                twoopt.reverse_segment(tour, position, *segment)
+            else:
+                move_segment(tour, position, *move)
+                gain, touched = or_gain, or_touched
+            total_gain += gain
+            for city in touched:
+                if not queued[city]:
+                    queued[city] = True
+                    active.append(int(city))
+    return total_gain
+
+
+def double_bridge(distances, tour, position, rng, window=KICK_WINDOW):
+    """Локальное возмущение double-bridge: A B C D -> A C B D внутри окна позиций.
+
+    Возвращает (изменение длины, затронутые вершины).
+    """
+    n = len(tour)
+    window = max(3, min(window, n - 2))
+    x = int(rng.integers(n))
+    p1, p2 = np.sort(rng.choice(np.arange(1, window), 2, replace=False))
+    b_first, b_last = (x + 1) % n, (x + p1) % n
+    c_first, c_last = (x + p1 + 1) % n, (x + p2) % n
+    d_first = (x + p2 + 1) % n
+    a_end, b1, b2, c1, c2, d1 = tour[[x, b_first, b_last, c_first, c_last, d_first]]
+    delta = (distances[a_end, c1] + distances[c2, b1] + distances[b2, d1]
+             - distances[a_end, b1] - distances[b2, c1] - distances[c2, d1])
+    index = (x + 1 + np.arange(p2)) % n
+    tour[index] = np.concatenate([tour[(x + p1 + 1 + np.arange(p2 - p1)) % n], tour[(x + 1 + np.arange(p1)) % n]])
+    position[tour[index]] = index
+    return delta, (a_end, b1, b2, c1, c2, d1)
+
+
+def optimize(distances, tour, neighbors, trials, time_limit=None, seed=None, progress=None):
+    """Итерированный локальный поиск на замкнутом обходе.
+
+    После начального улучшения выполняется до trials возмущений; результат
+    принимается, если обход не стал длиннее. Поиск, включая начальное
+    улучшение, прекращается по time_limit секунд. После каждой попытки вызывается progress(попытка, trials,
+    Trial=попытка, TotalSum=лучшая длина). Возвращает (лучший обход, его
+    длину, число выполненных попыток).
+    """
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    rng = np.random.default_rng(seed)
+    n = len(tour)
+    tour = np.array(tour)
+    position = np.empty(n, dtype=np.int64)
+    position[tour] = np.arange(n)
+    length = tour_length(distances, tour) - improve(distances, tour, position, neighbors, tour.tolist(),
+                                                    deadline=deadline)
+    best_tour, best_length = tour.copy(), length
+
+    done = 0
+    while done < trials and n > 7:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        done += 1
+        delta, touched = double_bridge(distances, tour, position, rng)
+        length = best_length + delta - improve(distances, tour, position, neighbors, touched, deadline=deadline)
+        if length <= best_length:
+            best_tour[:], best_length = tour, length
+        else:
+            tour[:] = best_tour
+            position[tour] = np.arange(n)
+        if progress is not None:
+            progress(done, trials, Trial=done, TotalSum=int(best_length))
+    return best_tour, best_length, done
+
+
+def solve(distances, iterations=100, seed=None, neighbors=8, time_limit=None, start='nearest', progress=None):
+    """Запуск для незамкнутого пути по матрице расстояний.
+
+    Возвращает запись в формате data/initial/lkh/*/solution_*.json.
+    """
+    started = time.perf_counter()
+    distances = as_matrix(distances)
+    n = len(distances)
+    augmented = with_dummy(distances)
+    tour = np.append(twoopt.initial_tour(distances, seed, start), n)
+    candidates = nearest_neighbors(distances, neighbors, dummy=True)
+    tour, _, _ = optimize(augmented, tour, candidates, iterations, time_limit, seed, progress)
+    path = cut_at_dummy(tour, n)
+    elapsed = (time.perf_counter() - started) * 1000
+    return make_record(ALGORITHM, distances, path, iterations, elapsed)
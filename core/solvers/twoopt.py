@@ -0,0 +1,145 @@
+"""Решатель 2-opt: векторная оценка ходов по спискам ближайших соседей и don't-look bits."""
+import time
+from collections import deque
+
+import numpy as np
+
+from core.solvers.common import as_matrix, cut_at_dummy, make_record, nearest_neighbors, tour_length, with_dummy
+
+ALGORITHM = 'TwoOpt'
+FOLDER = 'twoopt'
+
+
+def initial_tour(distances, seed=None, method='random'):
+    """Начальный обход: случайная перестановка или жадный ближайший сосед."""
+    n = len(distances)
+    rng = np.random.default_rng(seed)
+    if method == 'random':
+        return rng.permutation(n)
+    tour = np.empty(n, dtype=np.int64)
+    visited = np.zeros(n, dtype=bool)
+    tour[0] = rng.integers(n)
+    visited[tour[0]] = True
+    for i in range(1, n):
+        row = np.where(visited, np.inf, distances[tour[i - 1]])
+        tour[i] = int(np.argmin(row))
+        visited[tour[i]] = True
+    return tour
+
+
+def reverse_segment(tour, position, i, j):
+    """Разворот участка обхода с позиции i по j включительно (циклически).
+
+    Разворачивается более короткая из двух частей обхода.
+    """
+    n = len(tour)
+    length = (j - i) % n + 1
+    if 2 * length > n:
+        i, j = (j + 1) % n, (i - 1) % n
+        length = n - length
+    if length < 2:
+        return
+    index = (i + np.arange(length)) % n
+    tour[index] = tour[index[::-1]]
+    position[tour[index]] = index
+
+
+def best_move(distances, tour, position, a, c):
+    """Лучший 2-opt ход для вершины a по кандидатам c.
+
+    Для всех кандидатов сразу оцениваются оба варианта хода: через
+    последователей и через предшественников. Возвращает (выигрыш, участок для
+    разворота, затронутые вершины); выигрыш 0, если улучшения нет.
+    """
+    n = len(tour)
+    i = position[a]
+    succ_a, pred_a = tour[(i + 1) % n], tour[i - 1]
+    j = position[c]
+    succ_c, pred_c = tour[(j + 1) % n], tour[j - 1]
+
+    gain_succ = distances[a, succ_a] + distances[c, succ_c] - distances[a, c] - distances[succ_a, succ_c]
+    gain_pred = distances[pred_a, a] + distances[pred_c, c] - distances[a, c] - distances[pred_a, pred_c]
+    gain_succ[(c == succ_a) | (succ_c == a)] = 0
+    gain_pred[(c == pred_a) | (pred_c == a)] = 0
+
+    best_succ, best_pred = int(np.argmax(gain_succ)), int(np.argmax(gain_pred))
+    if max(gain_succ[best_succ], gain_pred[best_pred]) <= 0:
+        return 0, None, None
+    if gain_succ[best_succ] >= gain_pred[best_pred]:
+        k = best_succ
+        return gain_succ[k], ((i + 1) % n, j[k]), (a, succ_a, c[k], succ_c[k])
+    k = best_pred
+    return gain_pred[k], (j[k], (i - 1) % n), (a, pred_a, c[k], pred_c[k])
+
+
+def improve(distances, tour, neighbors, max_iterations, position=None, active=None, deadline=None, progress=None):
+    """Улучшение замкнутого обхода 2-opt ходами на месте.
+
+    Итерация - проход по очереди активных вершин (по умолчанию всех). Вершины
+    без улучшающего хода получают don't-look bit и возвращаются в очередь,
+    только когда меняется инцидентное им ребро. Поиск прекращается после
+    момента deadline (time.perf_counter), в том числе посреди прохода: обход
+    остаётся допустимым, так как ходы применяются целиком. После каждой
+    итерации вызывается progress(итерация, max_iterations, выигрыш).
+    Возвращает (число итераций, суммарный выигрыш).
+    """
+    n = len(tour)
+    if position is None:
+        position = np.empty(n, dtype=np.int64)
+        position[tour] = np.arange(n)
+    active = deque(tour.tolist() if active is None else active)
+    queued = np.zeros(n, dtype=bool)
+    queued[list(active)] = True
+
+    iteration = 0
+    total_gain = 0
+    while active and iteration < max_iterations:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        iteration += 1
+        for _ in range(len(active)):
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            a = active.popleft()
+            queued[a] = False
+            gain, segment, touched = best_move(distances, tour, position, a, neighbors[a])
+            if gain <= 0:
+                continue
+            reverse_segment(tour, position, *segment)
+            total_gain += gain
+            for city in touched:
+                if not queued[city]:
+                    queued[city] = True
+                    active.append(int(city))
+        if progress is not None:
+            progress(iteration, max_iterations, total_gain)
+    return iteration, total_gain
+
+
+def solve(distances, iterations=1000, seed=None, neighbors=10, time_limit=None, start='random', progress=None):
+    """Запуск 2-opt для незамкнутого пути по матрице расстояний.
+
+    time_limit - ограничение времени в секундах на улучшение. progress
+    получает номер итерации и текущую длину пути (см. core.jobs).
+    Возвращает запись в формате data/initial/twoopt/*/solution_*.json.
+    """
+    started = time.perf_counter()
+    distances = as_matrix(distances)
+    n = len(distances)
+    augmented = with_dummy(distances)
+    path = initial_tour(distances, seed, start)
+    tour = np.append(path, n)
+    # Фиктивная вершина на нулевом расстоянии попадает в списки соседей всех
+    # городов, поэтому ходы, меняющие концы пути, тоже рассматриваются
+    candidates = nearest_neighbors(distances, neighbors, dummy=True)
+    deadline = started + time_limit if time_limit else None
+    report = None
+    if progress is not None:
+        length = int(tour_length(augmented, tour))
+
+        def report(done, total, gain):
+            progress(done, total, Iteration=done, TotalSum=length - int(gain))
+    improve(augmented, tour, candidates, iterations, deadline=deadline, progress=report)
+    path = cut_at_dummy(tour, n)
+    elapsed = (time.perf_counter() - started) * 1000
+    return make_record(ALGORITHM, distances, path, iterations, elapsed)
@@ -0,0 +1,345 @@
+"""Статистическое сравнение конфигураций по повторным запускам.
+
+Бутстреп-интервалы, критерии Манна-Уитни и Уилкоксона и размеры эффекта
+считаются на NumPy без SciPy. Группы разного размера хранятся в матрице
+(группы x повторы), дополненной NaN, поэтому бутстреп и попарные сравнения
+выполняются сразу для всех групп пакетными операциями. Меньшее значение
+(дистанция, сумма) считается лучшим.
+"""
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core import shared
+from core.aggregates import GA_KEYS
+from core.ingest import store_generation
+from core.metrics import instrument
+
+RESAMPLES = 2000
+ALPHA = 0.05
+# Максимум элементов массива выборок бутстрепа в одном пакете
+CHUNK_ELEMENTS = 8_000_000
+
+_erfc = np.vectorize(math.erfc, otypes=[float])
+_lock = threading.Lock()
+_cache = {'generation': None, 'results': {}}
+
+
+def _two_sided_p(z):
+    """Двусторонний p-value нормального приближения."""
+    return _erfc(np.abs(z) / math.sqrt(2))
+
+
+def padded(groups):
+    """Матрица групп (группы x повторы), дополненная NaN, и размеры групп."""
+    groups = [np.asarray(group, dtype=np.float64) for group in groups]
+    counts = np.array([len(group) for group in groups], dtype=np.int64)
+    values = np.full((len(groups), counts.max(initial=0)), np.nan)
+    for row, group in enumerate(groups):
+        values[row, :len(group)] = group
+    return values, counts
+
+
+def frame_groups(df, keys, value):
+    """Матрица значений value по группам keys: (ключи групп, значения, размеры)."""
+    df = df[keys + [value]].dropna().sort_values(keys, kind='stable')
+    grouped = df.groupby(keys, observed=True, sort=False)
+    index = grouped.size()
+    counts = index.to_numpy()
+    values = np.full((len(counts), counts.max(initial=0)), np.nan)
+    values[np.repeat(np.arange(len(counts)), counts), grouped.cumcount().to_numpy()] = df[value].to_numpy(dtype=float)
+    return index.index, values, counts
+
+
+def _middle(counts, shape):
+    """Позиции двух средних элементов отсортированных строк размера counts."""
+    counts = counts.reshape(counts.shape + (1,) * (len(shape) - counts.ndim))
+    return np.broadcast_to((counts - 1) // 2, shape), np.broadcast_to(counts // 2, shape)
+
+
+def medians(values, counts):
+    """Медианы строк матрицы групп."""
+    ordered = np.sort(values, axis=1)
+    lower, upper = _middle(counts, (len(counts), 1))
+    return ((np.take_along_axis(ordered, lower, 1) + np.take_along_axis(ordered, upper, 1)) / 2)[:, 0]
+
+
+def bootstrap_samples(values, counts, resamples=RESAMPLES, statistic='median', rng=None):
+    """Бутстреп-распределение статистики для всех групп: массив (группы x resamples).
+
+    Выборки с возвращением составляются из номеров элементов. Для медианы
+    сортируются только номера (int16) относительно заранее отсортированных
+    значений: порядковые статистики выборки - это значения по отсортированным
+    номерам, поэтому сортировать сами значения в каждой выборке не нужно.
+    """
+    rng = np.random.default_rng(rng)
+    groups, width = values.shape
+    ordered = np.sort(values, axis=1)
+    flat = ordered.ravel()
+    result = np.empty((groups, resamples))
+    rows = max(1, CHUNK_ELEMENTS // max(1, resamples * width))
+    for start in range(0, groups, rows):
+        block_counts = counts[start:start + rows]
+        index = rng.random((len(block_counts), resamples, width), dtype=np.float32)
+        index = np.minimum(index * block_counts[:, None, None], block_counts[:, None, None] - 1)
+        index = index.astype(np.int16 if width < 2 ** 15 else np.int64)
+        offsets = (np.arange(start, start + len(block_counts)) * width)[:, None]
+        if statistic == 'mean':
+            valid = np.arange(width) < block_counts[:, None, None]
+            sample = np.where(valid, flat[index + offsets[:, :, None]], 0)
+            result[start:start + rows] = sample.sum(axis=2) / block_counts[:, None]
+            continue
+        # Лишние позиции строк короче width получают номер больше любого допустимого
+        if block_counts.min() < width:
+            index[np.broadcast_to(np.arange(width) >= block_counts[:, None, None], index.shape)] = width
+        index.sort(axis=2)
+        lower, upper = _middle(block_counts, (len(block_counts), resamples, 1))
+        lower = np.take_along_axis(index, lower, 2)[:, :, 0] + offsets
+        upper = np.take_along_axis(index, upper, 2)[:, :, 0] + offsets
+        result[start:start + rows] = (flat[lower] + flat[upper]) / 2
+    return result
+
+
+def bootstrap_ci(values, counts, resamples=RESAMPLES, alpha=ALPHA, statistic='median', rng=None):
+    """Точечная оценка и процентильный бутстреп-интервал для каждой группы: (оценка, нижняя, верхняя)."""
+    if statistic == 'mean':
+        point = np.nanmean(values, axis=1)
+    else:
+        point = medians(values, counts)
+    samples = bootstrap_samples(values, counts, resamples, statistic, rng)
+    low, high = np.quantile(samples, [alpha / 2, 1 - alpha / 2], axis=1)
+    return point, low, high
+
+
+def _tie_term(values, counts):
+    """Сумма t^3 - t по группам одинаковых значений каждой строки."""
+    terms = np.zeros(len(values))
+    for row, (row_values, count) in enumerate(zip(values, counts)):
+        _, ties = np.unique(row_values[:count], return_counts=True)
+        terms[row] = (ties.astype(float) ** 3 - ties).sum()
+    return terms
+
+
+def mann_whitney(x, x_counts, y, y_counts):
+    """Критерий Манна-Уитни для пар строк x и y (нормальное приближение с поправкой на связи).
+
+    Возвращает (U, p-value, A12), где U - число пар x < y плюс половина
+    равных, A12 = U / (n m) - вероятность того, что значение x лучше (меньше) y.
+    """
+    x_valid = np.arange(x.shape[1]) < x_counts[:, None]
+    y_valid = np.arange(y.shape[1]) < y_counts[:, None]
+    pairs = x_valid[:, :, None] & y_valid[:, None, :]
+    less = ((x[:, :, None] < y[:, None, :]) & pairs).sum(axis=(1, 2))
+    equal = ((x[:, :, None] == y[:, None, :]) & pairs).sum(axis=(1, 2))
+    u = less + 0.5 * equal
+
+    n, m = x_counts.astype(float), y_counts.astype(float)
+    total = n + m
+    combined = np.concatenate([np.where(x_valid, x, np.inf), np.where(y_valid, y, np.inf)], axis=1)
+    combined.sort(axis=1)
+    ties = _tie_term(combined, x_counts + y_counts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(n * m / 12 * ((total + 1) - ties / (total * (total - 1))))
+        mu = n * m / 2
+        z = (u - mu - 0.5 * np.sign(u - mu)) / sigma
+        p = np.where(sigma > 0, _two_sided_p(np.nan_to_num(z)), 1.0)
+        a12 = u / (n * m)
+    return u, p, a12
+
+
+def rankdata(values):
+    """Ранги со средним рангом для одинаковых значений."""
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    ends = np.cumsum(counts)
+    return (ends - (counts - 1) / 2)[inverse]
+
+
+def wilcoxon(x, y):
+    """Критерий знаковых рангов Уилкоксона для парных выборок: (W+, p-value)."""
+    difference = np.asarray(x, dtype=float) - np.asarray(y, dtype=float)
+    difference = difference[difference != 0]
+    n = len(difference)
+    if n == 0:
+        return 0.0, 1.0
+    ranks = rankdata(np.abs(difference))
+    w = ranks[difference > 0].sum()
+    _, ties = np.unique(np.abs(difference), return_counts=True)
+    mu = n * (n + 1) / 4
+    sigma = math.sqrt(n * (n + 1) * (2 * n + 1) / 24 - (ties.astype(float) ** 3 - ties).sum() / 48)
+    if sigma == 0:
+        return float(w), 1.0
+    z = (w - mu - 0.5 * np.sign(w - mu)) / sigma
+    return float(w), float(_two_sided_p(z))
+
+
+def hedges_g(x, y):
+    """Размер эффекта Хеджеса g (разность средних в единицах объединённого стандартного отклонения)."""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    n, m = len(x), len(y)
+    if n < 2 or m < 2:
+        return float('nan')
+    pooled = math.sqrt(((n - 1) * x.var(ddof=1) + (m - 1) * y.var(ddof=1)) / (n + m - 2))
+    if pooled == 0:
+        return 0.0
+    return (x.mean() - y.mean()) / pooled * (1 - 3 / (4 * (n + m) - 9))
+
+
+def holm(p):
+    """Поправка Холма-Бонферрони на множественные сравнения."""
+    p = np.asarray(p, dtype=float)
+    order = np.argsort(p)
+    adjusted = np.maximum.accumulate(p[order] * (len(p) - np.arange(len(p))))
+    result = np.empty_like(p)
+    result[order] = np.minimum(adjusted, 1.0)
+    return result
+
+
+def compare(x, y, resamples=RESAMPLES, alpha=ALPHA, seed=0):
+    """Сравнение двух конфигураций по повторным запускам.
+
+    Интервал для разности медиан (x - y) строится бутстрепом обеих выборок;
+    критерий Уилкоксона применяется, если число повторов одинаково
+    (повторы сопоставляются по номеру).
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    values, counts = padded([x, y])
+    rng = np.random.default_rng(seed)
+    samples = bootstrap_samples(values, counts, resamples, rng=rng)
+    difference = samples[0] - samples[1]
+    u, p, a12 = mann_whitney(values[:1], counts[:1], values[1:], counts[1:])
+    result = {
+        'n_x': len(x), 'n_y': len(y),
+        'median_x': float(np.median(x)), 'median_y': float(np.median(y)),
+        'median_difference': float(np.median(x) - np.median(y)),
+        'difference_low': float(np.quantile(difference, alpha / 2)),
+        'difference_high': float(np.quantile(difference, 1 - alpha / 2)),
+        'mann_whitney_u': float(u[0]), 'mann_whitney_p': float(p[0]),
+        'a12': float(a12[0]), 'cliffs_delta': float(2 * a12[0] - 1),
+        'hedges_g': float(hedges_g(x, y)),
+    }
+    if len(x) == len(y):
+        result['wilcoxon_w'], result['wilcoxon_p'] = wilcoxon(x, y)
+    return result
+
+
+def rank_configurations(df, keys, value, by=None, resamples=RESAMPLES, alpha=ALPHA, seed=0):
+    """Ранжирование конфигураций keys по медиане value в каждой группе by.
+
+    Для каждой конфигурации - бутстреп-интервал медианы и сравнение с лучшей
+    конфигурацией группы: p-value Манна-Уитни с поправкой Холма, A12 и дельта
+    Клиффа (положительная - конфигурация лучше лучшей, отрицательная - хуже).
+    Конфигурации, не отличимые от лучшей на уровне alpha, отмечены в best_tied.
+    """
+    rng = np.random.default_rng(seed)
+    levels = [(None, df)] if by is None else list(df.groupby(by, observed=True))
+    frames = []
+    for level, part in levels:
+        index, values, counts = frame_groups(part, keys, value)
+        if not len(counts):
+            continue
+        median, low, high = bootstrap_ci(values, counts, resamples, alpha, rng=rng)
+        best = int(np.argmin(median))
+        reference = np.broadcast_to(values[best], values.shape)
+        reference_counts = np.full_like(counts, counts[best])
+        _, p, a12 = mann_whitney(values, counts, reference, reference_counts)
+        p[best] = 1.0
+        others = np.arange(len(p)) != best
+        adjusted = np.ones_like(p)
+        adjusted[others] = holm(p[others])
+        result = index.to_frame(index=False)
+        if by is not None:
+            result.insert(0, by, level)
+        result['n'] = counts
+        result['median'] = median
+        result['ci_low'] = low
+        result['ci_high'] = high
+        result['rank'] = pd.Series(median).rank(method='min').astype(int).to_numpy()
+        result['p_vs_best'] = p
+        result['p_holm'] = adjusted
+        result['a12_vs_best'] = a12
+        result['cliffs_delta'] = 2 * a12 - 1
+        result['best_tied'] = adjusted >= alpha
+        frames.append(result.sort_values('rank', kind='stable'))
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+
+def comparison_frame(result, first, second, alpha=ALPHA):
+    """Таблица результата compare() с подписями для страниц."""
+    rows = {
+        'Повторов': (result['n_x'], result['n_y']),
+        'Медиана': (result['median_x'], result['median_y']),
+    }
+    table = pd.DataFrame(rows, index=[first, second]).T
+    summary = {
+        f'Разность медиан ({first} - {second})': result['median_difference'],
+        f'{1 - alpha:.0%} интервал разности медиан': f"[{result['difference_low']:g}; {result['difference_high']:g}]",
+        'Манн-Уитни: p-value': result['mann_whitney_p'],
+        'Уилкоксон (по номеру повтора): p-value': result.get('wilcoxon_p', 'разное число повторов'),
+        f'A12 (вероятность, что {first} лучше)': result['a12'],
+        'Дельта Клиффа': result['cliffs_delta'],
+        'g Хеджеса': result['hedges_g'],
+    }
+    return table, pd.DataFrame({'Значение': [str(value) if isinstance(value, str) else f'{value:.4g}'
+                                             for value in summary.values()]}, index=list(summary))
+
+
+def _cached(key, build):
+    """Результат, пересчитываемый только при изменении поколения хранилища."""
+    generation = store_generation()
+    with _lock:
+        if _cache['generation'] != generation:
+            _cache.update(generation=generation, results={})
+        if key in _cache['results']:
+            return _cache['results'][key]
+    result = build()
+    with _lock:
+        if _cache['generation'] == generation:
+            _cache['results'][key] = result
+    return result
+
+
+@instrument('stats.ga_ranking')
+def ga_ranking(iterations=None, resamples=RESAMPLES, alpha=ALPHA):
+    """Ранжирование всех комбинаций ГА по Distance повторных запусков для каждого числа поколений."""
+    def build():
+        df = shared.frame('ga', GA_KEYS + ['Distance'], iterations=iterations)
+        if df is None or df.empty:
+            return None
+        return rank_configurations(df, GA_KEYS[:3], 'Distance', by='iterations', resamples=resamples, alpha=alpha)
+
+    return _cached(('ga_ranking', iterations, resamples, alpha), build)
+
+
+@instrument('stats.ga_compare')
+def ga_compare(first, second, iterations, resamples=RESAMPLES, alpha=ALPHA):
+    """Сравнение Distance двух комбинаций ГА (метод выбора, мутация, кроссовер)."""
+    samples = []
+    for selection, mutation, crossover in (first, second):
+        df = shared.frame('ga', ['Distance'], selection=selection, mutation=mutation, crossover=crossover,
+                          iterations=iterations)
+        if df is None or df.empty:
+            return None
+        samples.append(df['Distance'].to_numpy())
+    return compare(*samples, resamples=resamples, alpha=alpha)
+
+
+@instrument('stats.tsp_compare')
+def tsp_compare(first, second, iterations, resamples=RESAMPLES, alpha=ALPHA):
+    """Сравнение TotalSum двух алгоритмов (twoopt, lkh) при одинаковом числе итераций."""
+    samples = []
+    for algorithm in (first, second):
+        df = shared.frame('tsp', ['TotalSum'], sort_by='repeat', algorithm=algorithm, iterations=iterations)
+        if df is None or df.empty:
+            return None
+        samples.append(df['TotalSum'].to_numpy())
+    return compare(*samples, resamples=resamples, alpha=alpha)
+
+
+def clear_cache():
+    """Сброс сохранённых ранжирований."""
+    with _lock:
+        _cache.update(generation=None, results={})
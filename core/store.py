@@ -0,0 +1,192 @@
+"""Колоночное хранилище запусков: data/initial в виде единого Parquet набора."""
+import os
+import re
+import shutil
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from core.metrics import instrument
+
+INITIAL_DIR = 'data/initial'
+STORE_DIR = 'data/store'
+
+# Папки алгоритмов TwoOpt и LKH, всё остальное в data/initial - методы выбора ГА
+TSP_ALGORITHMS = ['twoopt', 'lkh']
+
+GA_SCHEMA = pa.schema([
+    ('crossover', pa.string()),
+    ('iterations', pa.int32()),
+    ('MinPopulation', pa.int32()),
+    ('MaxPopulation', pa.int32()),
+    ('TimeInSec', pa.float64()),
+    ('Fitness', pa.float64()),
+    ('Distance', pa.int64()),
+    ('source', pa.string()),
+])
+
+TSP_SCHEMA = pa.schema([
+    ('repeat', pa.int32()),
+    ('Algorithm', pa.string()),
+    ('TotalSum', pa.int64()),
+    ('ElapsedMilliseconds', pa.int64()),
+    ('Iterations', pa.int32()),
+    ('Costs', pa.list_(pa.int64())),
+    ('Solution', pa.list_(pa.int32())),
+    ('source', pa.string()),
+])
+
+# Имя файла ГА: {Selection}{Mutation}{Crossover}{timestamp}.json
+_GA_FILE = re.compile(r'Mutation(?P<crossover>[A-Za-z]+?Crossover)\d+\.json$')
+
+
+def ga_rows(data, source):
+    """Разворачивание NumericalIndicators одного файла ГА в строки таблицы."""
+    crossover = data.get('Crossover') or _GA_FILE.search(source).group('crossover')
+    return [{
+        'crossover': crossover,
+        'iterations': indicator.get('GenerationCount'),
+        'MinPopulation': indicator.get('MinPopulation'),
+        'MaxPopulation': indicator.get('MaxPopulation'),
+        'TimeInSec': indicator.get('TimeInSec'),
+        'Fitness': indicator.get('Fintess'),
+        'Distance': indicator.get('Distance'),
+        'source': source,
+    } for indicator in data.get('NumericalIndicators', [])]
+
+
+def tsp_row(data, source):
+    """Преобразование одного запуска TwoOpt/LKH в строку таблицы."""
+    return {
+        'Algorithm': data.get('Algorithm'),
+        'TotalSum': data.get('TotalSum'),
+        'ElapsedMilliseconds': data.get('ElapsedMilliseconds'),
+        'Iterations': data.get('Iterations'),
+        'Costs': data.get('Costs'),
+        'Solution': data.get('Solution'),
+        'source': source,
+    }
+
+
+def partition_kind(top):
+    """Вид данных по папке верхнего уровня data/initial."""
+    return 'tsp' if top in TSP_ALGORITHMS else 'ga'
+
+
+def partition_path(kind, key1, key2, store_dir=STORE_DIR):
+    """Путь к файлу партиции в hive-разметке."""
+    if kind == 'ga':
+        return os.path.join(store_dir, 'ga', f'selection={key1}', f'mutation={key2}', 'part-0.parquet')
+    return os.path.join(store_dir, 'tsp', f'algorithm={key1}', f'iterations={key2}', 'part-0.parquet')
+
+
+def build_partition(kind, items):
+    """Сборка таблицы партиции из пар (источник, данные файла)."""
+    if kind == 'ga':
+        rows = []
+        for source, data in items:
+            rows.extend(ga_rows(data, source))
+        return pa.Table.from_pylist(rows, schema=GA_SCHEMA)
+    rows = [tsp_row(data, source) for source, data in items]
+    return pa.Table.from_pylist(rows, schema=TSP_SCHEMA)
+
+
+def merge_partition(kind, table, new_table, removed_sources):
+    """Замена строк изменённых и удалённых файлов в существующей партиции."""
+    if table is not None and removed_sources:
+        keep = pc.invert(pc.is_in(table['source'], value_set=pa.array(sorted(removed_sources), pa.string())))
+        table = table.filter(keep)
+    tables = [t for t in (table, new_table) if t is not None and t.num_rows]
+    if not tables:
+        return None
+    table = pa.concat_tables(tables).sort_by('source')
+    if kind == 'tsp':
+        # Номер повтора - порядковый номер файла в партиции
+        repeat = pa.array(range(1, table.num_rows + 1), pa.int32())
+        table = table.set_column(table.schema.get_field_index('repeat'), 'repeat', repeat)
+    return table
+
+
+def read_partition(kind, key1, key2, store_dir=STORE_DIR):
+    """Чтение одной партиции целиком, None если её нет."""
+    path = partition_path(kind, key1, key2, store_dir)
+    if not os.path.exists(path):
+        return None
+    schema = GA_SCHEMA if kind == 'ga' else TSP_SCHEMA
+    return pq.read_table(path, schema=schema)
+
+
+def write_partition(kind, key1, key2, table, store_dir=STORE_DIR):
+    """Атомарная запись партиции на диск, пустая партиция удаляется."""
+    path = partition_path(kind, key1, key2, store_dir)
+    if table is None:
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+
+
+def ensure_store(store_dir=STORE_DIR):
+    """Актуализация хранилища инкрементальной загрузкой изменённых файлов."""
+    from core.ingest import refresh
+    refresh(store_dir=store_dir)
+
+
+def dataset(kind, store_dir=STORE_DIR):
+    """Набор данных pyarrow для ГА ('ga') или TwoOpt/LKH ('tsp')."""
+    ensure_store(store_dir)
+    path = os.path.join(store_dir, kind)
+    if not os.path.isdir(path):
+        return None
+    return ds.dataset(path, format='parquet', partitioning='hive')
+
+
+@instrument('store.read_table')
+def read_table(kind, columns=None, filter=None, store_dir=STORE_DIR):
+    """Чтение таблицы с проекцией столбцов и фильтрацией на уровне партиций."""
+    data = dataset(kind, store_dir)
+    if data is None:
+        return None
+    return data.to_table(columns=columns, filter=filter)
+
+
+def scan(kind, columns=None, batch_size=65536, store_dir=STORE_DIR, **conditions):
+    """Пакеты строк (RecordBatch) с фильтром по равенствам, без чтения всей таблицы."""
+    data = dataset(kind, store_dir)
+    if data is None:
+        return iter(())
+    return data.to_batches(columns=columns, filter=make_filter(**conditions), batch_size=batch_size)
+
+
+def read_ga(selection=None, mutation=None, crossover=None, iterations=None, columns=None):
+    """Чтение строк NumericalIndicators ГА в DataFrame."""
+    filter = make_filter(selection=selection, mutation=mutation, crossover=crossover, iterations=iterations)
+    table = read_table('ga', columns=columns, filter=filter)
+    return table.to_pandas() if table is not None else None
+
+
+def read_tsp(algorithm=None, iterations=None, columns=None):
+    """Чтение запусков TwoOpt/LKH в DataFrame, упорядоченных по номеру повтора."""
+    filter = make_filter(algorithm=algorithm, iterations=iterations)
+    table = read_table('tsp', columns=columns, filter=filter)
+    if table is None:
+        return None
+    if 'repeat' in table.column_names:
+        table = table.sort_by('repeat')
+    return table.to_pandas()
+
+
+def make_filter(**conditions):
+    """Построение выражения фильтра из равенств, значения None пропускаются."""
+    expression = None
+    for name, value in conditions.items():
+        if value is None:
+            continue
+        condition = ds.field(name) == value
+        expression = condition if expression is None else expression & condition
+    return expression
+
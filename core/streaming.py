@@ -0,0 +1,120 @@
+"""Потоковое чтение длинных рядов и текущие агрегаты в ограниченной памяти.
+
+Массив из JSON файла запуска (например, Costs) читается блоками байт без
+разбора всего файла, строки хранилища - пакетами Parquet. По блокам значений
+считаются текущий лучший результат и скользящее среднее; для графика
+хранится не больше max_points точек - при переполнении шаг прореживания
+удваивается.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from core import store
+
+CHUNK_BYTES = 1 << 20
+BATCH_ROWS = 65536
+ROLLING_WINDOW = 100
+MAX_POINTS = 2000
+
+
+def _seek_array(f, key, chunk_bytes):
+    """Позиционирование потока после '[' массива "key". Возвращает остаток прочитанного блока."""
+    pattern = re.compile(rb'"' + re.escape(key.encode()) + rb'"\s*:\s*\[')
+    buffer = b''
+    while True:
+        block = f.read(chunk_bytes)
+        if not block:
+            raise KeyError(key)
+        buffer += block
+        match = pattern.search(buffer)
+        if match:
+            return buffer[match.end():]
+        # Ключ может оказаться на границе блоков
+        buffer = buffer[-(len(key) + 64):]
+
+
+def iter_number_chunks(path, key, chunk_bytes=CHUNK_BYTES):
+    """Блоки числового массива "key" из JSON файла в виде массивов NumPy."""
+    with open(path, 'rb') as f:
+        buffer = _seek_array(f, key, chunk_bytes)
+        while True:
+            end = buffer.find(b']')
+            if end >= 0:
+                text, done = buffer[:end], True
+            else:
+                block = f.read(chunk_bytes)
+                if not block:
+                    raise ValueError(f'{path}: массив "{key}" не закрыт')
+                # Последнее число блока может продолжаться в следующем
+                cut = buffer.rfind(b',')
+                text, buffer, done = buffer[:max(cut, 0)], buffer[max(cut + 1, 0):] + block, False
+            values = np.array(text.replace(b',', b' ').split(), dtype=np.float64)
+            if len(values):
+                yield values
+            if done:
+                return
+
+
+def scan_column(kind, column, batch_rows=BATCH_ROWS, **conditions):
+    """Блоки значений столбца хранилища, прочитанные пакетами Parquet."""
+    for batch in store.scan(kind, [column], batch_rows, **conditions):
+        if batch.num_rows:
+            yield batch.column(0).to_numpy(zero_copy_only=False).astype(np.float64)
+
+
+def new_state(window=ROLLING_WINDOW, max_points=MAX_POINTS):
+    """Состояние текущих агрегатов."""
+    return {
+        'count': 0, 'best': np.inf, 'tail': np.empty(0), 'window': window, 'max_points': max_points, 'stride': 1,
+        'points': {'Index': np.empty(0, dtype=np.int64), 'Value': np.empty(0), 'Best': np.empty(0), 'Mean': np.empty(0)},
+    }
+
+
+def update(state, values):
+    """Добавление блока значений: текущий минимум, скользящее среднее, прореженные точки."""
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return state
+    index = state['count'] + np.arange(len(values))
+    best = np.minimum.accumulate(np.concatenate([[state['best']], values]))[1:]
+
+    window = state['window']
+    extended = np.concatenate([state['tail'], values])
+    sums = np.concatenate([[0.0], np.cumsum(extended)])
+    end = len(state['tail']) + np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    mean = (sums[end] - sums[start]) / (end - start)
+
+    keep = (index + 1) % state['stride'] == 0
+    points = state['points']
+    for name, column in (('Index', index), ('Value', values), ('Best', best), ('Mean', mean)):
+        points[name] = np.concatenate([points[name], column[keep]])
+    while len(points['Index']) > state['max_points']:
+        state['stride'] *= 2
+        thinned = (points['Index'] + 1) % state['stride'] == 0
+        for name in points:
+            points[name] = points[name][thinned]
+
+    state['count'] += len(values)
+    state['best'] = best[-1]
+    state['tail'] = extended[-(window - 1):] if window > 1 else np.empty(0)
+    state['last'] = (index[-1], values[-1], best[-1], mean[-1])
+    return state
+
+
+def frame(state):
+    """Точки графика по состоянию, последняя точка ряда добавляется всегда."""
+    points = dict(state['points'])
+    if state['count'] and (not len(points['Index']) or points['Index'][-1] != state['last'][0]):
+        for name, value in zip(('Index', 'Value', 'Best', 'Mean'), state['last']):
+            points[name] = np.append(points[name], value)
+    return pd.DataFrame(points)
+
+
+def running_aggregates(chunks, window=ROLLING_WINDOW, max_points=MAX_POINTS):
+    """Генератор таблиц точек графика после каждого блока значений."""
+    state = new_state(window, max_points)
+    for values in chunks:
+        yield frame(update(state, values))
@@ -0,0 +1,284 @@
+"""Проверка сохранённых маршрутов и сравнение их наборов рёбер.
+
+Маршруты всех запусков обрабатываются пакетно: столбцы списков Arrow
+(Solution, Costs) разворачиваются в плоские массивы с границами маршрутов,
+и проверки выполняются одной векторной операцией на все маршруты.
+Ребро (a, b) неориентированное и кодируется числом min << 32 | max, поэтому
+набор рёбер маршрута - это массив int64, а общие рёбра ищутся по
+совпадению кодов. Для попарного сравнения многих маршрутов строится матрица
+инцидентности (маршруты x рёбра) блоками столбцов, и число общих рёбер всех
+пар получается одним матричным умножением.
+
+Пример:
+    python -m core.tours --instance random-100-0
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Столбцов матрицы инцидентности в одном блоке
+BLOCK_EDGES = 4096
+
+TOUR_COLUMNS = ['algorithm', 'iterations', 'repeat', 'source', 'Solution', 'Costs', 'TotalSum']
+PROBLEMS = {
+    'empty': 'нет маршрута',
+    'not_permutation': 'не перестановка городов',
+    'costs_length': 'число стоимостей не равно числу рёбер',
+    'costs_sum': 'сумма Costs не равна TotalSum',
+    'instance_costs': 'Costs не совпадают с экземпляром',
+    'instance_sum': 'TotalSum не совпадает с экземпляром',
+}
+
+
+def flatten(lists):
+    """Плоские значения столбца списков и границы списков: (values, offsets)."""
+    if isinstance(lists, pa.ChunkedArray):
+        lists = lists.combine_chunks()
+    if not isinstance(lists, pa.Array):
+        lists = pa.array([list(map(int, item)) if item is not None else None for item in lists],
+                         type=pa.list_(pa.int64()))
+    lengths = pc.fill_null(pc.list_value_length(lists), 0).to_numpy(zero_copy_only=False).astype(np.int64)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    values = lists.flatten().to_numpy(zero_copy_only=False).astype(np.int64)
+    return values, offsets
+
+
+def _segment_sums(values, offsets):
+    """Суммы значений по спискам (пустые списки дают 0)."""
+    sums = np.zeros(len(offsets) - 1, dtype=values.dtype if len(values) else np.int64)
+    lengths = np.diff(offsets)
+    nonempty = lengths > 0
+    if len(values):
+        sums[nonempty] = np.add.reduceat(values, offsets[:-1][nonempty])
+    return sums
+
+
+def check_permutations(values, offsets):
+    """Маска маршрутов, являющихся перестановкой 0..n-1 (n - длина маршрута)."""
+    lengths = np.diff(offsets)
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    valid = lengths > 0
+    bad = (values < 0) | (values >= lengths[owner])
+    # Повторы ищутся по ключу (номер маршрута, город) после сортировки
+    keys = owner * (lengths.max(initial=0) + 1) + np.clip(values, 0, None)
+    order = np.argsort(keys, kind='stable')
+    duplicate = np.zeros(len(values), dtype=bool)
+    duplicate[order[1:]] = np.diff(keys[order]) == 0
+    valid[np.unique(owner[bad | duplicate])] = False
+    return valid
+
+
+def path_edges(values, offsets, closed=False):
+    """Рёбра всех маршрутов: (номер маршрута, город a, город b) в порядке обхода."""
+    lengths = np.diff(offsets)
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    following = np.empty_like(values)
+    following[:-1] = values[1:]
+    last = offsets[1:][lengths > 0] - 1
+    if closed:
+        following[last] = values[offsets[:-1][lengths > 0]]
+        keep = np.ones(len(values), dtype=bool)
+        keep[last[lengths[lengths > 0] < 2]] = False
+    else:
+        keep = np.ones(len(values), dtype=bool)
+        keep[last] = False
+    return owner[keep], values[keep], following[keep]
+
+
+def edge_codes(a, b):
+    """Коды неориентированных рёбер: min(a, b) << 32 | max(a, b)."""
+    a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+    return (np.minimum(a, b) << 32) | np.maximum(a, b)
+
+
+def decode_edges(codes):
+    """Города рёбер по кодам: (a, b), a < b."""
+    codes = np.asarray(codes, dtype=np.int64)
+    return codes >> 32, codes & 0xFFFFFFFF
+
+
+def edge_set(path, closed=False):
+    """Отсортированный набор кодов рёбер одного маршрута."""
+    path = np.asarray(path, dtype=np.int64)
+    following = np.roll(path, -1) if closed else path[1:]
+    return np.unique(edge_codes(path[:len(following)], following))
+
+
+def verify(solutions, costs=None, totals=None, instance=None):
+    """Проверка маршрутов пакетом.
+
+    solutions, costs - столбцы списков (Arrow или последовательности), totals -
+    TotalSum. С instance (см. core.instances) стоимости рёбер маршрутов той же
+    размерности пересчитываются по экземпляру. Возвращает DataFrame с флагами
+    проверок и списком проблем каждого маршрута.
+    """
+    values, offsets = flatten(solutions)
+    lengths = np.diff(offsets)
+    count = len(lengths)
+    result = pd.DataFrame({'cities': lengths})
+    flags = {'empty': lengths == 0}
+    flags['not_permutation'] = ~check_permutations(values, offsets) & ~flags['empty']
+    if costs is not None:
+        cost_values, cost_offsets = flatten(costs)
+        cost_lengths = np.diff(cost_offsets)
+        flags['costs_length'] = (cost_lengths != np.maximum(lengths - 1, 0)) & ~flags['empty']
+        cost_sums = _segment_sums(cost_values, cost_offsets)
+        result['costs_total'] = cost_sums
+        if totals is not None:
+            totals = np.asarray(pd.Series(totals).fillna(-1), dtype=np.int64)
+            flags['costs_sum'] = cost_sums != totals
+    if instance is not None:
+        result['instance_total'] = pd.array([None] * count, dtype='Int64')
+        # Пересчёт только для корректных перестановок размерности экземпляра
+        usable = (lengths == instance['dimension']) & ~flags['not_permutation'] & ~flags['empty']
+        if usable.any():
+            from core import instances
+
+            selected = np.repeat(usable, lengths)
+            sub_offsets = np.zeros(usable.sum() + 1, dtype=np.int64)
+            np.cumsum(lengths[usable], out=sub_offsets[1:])
+            owner, a, b = path_edges(values[selected], sub_offsets)
+            recomputed = _edge_costs(instances, instance, a, b)
+            sums = np.bincount(owner, weights=recomputed, minlength=usable.sum()).astype(np.int64)
+            result.loc[usable, 'instance_total'] = sums
+            if totals is not None:
+                flags['instance_sum'] = np.zeros(count, dtype=bool)
+                flags['instance_sum'][usable] = sums != totals[usable]
+            if costs is not None:
+                aligned = usable & ~flags['costs_length']
+                mismatch = np.zeros(count, dtype=bool)
+                if aligned.any():
+                    stored = cost_values[np.repeat(aligned, cost_lengths)]
+                    edge_aligned = np.repeat(aligned[usable], lengths[usable] - 1)
+                    differs = stored != recomputed[edge_aligned]
+                    bad_owner = owner[edge_aligned][differs]
+                    mismatch[np.flatnonzero(usable)[np.unique(bad_owner)]] = True
+                flags['instance_costs'] = mismatch
+    for name, flag in flags.items():
+        result[name] = flag
+    problems = np.array([''] * count, dtype=object)
+    for name, flag in flags.items():
+        problems[flag] = [f'{text}; {PROBLEMS[name]}' if text else PROBLEMS[name] for text in problems[flag]]
+    result['valid'] = ~np.logical_or.reduce(list(flags.values()))
+    result['problems'] = problems
+    return result
+
+
+def _edge_costs(instances, instance, a, b):
+    """Стоимости рёбер (a, b) экземпляра пакетом."""
+    if instance.get('metric_coordinates'):
+        coordinates = instance['coordinates']
+        return instances.pair_distances(instance['edge_weight_type'], np.asarray(coordinates[a]),
+                                        np.asarray(coordinates[b])).astype(np.int64)
+    return np.asarray(instance['distances'][a, b])
+
+
+def incidence_blocks(values, offsets, closed=False, block_edges=BLOCK_EDGES):
+    """Блоки матрицы инцидентности (маршруты x рёбра, float32) и коды рёбер блока."""
+    owner, a, b = path_edges(values, offsets, closed)
+    codes, inverse = np.unique(edge_codes(a, b), return_inverse=True)
+    count = len(offsets) - 1
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.searchsorted(inverse[order], np.arange(0, len(codes) + block_edges, block_edges))
+    for block, start in enumerate(range(0, len(codes), block_edges)):
+        rows = order[bounds[block]:bounds[block + 1]]
+        matrix = np.zeros((count, min(block_edges, len(codes) - start)), dtype=np.float32)
+        matrix[owner[rows], inverse[rows] - start] = 1
+        yield codes[start:start + block_edges], matrix
+
+
+def overlap_matrix(solutions, closed=False):
+    """Число общих рёбер для всех пар маршрутов (матрица маршруты x маршруты)."""
+    values, offsets = flatten(solutions)
+    count = len(offsets) - 1
+    shared = np.zeros((count, count), dtype=np.float64)
+    for _, matrix in incidence_blocks(values, offsets, closed):
+        shared += matrix @ matrix.T
+    return np.rint(shared).astype(np.int64)
+
+
+def backbone(solutions, share=1.0, closed=False):
+    """Рёбра, входящие не меньше чем в долю share маршрутов: DataFrame (a, b, count, share)."""
+    values, offsets = flatten(solutions)
+    count = len(offsets) - 1
+    codes, frequencies = [], []
+    for block_codes, matrix in incidence_blocks(values, offsets, closed):
+        totals = matrix.sum(axis=0)
+        keep = totals >= share * count - 1e-9
+        codes.append(block_codes[keep])
+        frequencies.append(totals[keep])
+    codes = np.concatenate(codes) if codes else np.empty(0, dtype=np.int64)
+    frequencies = np.concatenate(frequencies).astype(np.int64) if frequencies else np.empty(0, dtype=np.int64)
+    a, b = decode_edges(codes)
+    df = pd.DataFrame({'a': a, 'b': b, 'count': frequencies, 'share': frequencies / max(count, 1)})
+    return df.sort_values(['count', 'a', 'b'], ascending=[False, True, True], ignore_index=True)
+
+
+def diff(first, second, closed=False):
+    """Сравнение двух маршрутов: общие рёбра и рёбра только первого или только второго."""
+    first_edges, second_edges = edge_set(first, closed), edge_set(second, closed)
+    shared = np.intersect1d(first_edges, second_edges, assume_unique=True)
+    union = len(first_edges) + len(second_edges) - len(shared)
+    return {
+        'edges_first': len(first_edges),
+        'edges_second': len(second_edges),
+        'shared': len(shared),
+        'jaccard': len(shared) / union if union else 1.0,
+        'shared_edges': np.column_stack(decode_edges(shared)),
+        'only_first': np.column_stack(decode_edges(np.setdiff1d(first_edges, second_edges, assume_unique=True))),
+        'only_second': np.column_stack(decode_edges(np.setdiff1d(second_edges, first_edges, assume_unique=True))),
+    }
+
+
+def stored_tours(algorithm=None, iterations=None):
+    """Маршруты запусков TwoOpt/LKH из общего слоя данных (таблица Arrow)."""
+    from core import shared
+
+    return shared.table('tsp', TOUR_COLUMNS, algorithm=algorithm, iterations=iterations)
+
+
+def verify_stored(algorithm=None, iterations=None, instance=None):
+    """Проверка сохранённых запусков: DataFrame с ключами запусков и результатами verify()."""
+    table = stored_tours(algorithm, iterations)
+    if table is None or table.num_rows == 0:
+        return None
+    result = verify(table['Solution'], table['Costs'], table['TotalSum'].to_numpy(zero_copy_only=False),
+                    instance)
+    keys = table.select(['algorithm', 'iterations', 'repeat', 'source']).to_pandas()
+    keys['algorithm'] = keys['algorithm'].astype(str)
+    return pd.concat([keys, result], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Проверка сохранённых маршрутов TwoOpt и LKH.')
+    parser.add_argument('--algorithm', default=None, help='twoopt или lkh')
+    parser.add_argument('--iterations', type=int, default=None)
+    parser.add_argument('--instance', default=None, help='имя экземпляра из data/instances для пересчёта сумм')
+    args = parser.parse_args()
+
+    instance = None
+    if args.instance:
+        from core import instances
+
+        instance = instances.load(args.instance)
+        if instance is None:
+            parser.error(f'экземпляр {args.instance} не найден')
+    result = verify_stored(args.algorithm, args.iterations, instance)
+    if result is None:
+        print('Запусков не найдено.')
+        return
+    broken = result[~result['valid']]
+    for row in broken.itertuples():
+        print(f'{row.source}: {row.problems}')
+    print(f'Проверено маршрутов: {len(result)}, с ошибками: {len(broken)}')
+    if len(broken):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
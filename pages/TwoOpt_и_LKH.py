@@ -1,9 +1,20 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import json
-import os
 import datetime
+import os
+from core.lazy import lazy_import, select_section, warm_up
+from core.metrics import instrument, run_page
+from core.charts import line_chart, live_chart, select_backend, tour_map
+from core import jobs
+from core.job_panel import display_jobs, session_owner, show_job
+
+# Тяжёлые модули загружаются при первом обращении из открытого раздела
+pd = lazy_import('pandas')
+query = lazy_import('core.query')
+streaming = lazy_import('core.streaming')
+common = lazy_import('core.solvers.common')
+stats = lazy_import('core.stats')
+instances = lazy_import('core.instances')
+tours = lazy_import('core.tours')
 
 st.set_page_config(
     page_title="TwoOpt и LKH",
@@ -12,31 +23,27 @@ st.set_page_config(
 
 algorithms = ["TwoOpt", "Lkh"]
 iterations = [10, 100, 1000]
+# Столбцы таблицы повторов в разделе «Исходные данные»
+INITIAL_COLUMNS = ['repeat', 'source', 'TotalSum', 'ElapsedMilliseconds', 'Iterations']
+solvers = {
+    "TwoOpt": lazy_import('core.solvers.twoopt'),
+    "Lkh": lazy_import('core.solvers.lk'),
+}
 
-def load_data(filename):
-    """Загрузка данных из JSON файла."""
-    try:
-        with open(filename) as f:
-            data = json.load(f)
-        if not data:
-            st.write("Нет данных для отображения.")
-            return None
-        return data
-    except FileNotFoundError:
-        st.write("Файл не найден.")
-        return None
+@instrument()
+def load_best(algorithm, iterations):
+    """Лучший запуск из сервиса запросов (исходные запуски, при их отсутствии - data/best)."""
+    return query.best_record('tsp', algorithm=algorithm, iterations=iterations)
+
+@instrument()
+def load_initial_data(algorithm, iterations, columns=None):
+    """Загрузка исходных данных из общего для всех сессий слоя данных (DataFrame не изменяется)."""
+    return query.runs('tsp', columns, sort_by='repeat', algorithm=algorithm, iterations=iterations)
 
-def load_initial_data(algorithm, iterations):
-    """Загрузка исходных данных из папки."""
-    folder_path = f'data/initial/{algorithm}/{iterations}'
-    data_list = []
-    for filename in os.listdir(folder_path):
-        if filename.endswith('.json'):
-            file_path = os.path.join(folder_path, filename)
-            data = load_data(file_path)
-            if data:
-                data_list.append(data)
-    return data_list
+@instrument()
+def load_run(algorithm, iterations, repeat, columns):
+    """Столбцы одного повтора (Solution, Costs) без загрузки остальных повторов."""
+    return query.run('tsp', repeat, columns, algorithm=algorithm, iterations=iterations)
 
 def display_algorithm_data(selected_algorithm, algorithm_data):
     """Отображение информации об алгоритме."""
@@ -45,15 +52,18 @@ def display_algorithm_data(selected_algorithm, algorithm_data):
     solution_result = '-'.join(map(str, solution))
     elapsed_milliseconds = algorithm_data['ElapsedMilliseconds']
     # Преобразование миллисекунд в удобочитаемую строку
-    elapsed_time = str(datetime.timedelta(milliseconds=elapsed_milliseconds))
+    elapsed_time = str(datetime.timedelta(milliseconds=int(elapsed_milliseconds)))
     
     st.subheader("Данные")
     st.write(f"Решение: {solution_result}")
     st.write(f"Сумма: {total_sum}")
     st.write(f"Затраченное время: {elapsed_time}")
 
-def plot_costs(selected_algorithm, costs, repeat=None):
+@instrument()
+def plot_costs(selected_algorithm, costs, repeat=None, iterations_count=None):
     """Построение графика для Costs."""
+    if iterations_count is None:
+        iterations_count = selected_iterations
     df = pd.DataFrame({
         'Index': range(len(costs)),
         'Costs': costs
@@ -61,32 +71,55 @@ def plot_costs(selected_algorithm, costs, repeat=None):
 
     st.subheader("График Costs по индексам")
     
-    # Установка стиля графика
-    plt.style.use('ggplot')  # Используем стандартный стиль ggplot
-    
-    fig, ax = plt.subplots(figsize=(12, 5))  # Уменьшаем ширину графика
-    ax.plot(df['Index'], df['Costs'], marker='o', color='royalblue', label='Costs', markersize=6, linewidth=2)
-    
-    # Настройка меток осей и заголовка
-    ax.set_xlabel('Индекс', fontsize=14)
-    ax.set_ylabel('Costs', fontsize=14)
     if repeat:
-        ax.set_title(f'График Costs для {selected_algorithm}, {selected_iterations} итераций, {repeat} повторение', fontsize=16)
+        title = f'График Costs для {selected_algorithm}, {iterations_count} итераций, {repeat} повторение'
     else:
-        ax.set_title(f'График Costs для {selected_algorithm}, {selected_iterations} итераций', fontsize=16)
+        title = f'График Costs для {selected_algorithm}, {iterations_count} итераций'
     
-    # Добавление сетки
-    ax.grid(True, linestyle='--', alpha=0.7)
-    
-    # Добавление аннотаций для ключевых точек
-    for i, cost in enumerate(costs):
-        ax.annotate(f'{cost}', xy=(i, cost), textcoords="offset points", xytext=(0,10), ha='center', fontsize=8)
+    # Аннотации добавляются только для ключевых точек
+    line_chart(df, 'Index', {'Costs': 'Costs'}, title, 'Индекс', 'Costs',
+               colors={'Costs': 'royalblue'}, annotate=True)
 
-    ax.legend(fontsize=12)
-    
-    # Отображение графика
-    st.pyplot(fig)
+def select_instance(record, key):
+    """Экземпляр задачи маршрута: указанный в записи запуска или выбранный из data/instances."""
+    instance = instances.load(record['Instance']) if record.get('Instance') else None
+    if instance is not None:
+        return instance
+    dimension = len(record['Solution'])
+    names = instances.available(dimension)
+    if not names:
+        st.write(f"Экземпляров задачи на {dimension} городов в {instances.INSTANCES_DIR} нет: "
+                 "маршрут нельзя проверить и показать на карте.")
+        return None
+    name = st.selectbox("Экземпляр задачи:", ["Не выбран"] + names, key=key)
+    return None if name == "Не выбран" else instances.load(name)
+
+@instrument()
+def display_tour(selected_algorithm, record, key):
+    """Длина маршрута, пересчитанная по экземпляру задачи, и карта маршрута."""
+    st.subheader("Маршрут на экземпляре задачи")
+    instance = select_instance(record, key)
+    if instance is None:
+        return
+    path = record['Solution']
+    costs = instances.edge_costs(instance, path)
+    st.write(f"Экземпляр: {instance['file']} ({instance['dimension']} городов, {instance['edge_weight_type']})")
+    st.write(f"Сумма по экземпляру: {costs.sum().item()} (в данных: {record['TotalSum']})")
+    if instance['coordinates'] is not None:
+        tour_map(instance['coordinates'], path, costs, f"Маршрут {selected_algorithm} на {instance['file']}")
+
+@instrument()
+def plot_costs_stream(selected_algorithm, source, repeat):
+    """Потоковый график Costs: файл запуска читается блоками, на графике значения,
+    текущий минимум и скользящее среднее."""
+    st.subheader("График Costs по индексам (потоковое чтение)")
+    frames = streaming.running_aggregates(streaming.iter_number_chunks(os.path.join(common.INITIAL_DIR, source), 'Costs'))
+    live_chart(frames, 'Index', {'Value': 'Costs', 'Best': 'Минимум', 'Mean': 'Скользящее среднее'},
+               f'График Costs для {selected_algorithm}, {selected_iterations} итераций, {repeat} повторение',
+               'Индекс', 'Costs', colors={'Value': 'royalblue'}, marker=None)
 
+
+@instrument()
 def plot_iterations_comparison(selected_algorithm, data_10, data_100, data_1000):
     """Построение графика сравнения результатов для разных итераций."""
     total_sum_list = [data_10['TotalSum'], data_100['TotalSum'], data_1000['TotalSum']]
@@ -100,49 +133,17 @@ def plot_iterations_comparison(selected_algorithm, data_10, data_100, data_1000)
 
     st.subheader("График сравнения результатов для разных итераций")
     
-    # Установка стиля графика
-    plt.style.use('ggplot')  # Используем стандартный стиль ggplot
-    
-    fig, ax1 = plt.subplots(figsize=(12, 5))  # Уменьшаем ширину графика
-    
-    color = 'tab:blue'
-    ax1.set_xlabel('Итерации', fontsize=14)
-    ax1.set_ylabel('Сумма', color=color, fontsize=14)
-    ax1.plot(df['Iterations'], df['TotalSum'], marker='o', color=color, label='Сумма')
-    ax1.tick_params(axis='y', labelcolor=color)
-    
-    # Установка максимума для оси sum
-    max_sum = max(total_sum_list) * 1.2  # Увеличиваем максимум на 20%
-    min_sum = min(total_sum_list) * 0.8
-    ax1.set_ylim(min_sum, max_sum)
-
-    ax2 = ax1.twinx()  # Второй y-ось
-    color = 'tab:red'
-    ax2.set_ylabel('Затраченное время (мс)', color=color, fontsize=14)
-    ax2.plot(df['Iterations'], df['ElapsedTime'], marker='o', color=color, label='Затраченное время')
-    ax2.tick_params(axis='y', labelcolor=color)
-    
-    # Установка максимума для оси elapsed_milliseconds
-    max_elapsed_time = max(elapsed_time_list) * 1.2  # Увеличиваем максимум на 20%
-    ax2.set_ylim(0, max_elapsed_time)
-    
-    # Настройка меток осей и заголовка
-    ax1.set_title(f'График сравнения результатов для {selected_algorithm}', fontsize=16)
-    
-    # Добавление сетки
-    ax1.grid(True, linestyle='--', alpha=0.7)
-    
-    # Добавление аннотаций для ключевых точек
-    for i, (total_sum, elapsed_time) in enumerate(zip(total_sum_list, elapsed_time_list)):
-        ax1.annotate(f'{total_sum}', xy=(iterations[i], total_sum), textcoords="offset points", xytext=(0,10), ha='center', fontsize=8)
-        ax2.annotate(f'{elapsed_time}', xy=(iterations[i], elapsed_time), textcoords="offset points", xytext=(0,10), ha='center', fontsize=8)
+    # Границы осей: сумма в пределах ±20%, время от нуля с запасом 20%
+    sum_limits = (min(total_sum_list) * 0.8, max(total_sum_list) * 1.2)
+    elapsed_limits = (0, max(elapsed_time_list) * 1.2)
 
-    ax1.legend(loc='upper left', fontsize=12)
-    ax2.legend(loc='upper right', fontsize=12)
-    
-    # Отображение графика
-    st.pyplot(fig)
+    line_chart(df, 'Iterations', {'TotalSum': 'Сумма'}, f'График сравнения результатов для {selected_algorithm}',
+               'Итерации', 'Сумма', right_series={'ElapsedTime': 'Затраченное время'},
+               right_label='Затраченное время (мс)', colors={'TotalSum': 'tab:blue', 'ElapsedTime': 'tab:red'},
+               axis_colors=('tab:blue', 'tab:red'), annotate=True, ylim=sum_limits, right_ylim=elapsed_limits)
 
+
+@instrument()
 def plot_algorithm_comparison(selected_algorithms):
     """Построение графика сравнения результатов разных алгоритмов."""
     data = {
@@ -153,147 +154,258 @@ def plot_algorithm_comparison(selected_algorithms):
         total_sum_list = []
         elapsed_time_list = []
         for iteration in iterations:
-            if algorithm == "TwoOpt":
-                filename = 'data/best/best_solutions_2opt.json'
-            elif algorithm == "Lkh":
-                filename = 'data/best/best_solutions_LKH.json'
-            data_dict = load_data(filename)
-            if data_dict:
-                algorithm_data = data_dict['BestSolutions'].get(str(iteration))
-                if algorithm_data:
-                    total_sum_list.append(algorithm_data['TotalSum'])
-                    elapsed_time_list.append(algorithm_data['ElapsedMilliseconds'])
-                else:
-                    total_sum_list.append(None)
-                    elapsed_time_list.append(None)
+            algorithm_data = load_best(algorithm, iteration)
+            if algorithm_data:
+                total_sum_list.append(algorithm_data['TotalSum'])
+                elapsed_time_list.append(algorithm_data['ElapsedMilliseconds'])
             else:
                 total_sum_list.append(None)
                 elapsed_time_list.append(None)
         data[f'{algorithm}_TotalSum'] = total_sum_list
         data[f'{algorithm}_ElapsedTime'] = elapsed_time_list
 
-    df = pd.DataFrame.from_dict(data, orient='index').transpose()
+    df = pd.DataFrame(data, dtype=float)
 
     st.subheader("График сравнения результатов разных алгоритмов")
     
-    # Установка стиля графика
-    plt.style.use('ggplot')  # Используем стандартный стиль ggplot
-    
-    fig, ax1 = plt.subplots(figsize=(12, 5))  # Уменьшаем ширину графика
-    
-    color = 'tab:blue'
-    ax1.set_xlabel('Итерации', fontsize=14)
-    ax1.set_ylabel('Сумма', color=color, fontsize=14)
-    for algorithm in selected_algorithms:
-        ax1.plot(df['Iterations'], df[f'{algorithm}_TotalSum'], marker='o', label=f'{algorithm} Сумма')
-    ax1.tick_params(axis='y', labelcolor=color)
-    max_sum = max(total_sum_list) * 1.2  # Увеличиваем максимум на 20%
-    min_sum = min(total_sum_list) * 0.8
-    ax1.set_ylim(min_sum, max_sum)
-    ax2 = ax1.twinx()  # Второй y-ось
-    color = 'tab:red'
-    ax2.set_ylabel('Затраченное время (мс)', color=color, fontsize=14)
-    for algorithm in selected_algorithms:
-        ax2.plot(df['Iterations'], df[f'{algorithm}_ElapsedTime'], marker='o', label=f'{algorithm} Затраченное время')
-    ax2.tick_params(axis='y', labelcolor=color)
-    max_elapsed_time = max(elapsed_time_list) * 1.2  # Увеличиваем максимум на 20%
-    ax2.set_ylim(0, max_elapsed_time)
-    # Настройка меток осей и заголовка
-    ax1.set_title('График сравнения результатов разных алгоритмов', fontsize=16)
-    
-    # Добавление сетки
-    ax1.grid(True, linestyle='--', alpha=0.7)
-    
-    ax1.legend(loc='upper left', fontsize=12)
-    ax2.legend(loc='upper right', fontsize=12)
-    
-    # Отображение графика
-    st.pyplot(fig)
+    sum_columns = {f'{algorithm}_TotalSum': f'{algorithm} Сумма' for algorithm in selected_algorithms}
+    time_columns = {f'{algorithm}_ElapsedTime': f'{algorithm} Затраченное время' for algorithm in selected_algorithms}
+    sum_limits = (df[list(sum_columns)].min().min() * 0.8, df[list(sum_columns)].max().max() * 1.2)
+    elapsed_limits = (0, df[list(time_columns)].max().max() * 1.2)
+
+    line_chart(df, 'Iterations', sum_columns, 'График сравнения результатов разных алгоритмов', 'Итерации', 'Сумма',
+               right_series=time_columns, right_label='Затраченное время (мс)',
+               axis_colors=('tab:blue', 'tab:red'), ylim=sum_limits, right_ylim=elapsed_limits)
+
 
-def display_initial_data_table(initial_data_list):
+@instrument()
+def display_statistics(selected_algorithm, selected_iterations):
+    """Отображение статистик по всем исходным запускам."""
+    df = query.statistics_frame('tsp', {'Сумма': 'total', 'Затраченное время (мс)': 'elapsed'},
+                                algorithm=selected_algorithm, iterations=selected_iterations)
+    if df is not None:
+        st.subheader("Статистика по исходным запускам")
+        st.dataframe(df, use_container_width=True)
+
+@instrument()
+def display_initial_data_table(initial_data):
     """Отображение исходных данных в виде таблицы."""
     st.subheader("Исходные данные")
     
-    # Преобразование данных в DataFrame
-    df_list = []
-    for data in initial_data_list:
-        df_list.append({
-            'TotalSum': data.get('TotalSum', None),
-            'ElapsedMilliseconds': data.get('ElapsedMilliseconds', None),
-            'Iterations': data.get('Iterations', None)
-        })
-    
-    df = pd.DataFrame(df_list)
+    df = initial_data[['TotalSum', 'ElapsedMilliseconds', 'Iterations']]
     
     # Отображение таблицы с возможностью сортировки и фильтрации
     st.dataframe(df, use_container_width=True)
 
+@instrument()
+def display_significance(selected_iterations):
+    """Статистическое сравнение TwoOpt и LKH по суммам повторных запусков."""
+    result = stats.tsp_compare('twoopt', 'lkh', selected_iterations)
+    if result is None:
+        st.write(f"Исходные данные обоих алгоритмов с {selected_iterations} итерациями не найдены.")
+        return
+    st.subheader(f"Статистическое сравнение TwoOpt и LKH ({selected_iterations} итераций)")
+    samples, summary = stats.comparison_frame(result, 'TwoOpt', 'Lkh')
+    st.dataframe(samples, use_container_width=True)
+    st.dataframe(summary, use_container_width=True)
+
+@instrument()
+def display_verification():
+    """Проверка всех сохранённых маршрутов: перестановка, Costs и TotalSum, суммы по экземпляру."""
+    st.subheader("Проверка сохранённых маршрутов")
+    choice = st.selectbox("Экземпляр для пересчёта сумм:", ["Не выбран"] + instances.available(), key='verify_instance')
+    instance = None if choice == "Не выбран" else instances.load(choice)
+    result = tours.verify_stored(instance=instance)
+    if result is None:
+        st.write("Исходные данные TwoOpt и LKH не найдены.")
+        return
+    broken = result[~result['valid']]
+    st.write(f"Проверено маршрутов: {len(result)}, с ошибками: {len(broken)}")
+    if not broken.empty:
+        st.dataframe(broken[['algorithm', 'iterations', 'repeat', 'source', 'problems']].rename(columns={
+            'algorithm': 'Алгоритм', 'iterations': 'Итерации', 'repeat': 'Повтор', 'source': 'Файл',
+            'problems': 'Ошибки'}), use_container_width=True, hide_index=True)
+
+def select_tour(label, key):
+    """Выбор маршрута для сравнения: алгоритм, число итераций и повтор (или лучший запуск)."""
+    col1, col2, col3 = st.columns(3)
+    algorithm = col1.selectbox(f"{label}: алгоритм", algorithms, key=f'{key}_algorithm')
+    iteration = col2.selectbox(f"{label}: итерации", iterations, key=f'{key}_iterations')
+    initial_data = load_initial_data(algorithm.lower(), iteration, ['repeat', 'Solution'])
+    repeats = [] if initial_data is None else list(initial_data['repeat'])
+    repeat = col3.selectbox(f"{label}: повтор", ["Лучший"] + repeats, key=f'{key}_repeat')
+    if repeat == "Лучший":
+        best = load_best(algorithm, iteration)
+        return f"{algorithm}, {iteration}, лучший", best['Solution'] if best else None
+    return f"{algorithm}, {iteration}, повтор {repeat}", initial_data['Solution'].iloc[repeats.index(repeat)]
+
+@instrument()
+def display_tour_diff():
+    """Общие рёбра двух маршрутов и рёбра, которые у них различаются."""
+    st.subheader("Сравнение двух маршрутов")
+    first_label, first = select_tour("Первый", 'diff_first')
+    second_label, second = select_tour("Второй", 'diff_second')
+    if first is None or second is None:
+        st.write("Один из маршрутов не найден.")
+        return
+    result = tours.diff(first, second)
+    st.write(f"Общих рёбер: {result['shared']} из {result['edges_first']} и {result['edges_second']} "
+             f"(коэффициент Жаккара {result['jaccard']:.3f})")
+    if len(result['only_first']) or len(result['only_second']):
+        col1, col2 = st.columns(2)
+        col1.write(f"Только в «{first_label}»")
+        col1.dataframe(pd.DataFrame(result['only_first'], columns=['a', 'b']), use_container_width=True, hide_index=True)
+        col2.write(f"Только в «{second_label}»")
+        col2.dataframe(pd.DataFrame(result['only_second'], columns=['a', 'b']), use_container_width=True, hide_index=True)
+
+@instrument()
+def display_backbone(selected_algorithm, selected_iterations):
+    """Общий остов маршрутов всех повторов и попарное число общих рёбер."""
+    st.subheader(f"Общий остов маршрутов {selected_algorithm}, {selected_iterations} итераций")
+    initial_data = load_initial_data(selected_algorithm.lower(), selected_iterations, ['repeat', 'Solution'])
+    if initial_data is None:
+        st.write(f"Исходные данные для {selected_algorithm} с {selected_iterations} итерациями не найдены.")
+        return
+    share = st.slider("Доля повторов, в которых есть ребро:", 0.5, 1.0, 1.0, 0.05, key='backbone_share')
+    edges = tours.backbone(initial_data['Solution'], share)
+    st.write(f"Рёбер остова: {len(edges)}")
+    st.dataframe(edges.rename(columns={'count': 'Повторов', 'share': 'Доля'}), use_container_width=True, hide_index=True)
+    overlap = tours.overlap_matrix(initial_data['Solution'])
+    repeats = list(initial_data['repeat'])
+    st.write("Число общих рёбер для пар повторов")
+    st.dataframe(pd.DataFrame(overlap, index=repeats, columns=repeats), use_container_width=True)
+
+def display_solver_section(selected_algorithm):
+    """Раздел запуска встроенного решателя и сохранения результата в исходные данные."""
+    if selected_algorithm not in solvers:
+        st.write(f"Встроенный решатель для {selected_algorithm} недоступен.")
+        return
+
+    choice = st.selectbox("Экземпляр задачи:", ["Случайный"] + instances.available(), key='solver_instance')
+    col1, col2, col3, col4, col5 = st.columns(5)
+    cities = col1.number_input("Количество городов:", min_value=10, max_value=20000, value=100,
+                               disabled=choice != "Случайный")
+    seed = col2.number_input("Seed:", min_value=0, value=0)
+    run_iterations = col3.selectbox("Итерации:", iterations, key='solver_iterations')
+    neighbors = col4.number_input("Ближайших соседей:", min_value=2, max_value=50, value=10)
+    time_limit = col5.number_input("Лимит времени (сек, 0 - без лимита):", min_value=0, value=10)
+
+    if st.button("Запустить решатель"):
+        # Случайный экземпляр сохраняется в data/instances, чтобы запуск можно было проверить позже
+        instance_name = instances.random_instance(cities, seed) if choice == "Случайный" else choice
+        # Решатель выполняется в отдельном процессе (core.jobs)
+        job_id = jobs.submit(f"{selected_algorithm}, {instance_name}, {run_iterations} итераций", instances.solve,
+                             solvers[selected_algorithm].solve, instance_name, iterations=run_iterations, seed=seed,
+                             neighbors=neighbors, time_limit=time_limit or None, owner=session_owner())
+        st.session_state['solver_job'] = (selected_algorithm, job_id)
+
+    run = st.session_state.get('solver_job')
+    if run and run[0] == selected_algorithm:
+        x = 'Iteration' if selected_algorithm == "TwoOpt" else 'Trial'
+        job = show_job(run[1], x, 'TotalSum', f'Ход решения {selected_algorithm}', 'Итерации', 'Сумма')
+        if job is None:
+            return
+        record = job['result']
+        display_algorithm_data(selected_algorithm, record)
+        plot_costs(selected_algorithm, record['Costs'], iterations_count=record['Iterations'])
+        display_tour(selected_algorithm, record, 'solver_tour_instance')
+        # Запуск сделан на другом экземпляре, чем исходные данные, поэтому сохраняется отдельно от них
+        # и не попадает в лучшие результаты и сравнения
+        if st.button("Сохранить запуск"):
+            path = common.save_run(record, solvers[selected_algorithm].FOLDER, record['Iterations'])
+            st.write(f"Запуск сохранён: {path}")
+
+sections = ["Лучшие результаты", "Исходные данные", "Сравнение по итерациям", "Сравнение алгоритмов", "Проверка маршрутов",
+            "Запуск решателя"]
+
 def main():
     global selected_iterations
+    warm_up()
     st.title("Алгоритмы TwoOpt и LKH")
+    select_backend()
     
     selected_algorithm = st.selectbox("Выберите алгоритм:", algorithms)
-    st.divider()
-    st.header("Лучшие результаты")
     selected_iterations = st.selectbox("Выберите количество итераций:", iterations)
+    st.divider()
+    # Вычисляется только выбранный раздел
+    section = select_section(sections, key='tsp_section')
 
-    if selected_algorithm == "TwoOpt":
-        filename = 'data/best/best_solutions_2opt.json'
-    elif selected_algorithm == "Lkh":
-        filename = 'data/best/best_solutions_LKH.json'
-
-    data = load_data(filename)
+    if section == "Лучшие результаты":
+        st.header("Лучшие результаты")
 
-    if data:
-        algorithm_data = data['BestSolutions'].get(str(selected_iterations))
+        algorithm_data = load_best(selected_algorithm, selected_iterations)
         if algorithm_data:
             display_algorithm_data(selected_algorithm, algorithm_data)
+            display_statistics(selected_algorithm, selected_iterations)
             plot_costs(selected_algorithm, algorithm_data['Costs'])
+            display_tour(selected_algorithm, algorithm_data, 'best_tour_instance')
         else:
             st.write(f"Данные для {selected_algorithm} с {selected_iterations} итерациями не найдены.")
-    st.divider()
-    st.header("Исходные данные")
-    
-    initial_data = load_initial_data(selected_algorithm.lower(), selected_iterations)
-    if initial_data:
-        selected_file = st.selectbox("Выберите файл с исходными данными (номер повтора):", [f"{i+1}" for i in range(len(initial_data))])
-        repeat = int(selected_file)
-        selected_data = initial_data[repeat - 1]
-        display_algorithm_data(selected_algorithm, selected_data)
-        plot_costs(selected_algorithm, selected_data['Costs'], repeat)
-    else:
-        st.write(f"Исходные данные для {selected_algorithm} с {selected_iterations} итерациями не найдены.")
 
-    st.divider()
-    st.header("Исходные данные в виде таблицы")
-    
-    initial_data_table = load_initial_data(selected_algorithm.lower(), selected_iterations)
-    if initial_data_table:
-        display_initial_data_table(initial_data_table)
-    else:
-        st.write(f"Исходные данные для {selected_algorithm} с {selected_iterations} итерациями не найдены.")
+    elif section == "Исходные данные":
+        st.header("Исходные данные")
+        
+        # Costs и Solution всех повторов не загружаются: они читаются только для выбранного
+        initial_data = load_initial_data(selected_algorithm.lower(), selected_iterations, INITIAL_COLUMNS)
+        if initial_data is not None:
+            selected_file = st.selectbox("Выберите файл с исходными данными (номер повтора):", [f"{i+1}" for i in range(len(initial_data))])
+            repeat = int(selected_file)
+            selected_data = initial_data.iloc[repeat - 1].to_dict()
+            selected_repeat = int(selected_data['repeat'])
+            selected_data.update(load_run(selected_algorithm.lower(), selected_iterations, selected_repeat, ['Solution']))
+            display_algorithm_data(selected_algorithm, selected_data)
+            if st.toggle("Потоковый режим (для длинных рядов)", key='stream_costs'):
+                plot_costs_stream(selected_algorithm, selected_data['source'], repeat)
+            else:
+                costs = load_run(selected_algorithm.lower(), selected_iterations, selected_repeat, ['Costs'])['Costs']
+                plot_costs(selected_algorithm, costs, repeat)
+            display_tour(selected_algorithm, selected_data, 'initial_tour_instance')
 
-    st.divider()
-    st.header("Сравнение лучших результатов для разного количества итераций")
-    
-    data_10 = load_data(filename)['BestSolutions'].get('10')
-    data_100 = load_data(filename)['BestSolutions'].get('100')
-    data_1000 = load_data(filename)['BestSolutions'].get('1000')
+            st.divider()
+            st.header("Исходные данные в виде таблицы")
+            display_initial_data_table(initial_data)
+        else:
+            st.write(f"Исходные данные для {selected_algorithm} с {selected_iterations} итерациями не найдены.")
 
-    if data_10 and data_100 and data_1000:
-        plot_iterations_comparison(selected_algorithm, data_10, data_100, data_1000)
-    else:
-        st.write("Данные для сравнения результатов для разных итераций не найдены.")
+    elif section == "Сравнение по итерациям":
+        st.header("Сравнение лучших результатов для разного количества итераций")
+        
+        data_10 = load_best(selected_algorithm, 10)
+        data_100 = load_best(selected_algorithm, 100)
+        data_1000 = load_best(selected_algorithm, 1000)
+
+        if data_10 and data_100 and data_1000:
+            plot_iterations_comparison(selected_algorithm, data_10, data_100, data_1000)
+        else:
+            st.write("Данные для сравнения результатов для разных итераций не найдены.")
+
+    elif section == "Сравнение алгоритмов":
+        st.header("Сравнение результатов разных алгоритмов")
+        
+        selected_algorithms = st.multiselect("Выберите алгоритмы для сравнения:", algorithms)
+        
+        if selected_algorithms:
+            plot_algorithm_comparison(selected_algorithms)
+        else:
+            st.write("Выберите хотя бы один алгоритм для сравнения.")
+
+        st.divider()
+        display_significance(selected_iterations)
+
+    elif section == "Проверка маршрутов":
+        st.header("Проверка и сравнение маршрутов")
+
+        display_verification()
+        st.divider()
+        display_tour_diff()
+        st.divider()
+        display_backbone(selected_algorithm, selected_iterations)
 
-    st.divider()
-    st.header("Сравнение результатов разных алгоритмов")
-    
-    selected_algorithms = st.multiselect("Выберите алгоритмы для сравнения:", algorithms)
-    
-    if selected_algorithms:
-        plot_algorithm_comparison(selected_algorithms)
     else:
-        st.write("Выберите хотя бы один алгоритм для сравнения.")
+        st.header("Запуск встроенного решателя")
+        
+        display_solver_section(selected_algorithm)
+        display_jobs(session_owner())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_page("TwoOpt и LKH", main)
\ No newline at end of file
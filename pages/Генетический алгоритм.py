@@ -1,8 +1,18 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import json
-import os
+from core.lazy import lazy_import, select_section, warm_up
+from core.metrics import instrument, run_page
+from core.charts import line_chart, live_chart, select_backend
+from core import jobs
+from core.job_panel import display_jobs, session_owner, show_job
+
+# Тяжёлые модули загружаются при первом обращении из открытого раздела
+pd = lazy_import('pandas')
+query = lazy_import('core.query')
+streaming = lazy_import('core.streaming')
+runner = lazy_import('core.runner')
+instances = lazy_import('core.instances')
+ga = lazy_import('core.solvers.ga')
+stats = lazy_import('core.stats')
 
 st.set_page_config(
     page_title="Генетический алгоритм",
@@ -15,30 +25,19 @@ crossovers = ["CycleCrossover", "OnePointCrossover", "OrderBasedCrossover", "Ord
               "PositionBasedCrossover", "ThreeParentCrossover", "TwoPointCrossover", "UniformCrossover"]
 iterations = [10, 100, 1000, 10000]
 
-def load_data(filename):
-    """Загрузка данных из JSON файла."""
-    try:
-        with open(filename) as f:
-            data = json.load(f)
-        if not data:
-            st.write("Нет данных для отображения.")
-            return None
-        return data
-    except FileNotFoundError:
-        st.write("Файл не найден.")
-        return None
+@instrument()
+def load_best(selection, mutation, crossover, iterations):
+    """Лучший результат из сервиса запросов (исходные запуски, при их отсутствии - data/best)."""
+    return query.best_record('ga', selection=selection, mutation=mutation, crossover=crossover, iterations=iterations)
 
+@instrument()
 def load_initial_data(selection, mutation, crossover):
-    """Загрузка исходных данных из папки для выбранного кроссовера."""
-    folder_path = f'data/initial/{selection}/{mutation}'
-    data_list = []
-    for filename in os.listdir(folder_path):
-        if filename.endswith('.json') and crossover in filename:
-            file_path = os.path.join(folder_path, filename)
-            data = load_data(file_path)
-            if data:
-                data_list.append(data)
-    return data_list
+    """Загрузка исходных данных выбранного кроссовера из общего для всех сессий слоя данных."""
+    df = query.runs('ga', ['iterations', 'TimeInSec', 'Fitness', 'Distance'],
+                    selection=selection, mutation=mutation, crossover=crossover)
+    if df is None:
+        return None
+    return df.rename(columns={'iterations': 'GenerationCount'})
 
 def display_genetic_algorithm_data(selected_selection, selected_mutation, selected_crossover, selected_iterations, algorithm_data):
     """Отображение информации о генетическом алгоритме."""
@@ -51,175 +50,219 @@ def display_genetic_algorithm_data(selected_selection, selected_mutation, select
     st.write(f"Время выполнения (сек): {time_in_sec}")
     st.write(f"Фитнес: {fitness}")
 
-def display_initial_data(selected_selection, selected_mutation, selected_crossover, initial_data_list):
+@instrument()
+def display_statistics(selected_selection, selected_mutation, selected_crossover, selected_iterations):
+    """Отображение статистик по всем исходным запускам."""
+    df = query.statistics_frame('ga', {'Дистанция': 'distance', 'Время выполнения (сек)': 'time'},
+                                selection=selected_selection, mutation=selected_mutation,
+                                crossover=selected_crossover, iterations=selected_iterations)
+    if df is not None:
+        st.subheader("Статистика по исходным запускам")
+        st.dataframe(df, use_container_width=True)
+
+@instrument()
+def display_initial_data(selected_selection, selected_mutation, selected_crossover, initial_data):
     """Отображение исходных данных в виде таблицы."""
     st.subheader("Исходные данные")
     st.write(f"Метод выбора: {selected_selection}")
     st.write(f"Мутация: {selected_mutation}")
     st.write(f"Кроссовер: {selected_crossover}")
     
-    # Добавление слова 'Selection' к selected_selection, если его нет
-    if not selected_selection.endswith('Selection'):
-        selected_selection += 'Selection'
-    
-    # Преобразование данных в DataFrame
-    df_list = []
-    for data in initial_data_list:
-        if data.get('Selection') == selected_selection and data.get('Mutation') == selected_mutation and data.get('Crossover') == selected_crossover:
-            for indicator in data.get('NumericalIndicators', []):
-                df_list.append({
-                    'GenerationCount': indicator.get('GenerationCount', None),
-                    'TimeInSec': indicator.get('TimeInSec', None),
-                    'Fitness': indicator.get('Fintess', None),
-                    'Distance': indicator.get('Distance', None)
-                })
-    
-    if not df_list:
+    if initial_data.empty:
         st.write("Данные для выбранных метода выбора, мутации и кроссовера не найдены.")
     else:
-        df = pd.DataFrame(df_list)
-        st.dataframe(df, use_container_width=True)
+        st.dataframe(initial_data, use_container_width=True)
+
+@instrument()
+def plot_initial_stream(selected_selection, selected_mutation, selected_crossover):
+    """Потоковый график дистанций всех запусков: хранилище читается пакетами,
+    на графике текущий минимум и скользящее среднее."""
+    st.subheader("Дистанции исходных запусков (потоковое чтение)")
+    chunks = streaming.scan_column('ga', 'Distance', selection=selected_selection, mutation=selected_mutation,
+                         crossover=selected_crossover)
+    df = live_chart(streaming.running_aggregates(chunks), 'Index', {'Value': 'Дистанция', 'Best': 'Минимум', 'Mean': 'Скользящее среднее'},
+                    f'Дистанции запусков {selected_selection}, {selected_mutation}, {selected_crossover}',
+                    'Номер запуска', 'Дистанция', marker=None)
+    if df is None:
+        st.write(f"Исходные данные для {selected_selection}, {selected_mutation} и {selected_crossover} не найдены.")
 
-def plot_best_results_comparison(best_results, selected_mutation, selected_crossover):
+@instrument()
+def plot_best_results_comparison(selected_mutation, selected_crossover):
     """Построение графика сравнения лучших результатов для всех методов выбора."""
     data = {
         'Iterations': iterations,
     }
 
-    for selection, selection_data in best_results.items():
+    for selection in selections:
         distances = []
         for iteration in iterations:
-            distance = selection_data.get(selected_mutation, {}).get(selected_crossover, {}).get(str(iteration), {}).get('Distance', None)
-            distances.append(distance)
+            best = load_best(selection, selected_mutation, selected_crossover, iteration)
+            distances.append(best['Distance'] if best else None)
         data[selection] = distances
 
-    df = pd.DataFrame(data)
+    df = pd.DataFrame(data, dtype=float)
 
     st.subheader("График сравнения лучших результатов для всех методов выбора")
     
-    # Установка стиля графика
-    plt.style.use('ggplot')  # Используем стандартный стиль ggplot
-    
-    fig, ax = plt.subplots(figsize=(12, 5))  # Уменьшаем ширину графика
-    
-    for selection in selections:
-        ax.plot(df['Iterations'], df[selection], marker='o', label=selection)
-    
-    # Настройка меток осей и заголовка
-    ax.set_xlabel('Итерации', fontsize=14)
-    ax.set_ylabel('Дистанция', fontsize=14)
-    ax.set_title(f'График сравнения лучших результатов для всех методов выбора\n(Мутация: {selected_mutation}, Кроссовер: {selected_crossover})', fontsize=16)
-    
-    # Добавление сетки
-    ax.grid(True, linestyle='--', alpha=0.7)
-    
-    ax.legend(fontsize=12)
-    
-    # Отображение графика
-    st.pyplot(fig)
+    line_chart(df, 'Iterations', {selection: selection for selection in selections},
+               f'График сравнения лучших результатов для всех методов выбора\n(Мутация: {selected_mutation}, Кроссовер: {selected_crossover})',
+               'Итерации', 'Дистанция')
 
+
+@instrument()
 def plot_comparison(selected_methods, selected_mutations, selected_crossovers):
     """Построение графика сравнения результатов разных методов, мутаций и кроссоверов."""
-    data = {
-        'Iterations': iterations,
-    }
-
-    for method in selected_methods:
-        for mutation in selected_mutations:
-            for crossover in selected_crossovers:
-                distances = []
-                for iteration in iterations:
-                    filename = f'data/best/best_results_{method}.json'
-                    data_dict = load_data(filename)
-                    if data_dict:
-                        distance = data_dict.get(mutation, {}).get(crossover, {}).get(str(iteration), {}).get('Distance', None)
-                        distances.append(distance)
-                data[f'{method}_{mutation}_{crossover}'] = distances
-
-    df = pd.DataFrame.from_dict(data, orient='index').transpose()
+    matrix = query.comparison(selected_methods, selected_mutations, selected_crossovers, iterations)
+    df = matrix.T
+    df.columns = ['_'.join(key) for key in matrix.index]
+    df = df.rename_axis(None, axis=1).rename_axis('Iterations').reset_index()
 
     st.subheader("График сравнения результатов разных методов, мутаций и кроссоверов")
     
-    # Установка стиля графика
-    plt.style.use('ggplot')  # Используем стандартный стиль ggplot
-    
-    fig, ax = plt.subplots(figsize=(12, 5))  # Уменьшаем ширину графика
-    
-    for column in df.columns:
-        if column != 'Iterations':
-            ax.plot(df['Iterations'], df[column], marker='o', label=column)
-    
-    # Настройка меток осей и заголовка
-    ax.set_xlabel('Итерации', fontsize=14)
-    ax.set_ylabel('Дистанция', fontsize=14)
-    ax.set_title('График сравнения результатов разных методов, мутаций и кроссоверов', fontsize=16)
-    
-    # Добавление сетки
-    ax.grid(True, linestyle='--', alpha=0.7)
-    
-    ax.legend(fontsize=12)
-    
-    # Отображение графика
-    st.pyplot(fig)
+    columns = [column for column in df.columns if column != 'Iterations']
+    line_chart(df, 'Iterations', {column: column for column in columns},
+               'График сравнения результатов разных методов, мутаций и кроссоверов', 'Итерации', 'Дистанция')
+
+@instrument()
+def display_ranking(selected_selection, selected_mutation, selected_crossover, selected_iterations):
+    """Ранжирование всех комбинаций по медиане дистанции с бутстреп-интервалами и сравнением с лучшей."""
+    ranking = stats.ga_ranking(selected_iterations)
+    if ranking is None:
+        st.write(f"Исходные данные с {selected_iterations} итерациями не найдены.")
+        return
+    st.subheader("Ранжирование комбинаций")
+    tied = ranking[ranking['best_tied']]
+    selected = ranking[(ranking['selection'] == selected_selection) & (ranking['mutation'] == selected_mutation)
+                       & (ranking['crossover'] == selected_crossover)]
+    st.write(f"Комбинаций, не отличимых от лучшей (Манн-Уитни с поправкой Холма, α = {stats.ALPHA}): {len(tied)} из {len(ranking)}")
+    if not selected.empty:
+        st.write(f"Место выбранной комбинации: {selected['rank'].iloc[0]}")
+    df = ranking.drop(columns=['iterations', 'p_vs_best']).rename(columns={
+        'selection': 'Метод выбора', 'mutation': 'Мутация', 'crossover': 'Кроссовер', 'n': 'Повторов',
+        'median': 'Медиана дистанции', 'ci_low': '95% интервал: от', 'ci_high': '95% интервал: до', 'rank': 'Место',
+        'p_holm': 'p-value (Холм)', 'a12_vs_best': 'A12 к лучшей', 'cliffs_delta': 'Дельта Клиффа',
+        'best_tied': 'Не хуже лучшей'})
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+@instrument()
+def display_pairwise_comparison(first, second, selected_iterations):
+    """Сравнение двух комбинаций по дистанциям повторных запусков."""
+    result = stats.ga_compare(first, second, selected_iterations)
+    if result is None:
+        st.write(f"Исходные данные для одной из комбинаций с {selected_iterations} итерациями не найдены.")
+        return
+    samples, summary = stats.comparison_frame(result, 'Первая', 'Вторая')
+    st.dataframe(samples, use_container_width=True)
+    st.dataframe(summary, use_container_width=True)
+
+def display_run_section(selected_selection, selected_mutation, selected_crossover):
+    """Раздел запуска встроенного генетического алгоритма и сохранения результата."""
+    col1, col2, col3 = st.columns(3)
+    cities = col1.number_input("Количество городов:", min_value=10, max_value=2000, value=100)
+    seed = col2.number_input("Seed:", min_value=0, value=0)
+    generations = col3.selectbox("Количество поколений:", iterations, key='run_generations')
+
+    combination = (selected_selection, selected_mutation, selected_crossover)
+    if st.button("Запустить генетический алгоритм"):
+        # Задача выполняется в отдельном процессе (core.jobs) на случайном экземпляре из seed
+        job_id = jobs.submit(f"{', '.join(combination)}, {generations} поколений", ga.run,
+                             *combination, generations, seed, cities=cities, instance_seed=seed,
+                             owner=session_owner())
+        st.session_state['ga_job'] = (combination, job_id, instances.random_name(cities, seed))
+
+    run = st.session_state.get('ga_job')
+    if run and run[0] == combination:
+        job = show_job(run[1], 'Generation', 'Distance', 'Ход эволюции', 'Поколения', 'Дистанция')
+        if job is None:
+            return
+        result = job['result']
+        display_genetic_algorithm_data(selected_selection, selected_mutation, selected_crossover, result['GenerationCount'],
+                                       {'Distance': result['Distance'], 'Data': result})
+        # Запуск сделан на случайном экземпляре, а не на экземпляре исходных данных, поэтому сохраняется
+        # отдельно от них с именем экземпляра и не попадает в лучшие результаты и статистику
+        if st.button("Сохранить запуск"):
+            path = runner.write_combination(selected_selection, selected_mutation, selected_crossover, [result],
+                                            runner.RUNS_DIR, instance=run[2])
+            st.write(f"Запуск сохранён: {path}")
+
+
+sections = ["Лучшие результаты", "Исходные данные", "Сравнение лучших результатов", "Сравнение методов", "Статистика запусков",
+            "Запуск алгоритма"]
 
 def main():
     global selected_iterations
+    warm_up()
     st.title("Генетический алгоритм")
+    select_backend()
     
     selected_selection = st.selectbox("Выберите метод выбора:", selections)
     selected_mutation = st.selectbox("Выберите мутацию:", mutations)
     selected_crossover = st.selectbox("Выберите кроссовер:", crossovers)
     st.divider()
-    st.header("Лучшие результаты")
-    selected_iterations = st.selectbox("Выберите количество итераций:", iterations)
-    filename = f'data/best/best_results_{selected_selection}.json'
-    data = load_data(filename)
+    # Вычисляется только выбранный раздел
+    section = select_section(sections, key='ga_section')
 
-    if data:
-        algorithm_data = data.get(selected_mutation, {}).get(selected_crossover, {}).get(str(selected_iterations))
+    if section == "Лучшие результаты":
+        st.header("Лучшие результаты")
+        selected_iterations = st.selectbox("Выберите количество итераций:", iterations)
+        algorithm_data = load_best(selected_selection, selected_mutation, selected_crossover, selected_iterations)
         if algorithm_data:
             display_genetic_algorithm_data(selected_selection, selected_mutation, selected_crossover, selected_iterations, algorithm_data)
+            display_statistics(selected_selection, selected_mutation, selected_crossover, selected_iterations)
         else:
             st.write(f"Данные для {selected_selection}, {selected_mutation}, {selected_crossover} с {selected_iterations} итерациями не найдены.")
 
-    st.divider()
-    st.header("Исходные данные")
-    
-    initial_data_list = load_initial_data(selected_selection, selected_mutation, selected_crossover)
-    if initial_data_list:
-        display_initial_data(selected_selection, selected_mutation, selected_crossover, initial_data_list)
-    else:
-        st.write(f"Исходные данные для {selected_selection}, {selected_mutation} и {selected_crossover} не найдены.")
+    elif section == "Исходные данные":
+        st.header("Исходные данные")
+        
+        if st.toggle("Потоковый режим (для длинных рядов)", key='stream_initial'):
+            plot_initial_stream(selected_selection, selected_mutation, selected_crossover)
+        else:
+            initial_data = load_initial_data(selected_selection, selected_mutation, selected_crossover)
+            if initial_data is not None:
+                display_initial_data(selected_selection, selected_mutation, selected_crossover, initial_data)
+            else:
+                st.write(f"Исходные данные для {selected_selection}, {selected_mutation} и {selected_crossover} не найдены.")
 
-    st.divider()
-    st.header("Сравнение лучших результатов")
-    
-    selected_mutation_for_comparison = st.selectbox("Выберите мутацию для сравнения:", mutations)
-    selected_crossover_for_comparison = st.selectbox("Выберите кроссовер для сравнения:", crossovers)
-    
-    best_results = {}
-    for selection in selections:
-        filename = f'data/best/best_results_{selection}.json'
-        data = load_data(filename)
-        if data:
-            best_results[selection] = data
+    elif section == "Сравнение лучших результатов":
+        st.header("Сравнение лучших результатов")
+        
+        selected_mutation_for_comparison = st.selectbox("Выберите мутацию для сравнения:", mutations)
+        selected_crossover_for_comparison = st.selectbox("Выберите кроссовер для сравнения:", crossovers)
+        
+        plot_best_results_comparison(selected_mutation_for_comparison, selected_crossover_for_comparison)
 
-    if best_results:
-        plot_best_results_comparison(best_results, selected_mutation_for_comparison, selected_crossover_for_comparison)
-    else:
-        st.write("Данные для сравнения лучших результатов для всех методов выбора не найдены.")
+    elif section == "Сравнение методов":
+        st.header("Сравнение результатов разных методов, мутаций и кроссоверов")
+        
+        selected_methods = st.multiselect("Выберите методы выбора для сравнения:", selections)
+        selected_mutations = st.multiselect("Выберите мутации для сравнения:", mutations)
+        selected_crossovers = st.multiselect("Выберите кроссоверы для сравнения:", crossovers)
+        
+        if selected_methods and selected_mutations and selected_crossovers:
+            plot_comparison(selected_methods, selected_mutations, selected_crossovers)
+        else:
+            st.write("Выберите хотя бы один метод выбора, одну мутацию и один кроссовер для сравнения.")
+
+    elif section == "Статистика запусков":
+        st.header("Статистическое сравнение повторных запусков")
+
+        selected_iterations = st.selectbox("Выберите количество итераций:", iterations, key='stats_iterations')
+        display_ranking(selected_selection, selected_mutation, selected_crossover, selected_iterations)
+
+        st.divider()
+        st.subheader("Сравнение выбранной комбинации с другой")
+        second = (st.selectbox("Метод выбора второй комбинации:", selections, key='stats_selection'),
+                  st.selectbox("Мутация второй комбинации:", mutations, key='stats_mutation'),
+                  st.selectbox("Кроссовер второй комбинации:", crossovers, key='stats_crossover'))
+        display_pairwise_comparison((selected_selection, selected_mutation, selected_crossover), second,
+                                    selected_iterations)
 
-    st.divider()
-    st.header("Сравнение результатов разных методов, мутаций и кроссоверов")
-    
-    selected_methods = st.multiselect("Выберите методы выбора для сравнения:", selections)
-    selected_mutations = st.multiselect("Выберите мутации для сравнения:", mutations)
-    selected_crossovers = st.multiselect("Выберите кроссоверы для сравнения:", crossovers)
-    
-    if selected_methods and selected_mutations and selected_crossovers:
-        plot_comparison(selected_methods, selected_mutations, selected_crossovers)
     else:
-        st.write("Выберите хотя бы один метод выбора, одну мутацию и один кроссовер для сравнения.")
+        st.header("Запуск встроенного генетического алгоритма")
+
+        display_run_section(selected_selection, selected_mutation, selected_crossover)
+        display_jobs(session_owner())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_page("Генетический алгоритм", main)
@@ -0,0 +1,68 @@
+import streamlit as st
+import pandas as pd
+from core import charts, loader, shared
+
+st.set_page_config(
+    page_title="Кэш данных",
+    page_icon="🗄️",
+)
+
+MB = 1024 * 1024
+
+def display_shared_cache():
+    """Заполнение общего слоя данных и его записи."""
+    info = shared.cache_info()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Занято (МБ)", f"{info['bytes'] / MB:.1f}", f"из {info['budget_bytes'] / MB:.0f}", delta_color="off")
+    col2.metric("Записей", info['entries'])
+    col3.metric("Попадания / промахи", f"{info['hits']} / {info['misses']}")
+    col4.metric("Вытеснения", info['evictions'])
+    st.progress(min(info['bytes'] / info['budget_bytes'], 1.0))
+    st.write(f"Поколение хранилища: {info['generation']}")
+
+    entries = shared.entries()
+    if entries:
+        df = pd.DataFrame(entries[::-1])
+        df['bytes'] = (df['bytes'] / MB).round(3)
+        df['load_ms'] = df['load_ms'].round(1)
+        df['loaded'] = pd.to_datetime(df['loaded'], unit='s')
+        st.dataframe(df.rename(columns={'key': 'Срез', 'bytes': 'Объём (МБ)', 'hits': 'Попадания',
+                                        'load_ms': 'Загрузка (мс)', 'loaded': 'Загружен'}),
+                     use_container_width=True, hide_index=True)
+    else:
+        st.write("Кэш пуст.")
+
+    budget = st.number_input("Бюджет памяти (МБ):", min_value=16, value=int(info['budget_bytes'] // MB), step=64)
+    col1, col2 = st.columns(2)
+    if col1.button("Применить бюджет"):
+        shared.configure(budget_bytes=budget * MB)
+        st.rerun()
+    if col2.button("Очистить кэш"):
+        shared.clear()
+        st.rerun()
+
+def display_other_caches():
+    """Кэш JSON файлов и кэш изображений графиков."""
+    json_info = loader.cache_info()
+    chart_info = charts.cache_info()
+    df = pd.DataFrame({
+        'JSON файлы': [json_info['entries'], json_info['bytes'] / MB, json_info['max_bytes'] / MB,
+                       json_info['hits'], json_info['misses']],
+        'Изображения графиков': [chart_info['entries'], chart_info['bytes'] / MB, chart_info['max_bytes'] / MB,
+                                 chart_info['hits'], chart_info['misses']],
+    }, index=['Записей', 'Занято (МБ)', 'Лимит (МБ)', 'Попадания', 'Промахи'])
+    st.dataframe(df.round(2), use_container_width=True)
+
+def main():
+    st.title("Кэш данных")
+    st.write("Данные хранилища загружаются один раз на процесс сервера и используются всеми сессиями.")
+
+    st.header("Общий слой данных")
+    display_shared_cache()
+
+    st.divider()
+    st.header("Другие кэши")
+    display_other_caches()
+
+if __name__ == "__main__":
+    main()
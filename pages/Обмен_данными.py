@@ -0,0 +1,86 @@
+import datetime
+import os
+
+import streamlit as st
+import pandas as pd
+from core import bundle, store
+
+st.set_page_config(
+    page_title="Обмен данными",
+    page_icon="📦",
+)
+
+KB = 1024
+
+def initial_size():
+    """Число файлов запусков и их объём в data/initial."""
+    files = size = 0
+    for names in bundle.sources(store.INITIAL_DIR).values():
+        files += len(names)
+        size += sum(os.path.getsize(os.path.join(store.INITIAL_DIR, name)) for name in names)
+    return files, size
+
+def display_export():
+    """Сборка архива data/initial и его скачивание."""
+    files, size = initial_size()
+    st.write(f"Файлов запусков: {files}, объём: {size / KB:.0f} КБ.")
+    if st.button("Собрать архив"):
+        with st.spinner("Сборка архива..."):
+            st.session_state.bundle_data = bundle.export_bytes()
+    data = st.session_state.get('bundle_data')
+    if data:
+        col1, col2 = st.columns(2)
+        col1.metric("Размер архива (КБ)", f"{len(data) / KB:.0f}")
+        col2.metric("Сжатие", f"{size / len(data):.1f}×" if size else "-")
+        name = f"experiments-{datetime.datetime.now():%Y%m%d%H%M}{bundle.SUFFIX}"
+        st.download_button("Скачать архив", data, file_name=name, mime="application/zstd")
+
+def display_import():
+    """Проверка загруженного архива и распаковка в data/initial."""
+    uploaded = st.file_uploader("Архив экспериментов", key="bundle_upload")
+    if uploaded is None:
+        return
+    replace = st.checkbox("Перезаписывать файлы с другим содержимым", key="bundle_replace")
+    col1, col2 = st.columns(2)
+    dry_run = col1.button("Проверить")
+    if not (dry_run or col2.button("Импортировать")):
+        return
+    try:
+        summary = bundle.import_bundle(uploaded.getvalue(), replace=replace, dry_run=dry_run)
+    except bundle.BundleError as e:
+        st.error(f"Ошибка архива: {e}")
+        return
+    manifest = summary['manifest']
+    st.write(f"Архив от {manifest['created']}, версия схемы {manifest['schema_version']}.")
+    st.dataframe(pd.DataFrame(manifest['tables']).T.rename(columns={'files': 'Файлов'}), use_container_width=True)
+    for error in summary['errors']:
+        st.error(error)
+    if dry_run:
+        if not summary['errors']:
+            st.success("Архив прошёл проверку.")
+        return
+    if summary['errors']:
+        st.warning("Архив не импортирован: файлы не записаны.")
+        return
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Записано", summary['written'])
+    col2.metric("Без изменений", summary['unchanged'])
+    col3.metric("Пропущено", len(summary['skipped']))
+    if summary['skipped']:
+        st.write("Пропущены файлы с другим содержимым:")
+        st.dataframe(pd.DataFrame({'Файл': summary['skipped']}), use_container_width=True, hide_index=True)
+
+def main():
+    st.title("Обмен данными")
+    st.write("Результаты экспериментов переносятся между машинами одним сжатым архивом "
+             "вместо сотен файлов JSON.")
+
+    st.header("Экспорт")
+    display_export()
+
+    st.divider()
+    st.header("Импорт")
+    display_import()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Общие данные проверок: небольшой экземпляр, проверка записи запуска и временный корень проекта."""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from core import aggregates, ingest, loader, query, runner, shared
+from core.solvers import common
+
+# Запуски ГА временного корня: {(метод выбора, мутация, кроссовер): [Distance повторов для 10 и 100 поколений]}
+GA_RUNS = {
+    ('Tournament', 'TworsMutation', 'CycleCrossover'): [(900, 700), (800, 750), (1000, 650)],
+    ('Tournament', 'TworsMutation', 'OrderedCrossover'): [(950, 720), (870, 690)],
+    ('EliteSelection', 'InsertionMutation', 'CycleCrossover'): [(990, 800)],
+}
+# Запуски TwoOpt/LKH временного корня: {(папка, итерации): [TotalSum повторов]}
+TSP_RUNS = {('twoopt', 10): [30, 20, 25], ('lkh', 10): [18, 19], ('twoopt', 100): [15]}
+
+
+def is_permutation(path, n):
+    return sorted(int(city) for city in path) == list(range(n))
+
+
+@pytest.fixture(scope='session')
+def distances():
+    return common.distance_matrix(common.random_coordinates(60, seed=1))
+
+
+@pytest.fixture
+def check_record():
+    """Запись запуска: маршрут - перестановка городов, Costs и TotalSum пересчитываются по матрице."""
+    def check(record, distances):
+        path = np.asarray(record['Solution'])
+        assert is_permutation(path, len(distances))
+        assert record['Costs'] == distances[path[:-1], path[1:]].tolist()
+        assert record['TotalSum'] == sum(record['Costs'])
+    return check
+
+
+def _reset_caches():
+    aggregates.clear_cache()
+    query.clear_cache()
+    shared.clear()
+    loader.clear_cache()
+
+
+def write_workspace(initial_dir='data/initial'):
+    """Файлы запусков GA_RUNS и TSP_RUNS в разметке data/initial."""
+    for (selection, mutation, crossover), repeats in GA_RUNS.items():
+        indicators = [{'GenerationCount': count, 'MinPopulation': 2, 'MaxPopulation': 100, 'TimeInSec': 0.01 * count,
+                       'Fintess': 1 / distance, 'Distance': distance}
+                      for repeat in repeats for count, distance in zip((10, 100), repeat)]
+        runner.write_combination(selection, mutation, crossover, indicators, initial_dir)
+    for (folder, iterations), totals in TSP_RUNS.items():
+        os.makedirs(os.path.join(initial_dir, folder, str(iterations)), exist_ok=True)
+        for repeat, total in enumerate(totals, 1):
+            record = {'Algorithm': 'TwoOpt' if folder == 'twoopt' else 'Lkh', 'Solution': [0, 2, 1],
+                      'Costs': [total - 1, 1], 'TotalSum': total, 'Iterations': iterations,
+                      'ElapsedMilliseconds': 10 * repeat}
+            path = os.path.join(initial_dir, folder, str(iterations), f'solution_{repeat}.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(record, f)
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Временный корень проекта с data/initial из GA_RUNS и TSP_RUNS: {'ga': ..., 'tsp': ...}.
+
+    Пути data/... в модулях core относительные, поэтому хранилище, индекс
+    агрегатов и общий слой строятся внутри tmp_path; кэши процесса
+    сбрасываются до и после проверки.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ingest, '_last_refresh', {})
+    monkeypatch.setitem(shared._state, 'generation', None)
+    _reset_caches()
+    write_workspace()
+    yield {'ga': GA_RUNS, 'tsp': TSP_RUNS}
+    _reset_caches()
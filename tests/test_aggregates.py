@@ -0,0 +1,46 @@
+"""Индекс агрегатов: лучшие запуски и статистики по группам, пересборка по поколению хранилища."""
+import os
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from core import aggregates, ingest, store
+
+
+def test_ga_best_and_statistics(workspace):
+    key = ('Tournament', 'TworsMutation', 'CycleCrossover')
+    distances = [distance for _, distance in workspace['ga'][key]]
+    row = aggregates.ga_stats(*key, 100)
+    assert row['best_Distance'] == min(distances) and row['distance_count'] == len(distances)
+    assert row['distance_median'] == np.median(distances)
+    assert row['distance_std'] == np.std(distances, ddof=1)
+    best = aggregates.ga_best(*key, 100)
+    assert best['Distance'] == min(distances) and best['Data']['GenerationCount'] == 100
+    assert best['Data']['Fintess'] == 1 / min(distances)
+    assert aggregates.ga_best('RouletteWheel', 'TworsMutation', 'CycleCrossover', 100) is None
+
+
+def test_tsp_best_run(workspace):
+    totals = workspace['tsp'][('twoopt', 10)]
+    best = aggregates.tsp_best('TwoOpt', 10)
+    assert best['TotalSum'] == min(totals) and best['Costs'] == [min(totals) - 1, 1]
+    assert best['ElapsedMilliseconds'] == 10 * (totals.index(min(totals)) + 1)
+    frame = aggregates.stats_frame(aggregates.tsp_stats('TwoOpt', 10), {'Сумма': 'total'})
+    assert frame.loc['Количество', 'Сумма'] == len(totals) and frame.loc['Лучшее', 'Сумма'] == min(totals)
+
+
+def test_index_is_rebuilt_only_for_new_generation(workspace):
+    aggregates.get_index()
+    path = aggregates.index_path('ga')
+    assert pq.read_table(path).schema.metadata[b'generation'] == b'1'
+    written = os.stat(path).st_mtime_ns
+    aggregates.clear_cache()
+    aggregates.get_index()
+    assert os.stat(path).st_mtime_ns == written
+
+    with open(os.path.join(store.INITIAL_DIR, 'twoopt', '10', 'solution_9.json'), 'w', encoding='utf-8') as f:
+        f.write('{"Algorithm": "TwoOpt", "TotalSum": 5, "Costs": [4, 1], "Solution": [0, 1, 2], '
+                '"Iterations": 10, "ElapsedMilliseconds": 1}')
+    ingest.ingest()
+    assert aggregates.tsp_best('TwoOpt', 10)['TotalSum'] == 5
+    assert pq.read_table(path).schema.metadata[b'generation'] == b'2'
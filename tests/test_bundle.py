@@ -0,0 +1,113 @@
+"""Архивы экспериментов core.bundle: экспорт, импорт и отказ при ошибках."""
+import json
+import os
+
+import pytest
+
+from core import bundle, runner
+from core.solvers import common, twoopt
+
+
+def read_files(initial_dir):
+    files = {}
+    for kind, names in bundle.sources(initial_dir).items():
+        for name in names:
+            with open(os.path.join(initial_dir, name), encoding='utf-8') as f:
+                files[name] = json.load(f)
+    return files
+
+
+@pytest.fixture
+def initial_dir(tmp_path):
+    folder = str(tmp_path / 'initial')
+    indicators = [{'GenerationCount': count, 'MinPopulation': 2, 'MaxPopulation': 100, 'TimeInSec': 0.5,
+                   'Fintess': 0.97, 'Distance': 3000 - count} for count in (10, 100)]
+    runner.write_combination('Tournament', 'TworsMutation', 'CycleCrossover', indicators, folder)
+    runner.write_combination('EliteSelection', 'InsertionMutation', 'UniformCrossover', indicators[:1], folder)
+    distances = common.distance_matrix(common.random_coordinates(20, seed=1))
+    for seed in range(2):
+        record = twoopt.solve(distances, 10, seed=seed)
+        common.save_run(record, twoopt.FOLDER, 10, folder)
+    return folder
+
+
+def test_export_import_round_trip(initial_dir, tmp_path):
+    path = str(tmp_path / f'experiments{bundle.SUFFIX}')
+    bundle.export_bundle(path, initial_dir)
+    target = str(tmp_path / 'imported')
+    summary = bundle.import_bundle(path, target, ingest=False)
+    assert summary['errors'] == []
+    assert summary['written'] == 4
+    assert read_files(target) == read_files(initial_dir)
+
+    again = bundle.import_bundle(path, target, ingest=False)
+    assert again['written'] == 0 and again['unchanged'] == 4
+
+
+def test_truncated_archive_writes_nothing(initial_dir, tmp_path):
+    data = bundle.export_bytes(initial_dir)
+    target = str(tmp_path / 'imported')
+    with pytest.raises(bundle.BundleError):
+        bundle.import_bundle(data[:len(data) // 2], target, ingest=False)
+    # Ни initial_dir, ни временного каталога распаковки
+    assert os.listdir(tmp_path) == ['initial']
+
+
+def test_invalid_batch_writes_nothing(initial_dir, tmp_path, monkeypatch):
+    data = bundle.export_bytes(initial_dir)
+    validate = bundle.validate_batch
+    monkeypatch.setattr(bundle, 'validate_batch',
+                        lambda kind, batch: ['ошибка'] if kind == 'tsp' else validate(kind, batch))
+    target = str(tmp_path / 'imported')
+    summary = bundle.import_bundle(data, target, ingest=False)
+    assert summary['errors'] == ['ошибка'] and summary['written'] == 0
+    assert os.listdir(tmp_path) == ['initial']
+
+
+@pytest.mark.parametrize('source', [
+    'Tournament/TworsMutation/..\\..\\evil.json',
+    'Tournament/TworsMutation/C:evil.json',
+    'Tournament/../evil.json',
+    '../TworsMutation/evil.json',
+])
+def test_source_paths_outside_initial_dir_are_rejected(source):
+    assert not bundle._SOURCE['ga'].match(source)
+
+
+def test_target_path_stays_inside_initial_dir(tmp_path):
+    with pytest.raises(bundle.BundleError):
+        bundle._target_path(str(tmp_path), 'twoopt/10/../../../evil.json')
+    assert bundle._target_path(str(tmp_path), 'twoopt/10/solution.json').startswith(str(tmp_path))
+
+
+def test_changed_files_are_kept_unless_replace(initial_dir, tmp_path):
+    data = bundle.export_bytes(initial_dir)
+    target = str(tmp_path / 'imported')
+    assert bundle.import_bundle(data, target, dry_run=True, ingest=False)['written'] == 0
+    assert not os.path.exists(target)
+    bundle.import_bundle(data, target, ingest=False)
+    name = sorted(read_files(target))[0]
+    path = os.path.join(target, name)
+    with open(path, encoding='utf-8') as f:
+        changed = dict(json.load(f), Note='изменён')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(changed, f)
+
+    summary = bundle.import_bundle(data, target, ingest=False)
+    assert summary['skipped'] == [name] and summary['written'] == 0
+    assert read_files(target)[name] == changed
+    summary = bundle.import_bundle(data, target, replace=True, ingest=False)
+    assert summary['written'] == 1
+    assert read_files(target) == read_files(initial_dir)
+
+
+def test_fields_without_columns_survive_round_trip(initial_dir, tmp_path):
+    name = sorted(bundle.sources(initial_dir)['tsp'])[0]
+    path = os.path.join(initial_dir, name)
+    with open(path, encoding='utf-8') as f:
+        data = dict(json.load(f), Instance='random-20-1', Comment={'seed': 0})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    target = str(tmp_path / 'imported')
+    bundle.import_bundle(bundle.export_bytes(initial_dir), target, ingest=False)
+    assert read_files(target)[name] == data
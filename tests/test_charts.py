@@ -0,0 +1,58 @@
+"""Прореживание LTTB, ключевые точки подписей и кэш изображений графиков."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import charts
+
+
+@pytest.fixture
+def series():
+    x = np.arange(10000)
+    y = np.sin(x / 300) * 100 + np.random.default_rng(1).normal(0, 5, len(x))
+    y[1234], y[7777] = -500, 500
+    return x, y
+
+
+def test_lttb_keeps_endpoints_and_extremes(series):
+    x, y = series
+    index = charts.lttb(x, y, 500)
+    assert index[0] == 0 and index[-1] == len(y) - 1
+    assert {1234, 7777} <= set(index.tolist())
+    assert 500 <= len(index) <= 502
+    assert np.all(np.diff(index) > 0)
+
+
+@pytest.mark.parametrize('threshold', [2, 10000, 20000])
+def test_lttb_keeps_short_series(series, threshold):
+    x, y = series
+    assert len(charts.lttb(x, y, threshold)) == len(y)
+
+
+def test_downsample_merges_series_and_skips_nan(series):
+    x, y = series
+    second = -y.copy()
+    second[:5000] = np.nan
+    df = pd.DataFrame({'x': x, 'first': y, 'second': second})
+    result = charts.downsample(df, 'x', ['first', 'second'], threshold=200)
+    assert len(result) <= 2 * 202 and result.index.is_monotonic_increasing
+    assert {0, 5000, 9999, 1234, 7777} <= set(result['x'])
+    short = df.iloc[:100]
+    assert charts.downsample(short, 'x', ['first'], threshold=200) is short
+
+
+def test_key_points_cover_extremes():
+    values = np.array([5.0, 3, np.nan, 9, 1, 4] * 10)
+    points = charts.key_points(values, limit=8)
+    assert {0, len(values) - 1, 4, 3} <= set(points.tolist()) and len(points) <= 8
+    assert not np.isnan(values[points]).any()
+
+
+def test_rendered_png_is_cached():
+    charts.clear_cache()
+    df = pd.DataFrame({'x': range(5), 'y': [3, 1, 4, 1, 5]})
+    first = charts.line_png(df, 'x', {'y': 'Y'}, 'Заголовок', 'x', 'y')
+    assert first.startswith(b'\x89PNG') and charts.line_png(df, 'x', {'y': 'Y'}, 'Заголовок', 'x', 'y') is first
+    charts.line_png(df.assign(y=[1, 1, 1, 1, 1]), 'x', {'y': 'Y'}, 'Заголовок', 'x', 'y')
+    assert charts.cache_info()['hits'] == 1 and charts.cache_info()['misses'] == 2
+    charts.clear_cache()
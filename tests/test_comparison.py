@@ -0,0 +1,35 @@
+"""Матрица сравнения ГА: значения лучших запусков, NaN для отсутствующих комбинаций, кэш на поколение."""
+import numpy as np
+
+from core import aggregates
+
+SELECTIONS = ['EliteSelection', 'Tournament']
+MUTATIONS = ['InsertionMutation', 'TworsMutation']
+CROSSOVERS = ['CycleCrossover', 'OrderedCrossover']
+
+
+def test_matrix_holds_best_values(workspace):
+    matrix = aggregates.select_comparison(SELECTIONS, MUTATIONS, CROSSOVERS, [10, 100, 1000])
+    assert matrix.shape == (8, 3) and list(matrix.columns) == [10, 100, 1000]
+    for key, repeats in workspace['ga'].items():
+        assert matrix.loc[key, 10] == min(first for first, _ in repeats)
+        assert matrix.loc[key, 100] == min(second for _, second in repeats)
+    assert matrix[1000].isna().all()
+    assert matrix.loc[('Tournament', 'InsertionMutation', 'CycleCrossover')].isna().all()
+
+
+def test_matrix_is_built_once_per_index(workspace):
+    first = aggregates.comparison_matrix()
+    assert aggregates.comparison_matrix() is first
+    times = aggregates.select_comparison(SELECTIONS, MUTATIONS, CROSSOVERS, [10], 'best_TimeInSec')
+    assert np.allclose(times[10].dropna(), 0.1)
+    aggregates.clear_cache()
+    assert aggregates.comparison_matrix() is not first
+
+
+def test_matrix_of_given_index(workspace):
+    index = {'frames': {'ga': aggregates.get_index()['frames']['ga'].iloc[:1]}, 'matrices': {}}
+    matrix = aggregates.select_comparison(SELECTIONS, MUTATIONS, CROSSOVERS, [10, 100], index=index)
+    assert matrix.notna().sum().sum() == 1 and 'best_Distance' in index['matrices']
+    empty = {'frames': {'ga': None}, 'matrices': {}}
+    assert aggregates.select_comparison(SELECTIONS, MUTATIONS, CROSSOVERS, [10], index=empty).isna().all().all()
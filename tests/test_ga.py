@@ -0,0 +1,57 @@
+"""Генетический алгоритм: операторы сохраняют перестановки, запуск записывается с экземпляром."""
+import json
+
+import numpy as np
+import pytest
+
+from core import instances, runner
+from core.solvers import common, ga
+
+
+def is_permutation(path, n):
+    return sorted(int(city) for city in path) == list(range(n))
+
+
+@pytest.mark.parametrize('name', sorted(ga.CROSSOVERS))
+def test_crossover_keeps_permutations(name):
+    cross, parent_count = ga.CROSSOVERS[name]
+    rng = np.random.default_rng(7)
+    parents = np.argsort(rng.random((parent_count, 30, 12)), axis=2)
+    children = cross(parents, rng)
+    assert children.shape == (30, 12)
+    assert all(is_permutation(child, 12) for child in children)
+
+
+@pytest.mark.parametrize('name', sorted(ga.MUTATIONS))
+def test_mutation_keeps_permutations(name):
+    index = ga.MUTATIONS[name](40, 12, np.random.default_rng(8))
+    assert index.shape == (40, 12)
+    assert all(is_permutation(row, 12) for row in index)
+
+
+@pytest.mark.parametrize('name', sorted(ga.SELECTIONS))
+def test_selection_picks_population_members(name):
+    fitness = np.random.default_rng(9).random(20)
+    chosen = ga.SELECTIONS[name](fitness, 50, np.random.default_rng(10))
+    assert len(chosen) == 50
+    assert ((0 <= chosen) & (chosen < 20)).all()
+
+
+def test_evolve_returns_valid_path(distances):
+    path, length = ga.evolve(distances, 'Tournament', 'TworsMutation', 'OrderedCrossover', 20, seed=11)
+    assert is_permutation(path, len(distances))
+    assert length == common.tour_length(distances, path, closed=False)
+
+
+def test_saved_run_records_instance(tmp_path):
+    result = ga.run('Tournament', 'TworsMutation', 'OrderedCrossover', 10, seed=1, cities=20, instance_seed=2)
+    name = instances.random_name(20, 2)
+    path = runner.write_combination('Tournament', 'TworsMutation', 'OrderedCrossover', [result],
+                                    str(tmp_path / 'runs'), instance=name)
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['Instance'] == name and data['NumericalIndicators'] == [result]
+    # По имени экземпляра восстанавливается та же матрица, на которой выполнялся запуск
+    instance = instances.load(name, str(tmp_path))
+    np.testing.assert_array_equal(instances.matrix(instance),
+                                  common.distance_matrix(common.random_coordinates(20, 2)))
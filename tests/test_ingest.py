@@ -0,0 +1,94 @@
+"""Инкрементальная загрузка data/initial в хранилище: только изменённые файлы, пропуск повреждённых."""
+import json
+import os
+
+import pytest
+
+from core import ingest, runner, store
+
+INDICATORS = [{'GenerationCount': count, 'MinPopulation': 2, 'MaxPopulation': 100, 'TimeInSec': 0.5,
+               'Fintess': 0.97, 'Distance': 3000 - count} for count in (10, 100)]
+
+
+def write_tsp(initial_dir, name, total):
+    folder = os.path.join(initial_dir, 'twoopt', '10')
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'Algorithm': 'TwoOpt', 'Solution': [0, 1, 2], 'Costs': [total - 1, 1], 'TotalSum': total,
+                   'Iterations': 10, 'ElapsedMilliseconds': 5}, f)
+    return path
+
+
+def tsp_totals(store_dir):
+    table = store.read_table('tsp', ['source', 'TotalSum'], store_dir=store_dir)
+    return dict(zip(table['source'].to_pylist(), table['TotalSum'].to_pylist()))
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    # Чтение хранилища само вызывает загрузку из data/initial, поэтому проверки идут во временном корне
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ingest, '_last_refresh', {})
+    initial_dir, store_dir = store.INITIAL_DIR, store.STORE_DIR
+    runner.write_combination('Tournament', 'TworsMutation', 'CycleCrossover', INDICATORS, initial_dir)
+    write_tsp(initial_dir, 'solution_a.json', 30)
+    write_tsp(initial_dir, 'solution_b.json', 20)
+    return initial_dir, store_dir
+
+
+def test_only_changed_files_are_read(dirs):
+    initial_dir, store_dir = dirs
+    first = ingest.ingest(initial_dir, store_dir)
+    assert len(first['added']) == 3 and ingest.store_generation(store_dir) == 1
+    assert store.read_table('ga', store_dir=store_dir).num_rows == 2
+
+    again = ingest.ingest(initial_dir, store_dir)
+    assert again == {'added': [], 'modified': [], 'removed': [], 'errors': []}
+    assert ingest.store_generation(store_dir) == 1
+
+    path = write_tsp(initial_dir, 'solution_b.json', 25)
+    os.utime(path, ns=(1, 1))
+    write_tsp(initial_dir, 'solution_c.json', 40)
+    os.remove(os.path.join(initial_dir, 'twoopt', '10', 'solution_a.json'))
+    summary = ingest.ingest(initial_dir, store_dir)
+    assert summary['added'] == ['twoopt/10/solution_c.json']
+    assert summary['modified'] == ['twoopt/10/solution_b.json']
+    assert summary['removed'] == ['twoopt/10/solution_a.json']
+    assert ingest.store_generation(store_dir) == 2
+    assert tsp_totals(store_dir) == {'twoopt/10/solution_b.json': 25, 'twoopt/10/solution_c.json': 40}
+
+
+def test_touched_file_with_same_content_keeps_generation(dirs):
+    initial_dir, store_dir = dirs
+    ingest.ingest(initial_dir, store_dir)
+    os.utime(os.path.join(initial_dir, 'twoopt', '10', 'solution_a.json'), ns=(1, 1))
+    assert ingest.ingest(initial_dir, store_dir)['modified'] == []
+    assert ingest.store_generation(store_dir) == 1
+
+
+def test_malformed_file_is_skipped_and_retried(dirs):
+    initial_dir, store_dir = dirs
+    partial = os.path.join(initial_dir, 'twoopt', '10', 'solution_d.json')
+    with open(partial, 'w', encoding='utf-8') as f:
+        f.write('{"Algorithm": "TwoOpt", "TotalSum": 1')
+    summary = ingest.ingest(initial_dir, store_dir)
+    assert len(summary['added']) == 3
+    assert [error.split(':')[0] for error in summary['errors']] == ['twoopt/10/solution_d.json']
+    assert set(tsp_totals(store_dir)) == {'twoopt/10/solution_a.json', 'twoopt/10/solution_b.json'}
+
+    # Дописанный файл читается при следующей загрузке, хотя папка не менялась
+    write_tsp(initial_dir, 'solution_d.json', 10)
+    summary = ingest.ingest(initial_dir, store_dir)
+    assert summary['added'] == ['twoopt/10/solution_d.json'] and summary['errors'] == []
+    assert tsp_totals(store_dir)['twoopt/10/solution_d.json'] == 10
+
+
+def test_broken_update_keeps_previous_rows(dirs):
+    initial_dir, store_dir = dirs
+    ingest.ingest(initial_dir, store_dir)
+    with open(os.path.join(initial_dir, 'twoopt', '10', 'solution_a.json'), 'w', encoding='utf-8') as f:
+        f.write('[1, 2')
+    summary = ingest.ingest(initial_dir, store_dir)
+    assert len(summary['errors']) == 1 and summary['removed'] == []
+    assert tsp_totals(store_dir)['twoopt/10/solution_a.json'] == 30
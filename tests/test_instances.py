@@ -0,0 +1,58 @@
+"""Экземпляры TSPLIB: разбор явных матриц, вычисление расстояний по координатам и бюджет памяти."""
+import os
+
+import numpy as np
+
+from core import instances
+from core.solvers import common, twoopt
+
+LOWER_DIAG = """NAME: lower-4
+TYPE: TSP
+DIMENSION: 4
+EDGE_WEIGHT_TYPE: EXPLICIT
+EDGE_WEIGHT_FORMAT: LOWER_DIAG_ROW
+EDGE_WEIGHT_SECTION
+0
+3 0
+5 4 0
+7 6 2 0
+EOF
+"""
+
+
+def test_explicit_matrix_is_symmetric_int32(tmp_path):
+    (tmp_path / 'lower-4.tsp').write_text(LOWER_DIAG, encoding='utf-8')
+    instance = instances.load('lower-4', str(tmp_path))
+    expected = np.array([[0, 3, 5, 7], [3, 0, 4, 6], [5, 4, 0, 2], [7, 6, 2, 0]])
+    assert isinstance(instance['distances'], np.memmap) and instance['distances'].dtype == np.int32
+    np.testing.assert_array_equal(instance['distances'], expected)
+    assert instances.tour_length(instance, [0, 1, 2, 3]) == 9
+
+
+def test_coordinate_distances_match_dense(distances):
+    coordinates = common.random_coordinates(60, seed=1)
+    view = instances.CoordinateDistances('EUC_2D', coordinates)
+    np.testing.assert_array_equal(view.dense(), distances)
+    np.testing.assert_array_equal(view[5], distances[5])
+    np.testing.assert_array_equal(view[[1, 2], [3, 4]], distances[[1, 2], [3, 4]])
+    assert twoopt.solve(view, 20, seed=5)['Solution'] == twoopt.solve(distances, 20, seed=5)['Solution']
+
+
+def test_matrix_over_budget_stays_lazy(tmp_path, monkeypatch):
+    name = instances.random_instance(30, 1, str(tmp_path))
+    instance = instances.load(name, str(tmp_path))
+    assert isinstance(instances.matrix(instance), np.ndarray)
+    monkeypatch.setattr(instances, 'BUDGET_BYTES', 0)
+    assert isinstance(instances.matrix(instance), instances.CoordinateDistances)
+
+
+def test_evicted_random_instance_is_recreated(tmp_path, monkeypatch):
+    names = [instances.random_instance(20, seed, str(tmp_path)) for seed in range(2)]
+    for age, name in enumerate(names):
+        os.utime(instances.source_path(name, str(tmp_path)), (1000 + age, 1000 + age))
+    monkeypatch.setattr(instances, 'RANDOM_KEEP', 2)
+    names.append(instances.random_instance(20, 2, str(tmp_path)))
+    assert instances.available(instances_dir=str(tmp_path)) == names[1:]
+    instance = instances.load(names[0], str(tmp_path))
+    np.testing.assert_array_equal(instances.matrix(instance),
+                                  common.distance_matrix(common.random_coordinates(20, 0)))
@@ -0,0 +1,47 @@
+"""Фоновые задачи: итог и история прогресса, ошибка решателя, отмена выполняемой задачи."""
+import time
+
+from core import jobs
+from core.solvers import ga
+
+
+def wait(job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.get(job_id)
+        if job['status'] in jobs.FINISHED:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'задача {job_id} не завершилась за {timeout} с')
+
+
+def test_result_and_history():
+    job_id = jobs.submit('ГА', ga.run, 'Tournament', 'TworsMutation', 'CycleCrossover', 50, 1, cities=20,
+                         owner='test')
+    job = wait(job_id)
+    assert job['status'] == jobs.DONE and job['error'] is None and job['progress'] == 1.0
+    expected = ga.run('Tournament', 'TworsMutation', 'CycleCrossover', 50, 1, cities=20)
+    assert {key: value for key, value in job['result'].items() if key != 'TimeInSec'} == \
+        {key: value for key, value in expected.items() if key != 'TimeInSec'}
+    assert job['history'] and job['history'][-1]['Generation'] == 50
+    assert job['history'][-1]['Distance'] == job['result']['Distance']
+    assert [row['Generation'] for row in job['history']] == sorted(row['Generation'] for row in job['history'])
+    assert job_id in [row['id'] for row in jobs.jobs(owner='test')]
+    assert jobs.cancel(job_id) is False
+
+
+def test_solver_error_fails_job():
+    job = wait(jobs.submit('ГА', ga.run, 'NoSuchSelection', 'TworsMutation', 'CycleCrossover', 10, 1, cities=10))
+    assert job['status'] == jobs.FAILED and job['result'] is None
+    assert 'KeyError' in job['error']
+
+
+def test_running_job_is_cancelled():
+    job_id = jobs.submit('ГА', ga.run, 'Tournament', 'TworsMutation', 'CycleCrossover', 10 ** 7, 1, cities=50)
+    deadline = time.monotonic() + 60
+    while jobs.get(job_id)['status'] != jobs.RUNNING and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert jobs.cancel(job_id) is True
+    job = wait(job_id)
+    assert job['status'] == jobs.CANCELLED and job['result'] is None
+    assert jobs.get(10 ** 9) is None and jobs.cancel(10 ** 9) is False
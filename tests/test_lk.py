@@ -0,0 +1,37 @@
+"""Локальный поиск в стиле Лина-Кернигана: допустимость маршрутов и ограничение по времени."""
+import numpy as np
+import pytest
+
+from core.solvers import common, lk, twoopt
+
+
+@pytest.mark.parametrize('start', ['random', 'nearest'])
+def test_returns_valid_path(distances, check_record, start):
+    record = lk.solve(distances, 20, seed=3, start=start)
+    check_record(record, distances)
+    assert record['Algorithm'] == lk.ALGORITHM
+
+
+def test_view_matches_dense(distances, monkeypatch):
+    dense = lk.solve(distances, 20, seed=4)
+    monkeypatch.setattr(common, 'DENSE_BYTES', 0)
+    assert lk.solve(distances, 20, seed=4)['Solution'] == dense['Solution']
+
+
+def test_or_move_keeps_positions():
+    tour = np.arange(12)
+    position = np.arange(12)
+    lk.move_segment(tour, position, 2, 3, 8, True)
+    assert tour.tolist() == [0, 1, 5, 6, 7, 8, 4, 3, 2, 9, 10, 11]
+    np.testing.assert_array_equal(position[tour], np.arange(12))
+
+
+def test_time_limit_covers_initial_improvement(distances):
+    augmented = common.with_dummy(distances)
+    tour = np.append(twoopt.initial_tour(distances, 1, 'random'), len(distances))
+    candidates = common.nearest_neighbors(distances, 8, dummy=True)
+    best, length, done = lk.optimize(augmented, tour, candidates, 100, time_limit=0)
+    # Начальное улучшение прервано до первого хода, попытки возмущения не выполнялись
+    assert done == 0
+    np.testing.assert_array_equal(best, tour)
+    assert length == common.tour_length(augmented, tour)
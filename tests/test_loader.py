@@ -0,0 +1,59 @@
+"""Кэш JSON файлов: повторное чтение из кэша, перечитывание изменённого файла и лимиты."""
+import json
+import os
+
+import pytest
+
+from core import loader
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(loader, 'MAX_ENTRIES', loader.MAX_ENTRIES)
+    monkeypatch.setattr(loader, 'MAX_BYTES', loader.MAX_BYTES)
+    loader.clear_cache()
+    yield
+    loader.clear_cache()
+
+
+def write(path, data):
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return str(path)
+
+
+def test_second_load_is_a_hit(tmp_path):
+    path = write(tmp_path / 'a.json', {'TotalSum': 1})
+    first = loader.load_json(path)
+    assert loader.load_json(path) is first
+    info = loader.cache_info()
+    assert (info['hits'], info['misses'], info['entries']) == (1, 1, 1)
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    path = write(tmp_path / 'a.json', {'TotalSum': 1})
+    loader.load_json(path)
+    write(tmp_path / 'a.json', {'TotalSum': 22})
+    os.utime(path, ns=(1, 1))
+    assert loader.load_json(path) == {'TotalSum': 22}
+    assert loader.cache_info()['bytes'] == os.path.getsize(path)
+
+
+def test_limits_evict_least_recently_used(tmp_path):
+    paths = [write(tmp_path / f'{name}.json', {'name': name}) for name in 'abc']
+    loader.configure(max_entries=2)
+    for path in paths[:2]:
+        loader.load_json(path)
+    loader.load_json(paths[0])
+    loader.load_json(paths[2])
+    info = loader.cache_info()
+    assert info['entries'] == 2 and info['evictions'] == 1
+    loader.load_json(paths[0])
+    assert loader.cache_info()['hits'] == 2
+
+    loader.configure(max_bytes=os.path.getsize(paths[0]))
+    assert loader.cache_info()['entries'] == 1
+
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        loader.load_json(str(tmp_path / 'missing.json'))
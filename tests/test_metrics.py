@@ -0,0 +1,83 @@
+"""Замеры разделов: вложенные замеры и их пики памяти, экспорт в файлы, ошибки записи файла метрик."""
+import json
+import tracemalloc
+
+import pytest
+
+from core import metrics
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    # Файл Prometheus по умолчанию задан относительным путём
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(metrics, '_totals', {})
+    monkeypatch.setattr(metrics, '_export', {'jsonl': False, 'prometheus': False})
+    monkeypatch.setattr(metrics, 'METRICS_DIR', str(tmp_path / 'metrics'))
+    monkeypatch.setattr(metrics, 'JSONL_FILE', str(tmp_path / 'metrics' / 'metrics.jsonl'))
+    yield
+    metrics.end_run()
+
+
+@metrics.instrument('inner')
+def inner(size):
+    # Временный список: прирост памяти после выхода мал, пик - нет
+    return len(list(range(size)))
+
+
+@metrics.instrument('outer')
+def outer(size):
+    return inner(size) + inner(size // 10)
+
+
+def test_nested_records_keep_inner_peaks():
+    metrics.start_run('страница', memory=True)
+    assert outer(200_000) == 220_000
+    run = metrics.end_run()
+    assert not tracemalloc.is_tracing() and metrics._frames == {}
+    assert [(record['name'], record['depth']) for record in run['records']] == \
+        [('outer', 0), ('inner', 1), ('inner', 1)]
+    first = run['records'][1]
+    assert first['peak_bytes'] > 200_000 * 8 > first['alloc_bytes']
+    assert run['records'][0]['peak_bytes'] >= first['peak_bytes']
+    assert metrics.totals()['inner']['count'] == 2 and metrics.totals()['outer']['count'] == 1
+
+
+def test_no_run_no_records():
+    assert outer(10) == 11
+    assert metrics.totals() == {}
+
+
+def test_jsonl_and_prometheus_export(tmp_path):
+    metrics.configure(jsonl=True, prometheus=True)
+    metrics.start_run('страница')
+    outer(100)
+    metrics.end_run()
+    assert (tmp_path / metrics.PROMETHEUS_FILE).exists()
+    with open(metrics.JSONL_FILE, encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    assert [line['name'] for line in lines] == ['inner', 'inner', 'outer']
+    assert all(line['page'] == 'страница' and 'alloc_bytes' not in line for line in lines)
+    path = str(tmp_path / 'metrics.prom')
+    metrics.write_prometheus(path)
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    assert 'app_section_seconds_count{name="inner"} 2' in text
+    assert 'app_section_seconds_count{name="outer"} 1' in text
+
+
+def test_write_error_is_swallowed(tmp_path, monkeypatch):
+    # Каталог метрик занят обычным файлом: запись замера невозможна
+    (tmp_path / 'busy').write_text('')
+    monkeypatch.setattr(metrics, 'METRICS_DIR', str(tmp_path / 'busy'))
+    monkeypatch.setattr(metrics, 'JSONL_FILE', str(tmp_path / 'busy' / 'metrics.jsonl'))
+    metrics.configure(jsonl=True)
+    assert outer(10) == 11
+
+    @metrics.instrument('failing')
+    def failing():
+        raise KeyError('исходная ошибка')
+
+    with pytest.raises(KeyError, match='исходная ошибка'):
+        failing()
+    assert metrics.totals()['failing']['count'] == 1
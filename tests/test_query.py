@@ -0,0 +1,95 @@
+"""Сервис запросов: ETag и 304, постраничная выдача, ошибки запросов, запасные значения data/best."""
+import json
+import os
+
+import pytest
+
+from core import ingest, query, store
+
+
+@pytest.fixture
+def service(workspace, monkeypatch):
+    # Версия данных проверяется на каждый запрос, иначе новое поколение заметно только через секунду
+    monkeypatch.setattr(query, 'VERSION_INTERVAL', 0)
+    return workspace
+
+
+def add_run():
+    with open(os.path.join(store.INITIAL_DIR, 'twoopt', '10', 'solution_9.json'), 'w', encoding='utf-8') as f:
+        f.write('{"Algorithm": "TwoOpt", "TotalSum": 5, "Costs": [4, 1], "Solution": [0, 1, 2], '
+                '"Iterations": 10, "ElapsedMilliseconds": 1}')
+    ingest.ingest()
+
+
+def test_etag_and_not_modified(service):
+    params = {'algorithm': 'twoopt', 'iterations': '10'}
+    tag = query.etag('tsp', 'runs', params)
+    assert query.etag('tsp', 'runs', {'iterations': 10, 'algorithm': 'twoopt', 'selection': ''}) == tag
+    assert query.etag('tsp', 'runs', {'algorithm': 'lkh', 'iterations': '10'}) != tag
+
+    status, body, first = query.execute('/api/tsp/runs', params)
+    assert status == 200 and first == tag and json.loads(body)['total'] == 3
+    assert query.execute('/api/tsp/runs', params, if_none_match=f'"other", {tag}') == (304, b'', tag)
+    assert query.cache_info()['misses'] == 1 and query.cache_info()['not_modified'] == 1
+
+    add_run()
+    status, body, second = query.execute('/api/tsp/runs', params, if_none_match=tag)
+    assert status == 200 and second != tag and json.loads(body)['total'] == 4
+    assert json.loads(query.execute('/api/version', {})[1])['generation'] == 2
+
+
+def test_pagination(service):
+    totals = sorted((algorithm, count, repeat + 1, total) for (algorithm, count), values in service['tsp'].items()
+                    for repeat, total in enumerate(values))
+    page = query.query('tsp', 'runs', offset=2, limit=3, columns='TotalSum,repeat')
+    assert (page['total'], page['offset'], page['limit']) == (len(totals), 2, 3)
+    assert [(item['repeat'], item['TotalSum']) for item in page['items']] == \
+        [(repeat, total) for *_, repeat, total in totals[2:5]]
+    assert query.query('tsp', 'runs', offset=100)['items'] == []
+    assert query.query('tsp', 'runs', limit=10 ** 6)['limit'] == query.MAX_PAGE_SIZE
+
+    best = query.query('ga', 'best', selection='Tournament', limit=1)
+    assert best['total'] == 4 and len(best['items']) == 1
+    summary = query.query('ga', 'summary', by='selection', iterations=100)
+    assert {item['selection']: item['count'] for item in summary['items']} == {'EliteSelection': 1, 'Tournament': 5}
+    assert query.query('ga', 'summary', by='selection', iterations=100) is summary
+
+
+@pytest.mark.parametrize('path, params', [
+    ('/api/ga/best', {'algorithm': 'twoopt'}),
+    ('/api/tsp/best', {'iterations': 'много'}),
+    ('/api/tsp/runs', {'offset': '-1'}),
+    ('/api/tsp/runs', {'columns': 'TotalSum,NoSuchColumn'}),
+    ('/api/ga/summary', {'value': 'TotalSum'}),
+    ('/api/ga/summary', {'columns': 'Distance'}),
+    ('/api/ga/nosuch', {}),
+    ('/api/vrp/best', {}),
+])
+def test_bad_requests(service, path, params):
+    with pytest.raises(query.QueryError):
+        query.execute(path, params)
+
+
+def test_unknown_path(service):
+    status, body, tag = query.execute('/api/ga', {})
+    assert status == 404 and tag is None and 'error' in json.loads(body)
+
+
+def test_comparison_falls_back_to_best_files(service):
+    os.makedirs(query.BEST_DIR)
+    for selection, distance in (('RouletteWheel', 555), ('Tournament', 1)):
+        with open(os.path.join(query.BEST_DIR, f'best_results_{selection}.json'), 'w', encoding='utf-8') as f:
+            json.dump({'TworsMutation': {'CycleCrossover': {'100': {
+                'Distance': distance, 'Data': {'GenerationCount': 100, 'TimeInSec': 2.0, 'Fintess': 1 / distance}}}}},
+                f)
+    matrix = query.comparison(['RouletteWheel', 'Tournament'], ['TworsMutation'], ['CycleCrossover'], [10, 100])
+    assert matrix.loc[('RouletteWheel', 'TworsMutation', 'CycleCrossover'), 100] == 555
+    # Комбинация с исходными запусками берётся из них, а не из data/best
+    key = ('Tournament', 'TworsMutation', 'CycleCrossover')
+    assert matrix.loc[key, 100] == min(second for _, second in service['ga'][key])
+    assert query.statistics('ga', selection='RouletteWheel', mutation='TworsMutation', crossover='CycleCrossover',
+                            iterations=100)['origin'] == 'best'
+    assert query.statistics_frame('ga', {'Длина': 'distance'}, selection='RouletteWheel', mutation='TworsMutation',
+                                  crossover='CycleCrossover', iterations=100) is None
+    with pytest.raises(query.QueryError):
+        query.comparison(['Tournament'], ['TworsMutation'], ['CycleCrossover'], [100], value='best_TotalSum')
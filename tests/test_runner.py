@@ -0,0 +1,84 @@
+"""Сетка экспериментов: продолжение с контрольной точки, повтор упавших задач и запись комбинаций."""
+import json
+import os
+
+import pyarrow.parquet as pq
+import pytest
+
+from core import runner
+
+
+def solver(selection, mutation, crossover, generations, seed):
+    """Решатель проверки: каждый вызов отмечается в файле RUNNER_CALLS, при RUNNER_FAIL падают задачи 100 поколений."""
+    with open(os.environ['RUNNER_CALLS'], 'a', encoding='utf-8') as f:
+        f.write(f'{seed}\n')
+    if generations == 100 and os.environ.get('RUNNER_FAIL'):
+        raise RuntimeError('сбой решателя')
+    return {'GenerationCount': generations, 'MinPopulation': 2, 'MaxPopulation': 10, 'TimeInSec': 0.1,
+            'Fintess': 1.0, 'Distance': seed}
+
+
+@pytest.fixture
+def calls(tmp_path, monkeypatch):
+    path = tmp_path / 'calls.txt'
+    path.touch()
+    monkeypatch.setenv('RUNNER_CALLS', str(path))
+    return lambda: len(path.read_text(encoding='utf-8').split())
+
+
+def combination_files(initial_dir):
+    return sorted(os.path.join(root, name) for root, _, names in os.walk(initial_dir) for name in names)
+
+
+def test_resume_runs_only_missing_tasks(tmp_path, calls, monkeypatch):
+    tasks = runner.make_grid(['Tournament'], ['TworsMutation'], ['CycleCrossover', 'OrderedCrossover'], [10, 100], 2)
+    checkpoint, initial_dir = str(tmp_path / 'checkpoint.jsonl'), str(tmp_path / 'initial')
+    monkeypatch.setenv('RUNNER_FAIL', '1')
+    with pytest.raises(runner.GridError) as error:
+        runner.run_grid(solver, tasks, checkpoint, 1, initial_dir)
+    assert sorted(error.value.failures) == sorted(task['id'] for task in tasks if task['generations'] == 100)
+    assert calls() == 8 and combination_files(initial_dir) == []
+    done, written = runner.load_checkpoint(checkpoint)
+    assert len(done) == 4 and written == set()
+
+    monkeypatch.delenv('RUNNER_FAIL')
+    results = runner.run_grid(solver, tasks, checkpoint, 1, initial_dir)
+    assert calls() == 12 and len(results) == 8
+    files = combination_files(initial_dir)
+    assert len(files) == 2
+    with open(files[0], encoding='utf-8') as f:
+        data = json.load(f)
+    first = [task for task in tasks if task['crossover'] == data['Crossover']]
+    assert data['NumericalIndicators'] == [results[task['id']] for task in first]
+
+    assert runner.run_grid(solver, tasks, checkpoint, 1, initial_dir) == results
+    assert calls() == 12 and combination_files(initial_dir) == files
+
+
+def test_checkpoint_of_other_seed_is_rejected(tmp_path, calls):
+    checkpoint = str(tmp_path / 'checkpoint.jsonl')
+    tasks = runner.make_grid(['Tournament'], ['TworsMutation'], ['CycleCrossover'], [10], 1)
+    runner.run_grid(solver, tasks, checkpoint, 1, write=False)
+    with pytest.raises(runner.CheckpointError):
+        runner.run_grid(solver, runner.make_grid(['Tournament'], ['TworsMutation'], ['CycleCrossover'], [10], 1,
+                                                 seed=1), checkpoint, 1, write=False)
+    with pytest.raises(runner.CheckpointError):
+        runner.run_grid('core.solvers.ga:run', tasks, checkpoint, 1, write=False)
+    assert calls() == 1
+
+
+def test_grid_seeds_are_stable():
+    tasks = runner.make_grid(['Tournament', 'EliteSelection'], ['TworsMutation'], ['CycleCrossover'], [10, 100], 2,
+                             seed=3)
+    assert len({task['seed'] for task in tasks}) == len(tasks) == 8
+    assert tasks[5]['id'] == 'EliteSelection/TworsMutation/CycleCrossover/10/2'
+    assert tasks[5]['seed'] == 3 * 1_000_003 + 5
+
+
+def test_results_file_replaces_combination_files(tmp_path, calls):
+    tasks = runner.make_grid(['Tournament'], ['TworsMutation'], ['CycleCrossover'], [10], 2)
+    path = str(tmp_path / 'results.parquet')
+    runner.run_grid(solver, tasks, str(tmp_path / 'checkpoint.jsonl'), 1, str(tmp_path / 'initial'), path)
+    table = pq.read_table(path)
+    assert table.num_rows == 2 and table['repeat'].to_pylist() == [1, 2]
+    assert not os.path.exists(tmp_path / 'initial')
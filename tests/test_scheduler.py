@@ -0,0 +1,54 @@
+"""Адаптивный запуск: переход лучших комбинаций на следующие ступени и запись результатов."""
+import json
+import os
+
+from core import runner, scheduler
+
+CONFIGS = scheduler.configurations(['Tournament', 'EliteSelection'], ['TworsMutation', 'InsertionMutation'],
+                                   ['CycleCrossover', 'OrderedCrossover'])
+
+
+def test_promote_orders_by_median_then_mean():
+    median = [5, 3, 3, 1]
+    mean = [5, 4, 2, 9]
+    assert scheduler.promote(CONFIGS[:4], median, mean, 3) == [CONFIGS[3], CONFIGS[2], CONFIGS[1]]
+
+
+def test_bracket_runs_only_promoted_configurations():
+    generations = [10, 100, 1000]
+    grid = {task['id']: task for task in runner.make_grid(['Tournament', 'EliteSelection'],
+                                                          ['TworsMutation', 'InsertionMutation'],
+                                                          ['CycleCrossover', 'OrderedCrossover'], generations, 3)}
+    # Distance комбинации растёт с её номером, повторы отличаются на единицу
+    rank = {config: number for number, config in enumerate(CONFIGS)}
+    executed = []
+
+    def execute(tasks):
+        executed.append(tasks)
+        return {task['id']: {'Distance': 100 * rank[(task['selection'], task['mutation'], task['crossover'])]
+                             + task['repeat']} for task in tasks}
+
+    rungs = scheduler.run_bracket(CONFIGS, 0, generations, grid, 3, 2, {}, execute)
+    assert [len(rung['configurations']) for rung in rungs] == [8, 4, 2]
+    assert rungs[-1]['configurations'] == ['/'.join(config) for config in CONFIGS[:2]]
+    assert rungs[0]['median'] == [100 * number + 2 for number in range(8)]
+    assert [len(tasks) for tasks in executed] == [24, 12, 6]
+    assert {task['generations'] for task in executed[2]} == {1000}
+
+
+def test_brackets_of_hyperband():
+    assert scheduler.brackets('halving', 144, 4) == [(144, 0)]
+    assert scheduler.brackets('hyperband', 144, 4, eta=4) == [(64, 0), (22, 1), (8, 2), (4, 3)]
+
+
+def test_schedule_keeps_results_apart_from_reference_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    report = scheduler.schedule('halving', ['Tournament'], ['TworsMutation'], ['CycleCrossover', 'OrderedCrossover'],
+                                [10, 20], repeats=2, eta=2, checkpoint='runs/schedule.jsonl', workers=1)
+    assert report['tasks'] == 6 and report['best'] in ('Tournament/TworsMutation/CycleCrossover',
+                                                       'Tournament/TworsMutation/OrderedCrossover')
+    assert not os.path.exists('data/initial') and not os.path.exists('data/store')
+    assert all(path.startswith(runner.RUNS_DIR) for path in report['paths'])
+    for path in report['paths']:
+        with open(path, encoding='utf-8') as f:
+            assert json.load(f)['Instance'] == scheduler.INSTANCE
@@ -0,0 +1,44 @@
+"""Общий слой данных: одна таблица на срез, вытеснение по бюджету, сброс при новом поколении хранилища."""
+import os
+
+from core import ingest, shared, store
+
+
+def test_repeated_slice_is_shared(workspace):
+    first = shared.table('tsp', algorithm='twoopt', iterations=10)
+    assert first.num_rows == len(workspace['tsp'][('twoopt', 10)])
+    assert shared.table('tsp', algorithm='twoopt', iterations=10) is first
+    assert shared.table('tsp', ['TotalSum'], algorithm='twoopt', iterations=10, selection=None).column_names == \
+        ['TotalSum']
+    info = shared.cache_info()
+    assert info['hits'] == 2 and info['misses'] == 1 and info['entries'] == 1
+    assert os.path.isdir(os.path.join(shared.CACHE_DIR, f"g{info['generation']}"))
+
+    df = shared.frame('tsp', ['TotalSum'], sort_by='TotalSum', algorithm='twoopt', iterations=10)
+    assert df['TotalSum'].tolist() == sorted(workspace['tsp'][('twoopt', 10)])
+    assert shared.frame('tsp', ['TotalSum'], sort_by='TotalSum', algorithm='twoopt', iterations=10) is df
+
+
+def test_budget_evicts_least_recently_used(workspace, monkeypatch):
+    monkeypatch.setattr(shared, 'BUDGET_BYTES', shared.BUDGET_BYTES)
+    first = shared.table('tsp', algorithm='twoopt', iterations=10)
+    shared.table('tsp', algorithm='lkh', iterations=10)
+    shared.table('tsp', algorithm='twoopt', iterations=10)
+    shared.configure(budget_bytes=1)
+    assert [entry['key'] for entry in shared.entries()] == ['table / tsp / algorithm=twoopt, iterations=10']
+    assert shared.cache_info()['evictions'] == 1
+    assert shared.table('tsp', algorithm='twoopt', iterations=10) is first
+
+
+def test_new_generation_resets_cache(workspace):
+    first = shared.table('tsp', algorithm='twoopt', iterations=10)
+    generation = shared.cache_info()['generation']
+    with open(os.path.join(store.INITIAL_DIR, 'twoopt', '10', 'solution_9.json'), 'w', encoding='utf-8') as f:
+        f.write('{"Algorithm": "TwoOpt", "TotalSum": 5, "Costs": [4, 1], "Solution": [0, 1, 2], '
+                '"Iterations": 10, "ElapsedMilliseconds": 1}')
+    ingest.ingest()
+    second = shared.table('tsp', algorithm='twoopt', iterations=10)
+    assert second is not first and second.num_rows == first.num_rows + 1
+    assert shared.cache_info()['generation'] == generation + 1
+    assert os.listdir(shared.CACHE_DIR) == [f'g{generation + 1}']
+    assert shared.table('tsp', algorithm='nosuch').num_rows == 0
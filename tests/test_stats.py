@@ -0,0 +1,92 @@
+"""Критерии, поправка Холма, размер эффекта и бутстреп core.stats."""
+import math
+
+import numpy as np
+import pytest
+
+from core import stats
+
+
+def normal_p(z):
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def test_mann_whitney_with_ties():
+    x, y = [1, 2, 2, 3], [2, 3, 4, 5]
+    values, counts = stats.padded([x, y])
+    u, p, a12 = stats.mann_whitney(values[:1], counts[:1], values[1:], counts[1:])
+    # U = 4 + 3.5 + 3.5 + 2.5; связи в объединённой выборке: 2 (три раза), 3 (два раза)
+    sigma = math.sqrt(4 * 4 / 12 * (9 - (3 ** 3 - 3 + 2 ** 3 - 2) / (8 * 7)))
+    assert u[0] == 13.5
+    assert a12[0] == pytest.approx(13.5 / 16)
+    assert p[0] == pytest.approx(normal_p((13.5 - 8 - 0.5) / sigma))
+
+
+def test_mann_whitney_groups_of_different_size():
+    values, counts = stats.padded([[1, 2, 3], [4, 5, 6, 7, 8]])
+    u, p, _ = stats.mann_whitney(values[:1], counts[:1], values[1:], counts[1:])
+    assert u[0] == 15
+    assert p[0] < 0.05
+
+
+def test_wilcoxon_with_ties_and_zeros():
+    x = [2, 1, 5, 6, 4, 7, 9]
+    y = [1, 3, 3, 3, 4, 4, 6]
+    # Разности 1, -2, 2, 3, 0, 3, 3: ноль отбрасывается, ранги |d| - 1, 2.5, 2.5, 5, 5, 5
+    w, p = stats.wilcoxon(x, y)
+    sigma = math.sqrt(6 * 7 * 13 / 24 - (2 ** 3 - 2 + 3 ** 3 - 3) / 48)
+    assert w == 18.5
+    assert p == pytest.approx(normal_p((18.5 - 10.5 - 0.5) / sigma))
+
+
+def test_wilcoxon_identical_samples():
+    assert stats.wilcoxon([1, 2, 3], [1, 2, 3]) == (0.0, 1.0)
+
+
+def test_holm():
+    adjusted = stats.holm([0.01, 0.04, 0.03, 0.005])
+    np.testing.assert_allclose(adjusted, [0.03, 0.06, 0.06, 0.02])
+
+
+def test_holm_is_capped_at_one():
+    assert stats.holm([0.5, 0.6]).tolist() == [1.0, 1.0]
+
+
+def test_hedges_g():
+    g = stats.hedges_g([1, 2, 3, 4], [2, 3, 4, 5])
+    assert g == pytest.approx(-1 / math.sqrt(5 / 3) * (1 - 3 / 23))
+
+
+def test_medians_of_padded_groups():
+    values, counts = stats.padded([[3, 1, 2], [4, 1, 3, 2], [7]])
+    np.testing.assert_allclose(stats.medians(values, counts), [2, 2.5, 7])
+
+
+def test_bootstrap_median_matches_naive_loop():
+    groups = [[5, 1, 4, 4, 9, 2], [3, 8, 1], [7, 7, 2, 6, 5, 1, 0, 3]]
+    values, counts = stats.padded(groups)
+    resamples = 50
+    samples = stats.bootstrap_samples(values, counts, resamples, rng=7)
+
+    # Та же последовательность случайных чисел; номера отсчитываются в отсортированной группе
+    uniform = np.random.default_rng(7).random((len(groups), resamples, values.shape[1]), dtype=np.float32)
+    expected = np.empty((len(groups), resamples))
+    for row, group in enumerate(groups):
+        n = len(group)
+        for r in range(resamples):
+            index = np.minimum(uniform[row, r, :n] * n, n - 1).astype(int)
+            expected[row, r] = np.median(np.sort(group).astype(float)[index])
+    np.testing.assert_allclose(samples, expected)
+
+
+def test_bootstrap_mean_matches_naive_loop():
+    groups = [[5, 1, 4, 4, 9, 2], [3, 8, 1]]
+    values, counts = stats.padded(groups)
+    samples = stats.bootstrap_samples(values, counts, 20, statistic='mean', rng=3)
+    uniform = np.random.default_rng(3).random((len(groups), 20, values.shape[1]), dtype=np.float32)
+    for row, group in enumerate(groups):
+        ordered = np.sort(group).astype(float)
+        n = len(group)
+        for r in range(20):
+            index = np.minimum(uniform[row, r, :n] * n, n - 1).astype(int)
+            assert samples[row, r] == pytest.approx(ordered[index].mean())
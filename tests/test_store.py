@@ -0,0 +1,41 @@
+"""Колоночное хранилище: разметка партиций, номера повторов и фильтры по партициям."""
+import os
+
+from core import store
+
+
+def test_runs_land_in_hive_partitions(workspace):
+    df = store.read_ga()
+    assert len(df) == 2 * sum(len(repeats) for repeats in workspace['ga'].values())
+    assert os.path.exists(store.partition_path('ga', 'Tournament', 'TworsMutation'))
+    assert os.path.exists(store.partition_path('tsp', 'lkh', '10'))
+    assert set(df['selection'].astype(str)) == {'Tournament', 'EliteSelection'}
+    assert sorted(df['crossover'].unique()) == ['CycleCrossover', 'OrderedCrossover']
+
+
+def test_filters_use_partition_and_data_columns(workspace):
+    df = store.read_ga('Tournament', 'TworsMutation', 'CycleCrossover', 100, columns=['Distance'])
+    expected = [distance for _, distance in workspace['ga'][('Tournament', 'TworsMutation', 'CycleCrossover')]]
+    assert sorted(df['Distance']) == sorted(expected)
+    assert store.read_ga(selection='RouletteWheel').empty
+    batches = list(store.scan('ga', ['Distance'], batch_size=2, selection='Tournament', iterations=10))
+    assert sum(batch.num_rows for batch in batches) == 5 and max(batch.num_rows for batch in batches) <= 2
+
+
+def test_tsp_repeats_follow_file_order(workspace):
+    df = store.read_tsp('twoopt', 10)
+    assert df['repeat'].tolist() == [1, 2, 3]
+    assert df['TotalSum'].tolist() == workspace['tsp'][('twoopt', 10)]
+    assert df['Costs'].iloc[0].tolist() == [29, 1]
+
+
+def test_merge_partition_replaces_and_renumbers():
+    table = store.build_partition('tsp', [(f'twoopt/10/{name}.json', {'TotalSum': total})
+                                          for name, total in zip('abc', (3, 1, 2))])
+    new = store.build_partition('tsp', [('twoopt/10/b.json', {'TotalSum': 7})])
+    merged = store.merge_partition('tsp', table, new, {'twoopt/10/a.json', 'twoopt/10/b.json'})
+    assert merged['source'].to_pylist() == ['twoopt/10/b.json', 'twoopt/10/c.json']
+    assert merged['TotalSum'].to_pylist() == [7, 2] and merged['repeat'].to_pylist() == [1, 2]
+    empty = store.merge_partition('tsp', merged, None, set(merged['source'].to_pylist()))
+    assert empty is None
+    assert store.build_partition('ga', []).schema == store.GA_SCHEMA
@@ -0,0 +1,52 @@
+"""Потоковое чтение рядов: блоки массива из JSON и текущие агрегаты с ограниченным числом точек."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import streaming
+
+
+@pytest.fixture
+def costs_file(tmp_path):
+    values = np.random.default_rng(1).integers(1, 10 ** 6, 5000).tolist()
+    path = tmp_path / 'solution.json'
+    path.write_text(json.dumps({'Algorithm': 'TwoOpt', 'Costs': values, 'Solution': [0, 1], 'TotalSum': 1}),
+                    encoding='utf-8')
+    return str(path), values
+
+
+@pytest.mark.parametrize('chunk_bytes', [7, 64, 1 << 20])
+def test_number_chunks_match_json(costs_file, chunk_bytes):
+    path, values = costs_file
+    chunks = list(streaming.iter_number_chunks(path, 'Costs', chunk_bytes))
+    assert np.concatenate(chunks).tolist() == values
+    assert np.concatenate(list(streaming.iter_number_chunks(path, 'Solution', chunk_bytes))).tolist() == [0, 1]
+
+
+def test_missing_and_unclosed_arrays(tmp_path):
+    path = tmp_path / 'broken.json'
+    path.write_text('{"Costs": [1, 2, 3', encoding='utf-8')
+    with pytest.raises(KeyError):
+        list(streaming.iter_number_chunks(str(path), 'Solution', 4))
+    with pytest.raises(ValueError):
+        list(streaming.iter_number_chunks(str(path), 'Costs', 4))
+
+
+def test_running_aggregates_match_pandas():
+    values = np.random.default_rng(2).random(1000)
+    chunks = np.array_split(values, 7)
+    df = list(streaming.running_aggregates(chunks, window=10, max_points=2000))[-1]
+    series = pd.Series(values)
+    np.testing.assert_allclose(df['Best'], series.cummin())
+    np.testing.assert_allclose(df['Mean'], series.rolling(10, min_periods=1).mean())
+    assert df['Index'].tolist() == list(range(1000))
+
+
+def test_points_are_thinned_and_keep_the_last_one():
+    values = np.arange(10000, 0, -1, dtype=float)
+    df = list(streaming.running_aggregates(np.array_split(values, 13), max_points=300))[-1]
+    assert len(df) <= 301
+    assert df['Index'].iloc[-1] == 9999 and df['Best'].iloc[-1] == 1
+    assert np.all(np.diff(df['Index']) > 0)
@@ -0,0 +1,69 @@
+"""Пакетная проверка маршрутов и сравнение рёбер core.tours."""
+import numpy as np
+
+from core import instances, tours
+from core.solvers import common
+
+
+def test_verify_flags_each_problem():
+    solutions = [[0, 1, 2, 3], [0, 1, 1, 3], [2, 0, 3, 1], [1, 0, 2, 3], []]
+    costs = [[1, 1, 1], [1, 1, 1], [1, 1], [2, 2, 2], []]
+    totals = [3, 3, 2, 5, 0]
+    result = tours.verify(solutions, costs, totals)
+    assert result['valid'].tolist() == [True, False, False, False, False]
+    assert result['not_permutation'].tolist() == [False, True, False, False, False]
+    assert result['costs_length'].tolist() == [False, False, True, False, False]
+    assert result['costs_sum'].tolist() == [False, False, False, True, False]
+    assert result['empty'].tolist() == [False, False, False, False, True]
+    assert result.loc[1, 'problems'] == tours.PROBLEMS['not_permutation']
+
+
+def test_verify_recomputes_costs_on_instance(tmp_path):
+    coordinates = common.random_coordinates(12, seed=1)
+    name = 'verify-12'
+    instances.write_tsplib(str(tmp_path / f'{name}.tsp'), name, coordinates)
+    instance = instances.load(name, str(tmp_path))
+    distances = common.distance_matrix(coordinates)
+    path = np.random.default_rng(2).permutation(12)
+    good = common.path_costs(distances, path).tolist()
+    wrong = good[:-1] + [good[-1] + 1]
+    result = tours.verify([path, path], [good, wrong], [sum(good), sum(wrong)], instance=instance)
+    assert result['instance_total'].tolist() == [sum(good), sum(good)]
+    assert result['valid'].tolist() == [True, False]
+    assert result['instance_costs'].tolist() == [False, True]
+    assert result['instance_sum'].tolist() == [False, True]
+
+
+def test_diff_of_open_paths():
+    result = tours.diff([0, 1, 2, 3], [3, 2, 0, 1])
+    assert result['shared'] == 2
+    assert result['only_first'].tolist() == [[1, 2]]
+    assert result['only_second'].tolist() == [[0, 2]]
+    assert result['jaccard'] == 2 / 4
+
+
+def test_overlap_matrix_counts_shared_edges():
+    overlap = tours.overlap_matrix([[0, 1, 2, 3], [3, 2, 1, 0], [0, 2, 1, 3]])
+    np.testing.assert_array_equal(overlap, [[3, 3, 1], [3, 3, 1], [1, 1, 3]])
+
+
+def test_incidence_blocks_cover_every_edge():
+    rng = np.random.default_rng(3)
+    solutions = [rng.permutation(15) for _ in range(5)]
+    values, offsets = tours.flatten(solutions)
+    blocks = list(tours.incidence_blocks(values, offsets, closed=True, block_edges=4))
+    assert all(matrix.shape[1] <= 4 for _, matrix in blocks)
+    matrix = np.hstack([matrix for _, matrix in blocks])
+    np.testing.assert_array_equal(matrix.sum(axis=1), [15] * 5)
+    overlap = tours.overlap_matrix(solutions, closed=True)
+    np.testing.assert_array_equal(matrix @ matrix.T, overlap)
+    for i, first in enumerate(solutions):
+        for j, second in enumerate(solutions):
+            assert overlap[i, j] == tours.diff(first, second, closed=True)['shared']
+
+
+def test_backbone_keeps_edges_of_every_tour():
+    result = tours.backbone([[0, 1, 2, 3], [3, 2, 1, 0], [0, 2, 1, 3]])
+    assert result[['a', 'b']].values.tolist() == [[1, 2]]
+    assert result['count'].tolist() == [3]
+    assert len(tours.backbone([[0, 1, 2, 3], [0, 2, 1, 3]], share=0.5)) == 5
@@ -0,0 +1,61 @@
+"""2-opt и общие функции решателей: допустимость маршрутов и совпадение блочных вычислений с прямыми."""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from core.solvers import common, twoopt
+
+
+def test_distance_matrix_in_blocks(monkeypatch):
+    coordinates = common.random_coordinates(50, seed=2)
+    diff = coordinates[:, None, :] - coordinates[None, :, :]
+    expected = np.rint(np.sqrt((diff ** 2).sum(-1))).astype(np.int32)
+    monkeypatch.setattr(common, 'BLOCK_BYTES', 4000)
+    np.testing.assert_array_equal(common.distance_matrix(coordinates), expected)
+
+
+@pytest.mark.parametrize('dummy', [False, True])
+def test_nearest_neighbors_in_blocks(distances, monkeypatch, dummy):
+    full = common.nearest_neighbors(common.with_dummy(distances) if dummy else distances, 8)
+    monkeypatch.setattr(common, 'BLOCK_BYTES', 3000)
+    np.testing.assert_array_equal(common.nearest_neighbors(distances, 8, dummy=dummy), full)
+
+
+def test_dummy_distances_without_copy(distances):
+    augmented = common.with_dummy(distances)
+    view = common.DummyDistances(distances)
+    n = len(distances)
+    rows = np.array([0, 5, n, n, 7])
+    columns = np.array([n, 6, 3, n, 7])
+    np.testing.assert_array_equal(view[rows, columns], augmented[rows, columns])
+    assert view[n, 4] == 0 and view[2, 9] == distances[2, 9]
+
+
+@pytest.mark.parametrize('start', ['random', 'nearest'])
+def test_returns_valid_path(distances, check_record, start):
+    record = twoopt.solve(distances, 20, seed=3, start=start)
+    check_record(record, distances)
+    assert record['Algorithm'] == twoopt.ALGORITHM
+
+
+def test_view_matches_dense(distances, monkeypatch):
+    dense = twoopt.solve(distances, 20, seed=4)
+    monkeypatch.setattr(common, 'DENSE_BYTES', 0)
+    assert twoopt.solve(distances, 20, seed=4)['Solution'] == dense['Solution']
+
+
+def test_improves_initial_tour(distances):
+    initial = twoopt.initial_tour(distances, seed=6)
+    record = twoopt.solve(distances, 200, seed=6)
+    assert record['TotalSum'] <= common.tour_length(distances, initial, closed=False)
+
+
+def test_save_run_keeps_runs_apart(distances, tmp_path):
+    record = twoopt.solve(distances, 20, seed=7)
+    path = common.save_run(record, twoopt.FOLDER, 20, str(tmp_path))
+    again = common.save_run(record, twoopt.FOLDER, 20, str(tmp_path))
+    assert os.path.dirname(path) == str(tmp_path / twoopt.FOLDER / '20') and again != path
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == record
@@ -1,4 +1,5 @@
 import streamlit as st
+from core.lazy import warm_up
 
 st.set_page_config(
     page_title="Главная",
@@ -6,6 +7,8 @@ st.set_page_config(
 )
 
 def main_page():
+    # Индекс данных и тяжёлые модули загружаются в фоне, пока открыта главная страница
+    warm_up()
     st.title("Приложение для анализа генетического алгоритма, алгоритмов TwoOpt и LKH")
 
     st.markdown("""